@@ -5,6 +5,7 @@ Controls UI
 Start/Stop bot
 Manual Buy CE / PE
 Auto-trade toggle
+Tick profiler
 """
 
 import streamlit as st
@@ -12,6 +13,7 @@ from backend.order_manager import OrderManager
 from backend.signal_engine import SignalEngine
 from scripts.run_bot import TradingBot
 from backend.data_fetcher import DATA_CACHE
+from backend.profiler import tick_profiler
 
 
 def render_controls():
@@ -59,16 +61,40 @@ def render_controls():
 
     with col_ce:
         if st.button("🟢 BUY CE"):
-            signal = SignalEngine.generate_signal(underlying_ltp)
-            signal["action"] = "BUY_CALL"
-            OrderManager._place_entry(signal)
-            st.session_state.last_signal = signal
-            st.success("CE order sent")
+            _manual_entry(underlying_ltp, "CE")
 
     with col_pe:
         if st.button("🔴 BUY PE"):
-            signal = SignalEngine.generate_signal(underlying_ltp)
-            signal["action"] = "BUY_PUT"
-            OrderManager._place_entry(signal)
-            st.session_state.last_signal = signal
-            st.success("PE order sent")
+            _manual_entry(underlying_ltp, "PE")
+
+    st.divider()
+
+    # ------------------------------------------------
+    # Profiler
+    # ------------------------------------------------
+    st.subheader("🔬 Profiler")
+
+    col_n, col_threads, col_btn = st.columns(3)
+    with col_n:
+        ticks = st.number_input("Ticks", min_value=1, max_value=100, value=5)
+    with col_threads:
+        all_threads = st.checkbox("All threads", value=False)
+    with col_btn:
+        if st.button("Profile next ticks", disabled=tick_profiler.armed):
+            tick_profiler.arm(ticks, all_threads=all_threads)
+
+    if tick_profiler.armed:
+        st.info("Profiling armed…")
+    elif tick_profiler.last_path:
+        st.caption(f"Last profile: {tick_profiler.last_path}")
+
+
+def _manual_entry(underlying_ltp, option_type):
+    signal = SignalEngine.manual_signal(underlying_ltp, option_type)
+    st.session_state.last_signal = signal
+
+    placed, message = OrderManager.place_manual_entry(signal)
+    if placed:
+        st.success(f"{option_type} order sent: {message}")
+    else:
+        st.error(f"{option_type} order not placed: {message}")
@@ -6,11 +6,13 @@ Displays:
 - Prediction output
 - Underlying price
 - Bot status
+- Open positions & PnL
 """
 
 import streamlit as st
 from backend.prediction_engine import PredictionEngine
 from backend.data_fetcher import DATA_CACHE
+from backend.position_book import position_book
 
 
 def render_dashboard():
@@ -55,3 +57,19 @@ def render_dashboard():
     if st.session_state.last_signal:
         st.subheader("📌 Last Trade Signal")
         st.json(st.session_state.last_signal)
+
+    # ------------------------------------------------
+    # Positions
+    # ------------------------------------------------
+    st.subheader("💼 Positions")
+    st.json(position_book.summary())
+
+    positions = position_book.open_positions()
+    if positions:
+        st.dataframe([
+            {k: p.get(k) for k in (
+                "symbol", "source", "status", "qty",
+                "entry_price", "sl", "target", "entry_time"
+            )}
+            for p in positions
+        ])
@@ -3,24 +3,70 @@ Backend package for Options Scalper Bot.
 
 Modules included:
 - config: Credentials & constants
+- logger: Non-blocking structured logging (loguru)
+- schema: Compact dtypes for OHLC / option chain frames
 - data_fetcher: Fetches option chain, OHLC, LTP
+- quote_poller: Fast batched LTP polling for held & ATM strikes
+- history_loader: Chunked parallel candle download with per-day disk cache
+- rate_limiter: Shared Dhan API rate budgets
+- instrument_master: Memory-mapped scrip master with O(1) contract lookups
+- bar_aggregator: Live 15s / 30s / 1m bars from underlying ticks
 - ohlc_processor: Candle resampling utilities
 - option_chain_parser: ATM/Strike selection logic
+- chain_history: Ring buffer of per-strike OI/LTP snapshots
+- chain_diff: Per-strike change set between consecutive chain snapshots
+- greeks_engine: Vectorized IV & Greeks for the option chain
+- oi_analytics: PCR, max pain, OI walls & buildup per snapshot
+- indicator_registry: Indicator dependency graph with per-column caching
 - analysis_engine: Technical indicator computations
 - prediction_engine: Prediction model
+- ml_model: Trained direction model (features, training, inference)
+- optimizer: Parallel walk-forward parameter sweep
+- pipeline: Dependency-graph stage executor (concurrent, early stop, timings)
 - signal_engine: Entry/Exit logic
 - order_manager: Dhan order execution layer
+- order_dispatcher: Non-blocking order queue with idempotent retries
+- execution_quality: Per-order slippage / fill latency records & analytics
+- position_book: Open positions keyed by security_id, limits & PnL
+- exit_engine: Tick-driven SL / Target / trailing / time exits
 - ws_manager: WebSocket listener for order updates
+- profiler: On-demand sampling profiler for bot ticks
+- metrics: Counters / gauges / histograms served in Prometheus format
+- push_api: Versioned state hub served over HTTP + server-sent events
+- checkpoint: Warm-restart snapshots of caches, chain history & positions
 """
 
 __all__ = [
     "config",
+    "logger",
+    "schema",
     "data_fetcher",
+    "quote_poller",
+    "history_loader",
+    "rate_limiter",
+    "instrument_master",
+    "bar_aggregator",
     "ohlc_processor",
     "option_chain_parser",
+    "chain_history",
+    "chain_diff",
+    "greeks_engine",
+    "oi_analytics",
+    "indicator_registry",
     "analysis_engine",
     "prediction_engine",
+    "ml_model",
+    "optimizer",
+    "pipeline",
     "signal_engine",
     "order_manager",
+    "order_dispatcher",
+    "execution_quality",
+    "position_book",
+    "exit_engine",
     "ws_manager",
+    "profiler",
+    "metrics",
+    "push_api",
+    "checkpoint",
 ]
@@ -4,6 +4,11 @@ Analysis Engine
 
 Responsibilities:
 - Compute technical indicators on OHLC data
+- Register them in the indicator registry (inputs, params, outputs),
+  so callers compute only the columns they ask for, cached per
+  timeframe / data version
+- Single-pass multi-timeframe analysis (1m / 3m / 5m / 15m / 30m)
+  shared by every reader until the underlying data changes
 - Provide trend & momentum context
 - Serve features for prediction_engine & signal_engine
 """
@@ -11,7 +16,130 @@ Responsibilities:
 import pandas as pd
 import numpy as np
 
+from backend.data_fetcher import DATA_CACHE
 from backend.ohlc_processor import OHLCProcessor
+from backend.bar_aggregator import bar_aggregator, LIVE_COLUMN
+from backend.indicator_registry import indicators
+from backend.metrics import COMPUTE_DURATION
+from backend.schema import TREND_CATEGORIES
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+ANALYSIS_TIMEFRAMES = ("1m", "3m", "5m", "15m", "30m")
+
+# Last multi-timeframe bundle as one (key, bundle) tuple, keyed by the
+# 1m data it was built from; replaced in a single assignment so readers
+# on other threads never pair a key with another key's bundle
+ANALYSIS_CACHE = {
+    "entry": (None, None),
+}
+
+
+# ============================================================
+# Indicator definitions (fn(df, **params) -> {column: Series})
+# ============================================================
+@indicators.register(
+    "ema",
+    outputs=lambda p: [f"ema_{n}" for n in p["periods"]],
+    inputs=("close",),
+    params={"periods": (9, 20, 50)}
+)
+def _ema(df, periods):
+    return {f"ema_{p}": df["close"].ewm(span=p, adjust=False).mean() for p in periods}
+
+
+@indicators.register("rsi", outputs=("rsi",), inputs=("close",), params={"period": 14})
+def _rsi(df, period):
+    """RSI using Wilder's smoothing (matches Zerodha / TradingView)"""
+    delta = df["close"].diff()
+
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+
+    avg_gain = gain.ewm(
+        alpha=1/period,
+        min_periods=period,
+        adjust=False
+    ).mean()
+
+    avg_loss = loss.ewm(
+        alpha=1/period,
+        min_periods=period,
+        adjust=False
+    ).mean()
+
+    rs = avg_gain / avg_loss
+    return {"rsi": 100 - (100 / (1 + rs))}
+
+
+def _known_volume(df):
+    """float64 volume, NaN on live (tick-built) bars whose volume is unknown."""
+    volume = df["volume"].astype("float64")
+    live = df.get(LIVE_COLUMN)
+    return volume if live is None else volume.mask(live.astype(bool))
+
+
+@indicators.register("typical_price", outputs=("tp",), inputs=("high", "low", "close"), internal=True)
+def _typical_price(df):
+    # float64: feeds the VWAP cumulative sums
+    hlc = df[["high", "low", "close"]].astype("float64")
+    return {"tp": hlc.sum(axis=1) / 3}
+
+
+@indicators.register("session", outputs=("session_date",), inputs=("timestamp",), internal=True)
+def _session(df):
+    return {"session_date": df["timestamp"].dt.date}
+
+
+@indicators.register("vwap", outputs=("vwap",), inputs=("tp", "volume", "session_date"))
+def _vwap(df):
+    """VWAP (per day)."""
+    # float32 prices x volume lose precision in session-long sums: tp is
+    # float64 already, accumulate in float64 and store the result compactly.
+    # Live bars add no volume, so VWAP holds its last REST value over them.
+    volume = _known_volume(df).fillna(0.0)
+    tpv = df["tp"] * volume
+    cum_tpv = tpv.groupby(df["session_date"]).cumsum()
+    cum_vol = volume.groupby(df["session_date"]).cumsum()
+    return {"vwap": (cum_tpv / cum_vol).astype("float32")}
+
+
+@indicators.register(
+    "volume_spike",
+    outputs=("volume_ratio", "volume_spike"),
+    inputs=("volume",),
+    params={"lookback": 20, "ratio": 1.8}
+)
+def _volume_spike(df, lookback, ratio):
+    volume = _known_volume(df)
+    avg_vol = volume.rolling(lookback).mean()
+    volume_ratio = volume / avg_vol
+    return {"volume_ratio": volume_ratio, "volume_spike": volume_ratio >= ratio}
+
+
+@indicators.register("trend_bias", outputs=("trend_bias",), inputs=("ema_9", "ema_20", "ema_50"))
+def _trend_bias(df):
+    """Determine bullish / bearish / neutral trend."""
+    conditions = [
+        (df["ema_9"] > df["ema_20"]) & (df["ema_20"] > df["ema_50"]),
+        (df["ema_9"] < df["ema_20"]) & (df["ema_20"] < df["ema_50"]),
+    ]
+
+    choices = ["BULLISH", "BEARISH"]
+
+    trend_bias = pd.Categorical(
+        np.select(conditions, choices, default="NEUTRAL"),
+        categories=TREND_CATEGORIES
+    )
+    return {"trend_bias": pd.Series(trend_bias, index=df.index)}
+
+
+def _assign(df, columns):
+    for column, values in columns.items():
+        df[column] = values
+    return df
 
 
 class AnalysisEngine:
@@ -24,9 +152,7 @@ class AnalysisEngine:
         """
         Add EMA columns to dataframe.
         """
-        for p in periods:
-            df[f"ema_{p}"] = df["close"].ewm(span=p, adjust=False).mean()
-        return df
+        return _assign(df, _ema(df, periods))
 
     # ============================================================
     # RSI
@@ -36,27 +162,7 @@ class AnalysisEngine:
         """
         RSI using Wilder's smoothing (matches Zerodha / TradingView)
         """
-        delta = df["close"].diff()
-
-        gain = delta.clip(lower=0)
-        loss = -delta.clip(upper=0)
-
-        avg_gain = gain.ewm(
-            alpha=1/period,
-            min_periods=period,
-            adjust=False
-        ).mean()
-
-        avg_loss = loss.ewm(
-            alpha=1/period,
-            min_periods=period,
-            adjust=False
-        ).mean()
-
-        rs = avg_gain / avg_loss
-        df["rsi"] = 100 - (100 / (1 + rs))
-
-        return df
+        return _assign(df, _rsi(df, period))
 
     # ============================================================
     # VWAP
@@ -66,31 +172,19 @@ class AnalysisEngine:
         """
         Add VWAP (per day).
         """
-        df = df.copy()
-        df["date"] = df["timestamp"].dt.date
-
-        df["tp"] = (df["high"] + df["low"] + df["close"]) / 3
-        df["tpv"] = df["tp"] * df["volume"]
-
-        df["cum_tpv"] = df.groupby("date")["tpv"].cumsum()
-        df["cum_vol"] = df.groupby("date")["volume"].cumsum()
-
-        df["vwap"] = df["cum_tpv"] / df["cum_vol"]
-
-        df.drop(columns=["tp", "tpv", "cum_tpv", "cum_vol", "date"], inplace=True)
-
-        return df
+        inputs = pd.DataFrame({
+            "volume": df["volume"],
+            **_typical_price(df),
+            **_session(df),
+        })
+        return _assign(df, _vwap(inputs))
 
     # ============================================================
     # Volume Spike
     # ============================================================
     @staticmethod
     def add_volume_spike(df, lookback=20):
-        avg_vol = df["volume"].rolling(lookback).mean()
-        df["volume_ratio"] = df["volume"] / avg_vol
-
-        df["volume_spike"] = df["volume_ratio"] >= 1.8
-        return df
+        return _assign(df, _volume_spike(df, lookback, 1.8))
 
     # ============================================================
     # Trend Bias
@@ -100,51 +194,74 @@ class AnalysisEngine:
         """
         Determine bullish / bearish / neutral trend.
         """
-        conditions = [
-            (df["ema_9"] > df["ema_20"]) & (df["ema_20"] > df["ema_50"]),
-            (df["ema_9"] < df["ema_20"]) & (df["ema_20"] < df["ema_50"]),
-        ]
-
-        choices = ["BULLISH", "BEARISH"]
-
-        df["trend_bias"] = np.select(conditions, choices, default="NEUTRAL")
-        return df
+        return _assign(df, _trend_bias(df))
 
     # ============================================================
     # Composite indicator pipeline
     # ============================================================
     @staticmethod
-    def enrich(df):
+    def enrich(df, columns=None, timeframe=None):
         """
-        Apply all indicators in correct order.
+        Drop the forming candle and add indicator columns (all of them
+        by default, or only `columns` and what they depend on).
+        timeframe: cache namespace, e.g. "5m".
         """
-        df = df.copy()
-
-        df = AnalysisEngine.add_ema(df)
-        df = df.iloc[:-1].copy()
-        df = AnalysisEngine.add_rsi(df)
-        df = AnalysisEngine.add_vwap(df)
-        df = AnalysisEngine.add_volume_spike(df)
-        df = AnalysisEngine.add_trend_bias(df)
+        # EMAs are recursive, so computing them after the trim gives the
+        # same values as computing first and trimming after.
+        df = df.iloc[:-1]
+        return indicators.compute(df, columns, timeframe=timeframe)
 
-        return df
+    # ============================================================
+    # Multi-timeframe analysis
+    # ============================================================
+    @staticmethod
+    def analyze_timeframes(timeframes=ANALYSIS_TIMEFRAMES):
+        """
+        {label: enriched candles} for every timeframe, from one load +
+        market-hours filter of the 1m data. Built once per data change
+        (REST refresh or live tick); later calls return the same bundle.
+        None when no OHLC data is cached.
+        """
+        key = (
+            id(DATA_CACHE.get("ohlc_1m")), DATA_CACHE.get("ohlc_timestamp"),
+            bar_aggregator.version, tuple(timeframes)
+        )
+        cached_key, cached_bundle = ANALYSIS_CACHE["entry"]
+        if cached_key == key:
+            return cached_bundle
+
+        with COMPUTE_DURATION.time(stage="analysis"):
+            candles = OHLCProcessor.get_timeframes(timeframes)
+            if candles is None:
+                return None
+            bundle = {
+                label: AnalysisEngine.enrich(df, timeframe=label)
+                for label, df in candles.items()
+            }
+
+        ANALYSIS_CACHE["entry"] = (key, bundle)
+        return bundle
 
     # ============================================================
     # Public helpers by timeframe
     # ============================================================
     @staticmethod
     def analyze_5m():
-        df = OHLCProcessor.get_5m()
-        if df is None:
-            return None
-        return AnalysisEngine.enrich(df)
+        bundle = AnalysisEngine.analyze_timeframes()
+        return bundle["5m"] if bundle else None
 
     @staticmethod
     def analyze_15m():
-        df = OHLCProcessor.get_15m()
+        bundle = AnalysisEngine.analyze_timeframes()
+        return bundle["15m"] if bundle else None
+
+    @staticmethod
+    def analyze_bars(timeframe):
+        """Indicators on today's live sub-minute bars ("15s" / "30s")."""
+        df = OHLCProcessor.get_bars(timeframe)
         if df is None:
             return None
-        return AnalysisEngine.enrich(df)
+        return AnalysisEngine.enrich(df, timeframe=timeframe)
 
 
 # ------------------------------------------------------------------
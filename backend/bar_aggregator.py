@@ -0,0 +1,192 @@
+"""
+Bar Aggregator
+--------------
+
+Responsibilities:
+- Turn live underlying ticks (quote poller, chain polls) into 15s / 30s /
+  1m OHLC bars as they happen, without waiting for Dhan to publish the
+  minute candle
+- Keep today's bars in preallocated numpy arrays (one block per
+  timeframe, sized for one session); a tick costs O(timeframes)
+- Reconcile with REST 1m candles once they arrive: REST is
+  authoritative for every minute it covers, live bars fill the tail
+- Serve bars as the same DataFrame shape as DATA_CACHE["ohlc_1m"]
+  (timestamp, open, high, low, close, volume) plus a `live` flag, for
+  OHLCProcessor / AnalysisEngine; index ticks carry no volume, so
+  volume-based indicators skip live rows
+- Bar times are IST (naive), like the REST candles, whatever the host
+  timezone
+"""
+
+import threading
+from datetime import time as dt_time
+
+import numpy as np
+import pandas as pd
+
+from backend.config import market_now
+from backend.schema import DataSchema
+from backend.logger import get_logger
+
+log = get_logger("BarAggregator")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+BAR_TIMEFRAMES = {"15s": 15, "30s": 30, "1m": 60}
+SESSION_START = dt_time(9, 15)
+SESSION_END = dt_time(15, 30)
+RECONCILE_TOLERANCE = 0.01       # price gap counted as a live / REST mismatch
+LIVE_COLUMN = "live"             # True on rows built from ticks (no real volume)
+
+_SESSION_START_SEC = SESSION_START.hour * 3600 + SESSION_START.minute * 60
+_SESSION_END_SEC = SESSION_END.hour * 3600 + SESSION_END.minute * 60
+
+
+class BarAggregator:
+
+    FIELDS = ("open", "high", "low", "close", "volume")
+
+    def __init__(self, timeframes=BAR_TIMEFRAMES):
+        self.timeframes = dict(timeframes)
+        self.lock = threading.Lock()
+        self.session_date = None
+        self.last_tick = None
+        self.version = 0           # bumps on every tick / reconcile (cache key for readers)
+        self.blocks = {}
+        for label, seconds in self.timeframes.items():
+            capacity = (_SESSION_END_SEC - _SESSION_START_SEC) // seconds + 1
+            self.blocks[label] = {
+                "seconds": seconds,
+                "start": np.zeros(capacity, dtype=np.int32),    # bar start, seconds since midnight
+                **{field: np.zeros(capacity, dtype=np.float64) for field in self.FIELDS},
+                "n": 0,
+            }
+
+    def reset(self, session_date=None):
+        with self.lock:
+            for block in self.blocks.values():
+                block["n"] = 0
+            self.session_date = session_date
+            self.last_tick = None
+            self.version += 1
+
+    # ------------------------------------------------------------
+    # Ticks
+    # ------------------------------------------------------------
+    def on_tick(self, ltp, ts=None, volume=0.0):
+        """
+        Fold one price into the forming bar of every timeframe.
+        ts: naive IST time (defaults to the exchange clock).
+        Ticks outside market hours or older than the last tick are ignored.
+        Returns True when the tick was used.
+        """
+        if ltp is None:
+            return False
+        ts = ts or market_now()
+        sod = ts.hour * 3600 + ts.minute * 60 + ts.second
+        if not _SESSION_START_SEC <= sod < _SESSION_END_SEC:
+            return False
+
+        if ts.date() != self.session_date:
+            self.reset(ts.date())
+
+        ltp = float(ltp)
+        with self.lock:
+            if self.last_tick is not None and ts < self.last_tick:
+                return False
+            self.last_tick = ts
+            for block in self.blocks.values():
+                start = sod - (sod - _SESSION_START_SEC) % block["seconds"]
+                i = block["n"] - 1
+                if i >= 0 and block["start"][i] == start:
+                    block["high"][i] = max(block["high"][i], ltp)
+                    block["low"][i] = min(block["low"][i], ltp)
+                    block["close"][i] = ltp
+                    block["volume"][i] += volume
+                    continue
+                i += 1
+                block["start"][i] = start
+                block["open"][i] = block["high"][i] = block["low"][i] = block["close"][i] = ltp
+                block["volume"][i] = volume
+                block["n"] = i + 1
+            self.version += 1
+        return True
+
+    # ------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------
+    def frame(self, timeframe, since=None):
+        """
+        Today's bars of one timeframe as an OHLC DataFrame (the last row
+        is the forming bar). since: only bars starting after this time.
+        """
+        with self.lock:
+            block = self.blocks[timeframe]
+            n = block["n"]
+            start = block["start"][:n].copy()
+            values = {field: block[field][:n].copy() for field in self.FIELDS}
+            day = self.session_date
+
+        timestamps = pd.Timestamp(day or market_now().date()) + pd.to_timedelta(start, unit="s")
+        df = pd.DataFrame({"timestamp": timestamps, **values, LIVE_COLUMN: True})
+        if since is not None:
+            df = df[df["timestamp"] > since].reset_index(drop=True)
+        return DataSchema.apply_ohlc(df)
+
+    # ------------------------------------------------------------
+    # REST reconciliation
+    # ------------------------------------------------------------
+    def reconcile(self, rest_1m):
+        """
+        Overwrite live 1m bars with the REST candles covering the same
+        minutes (REST is authoritative). Returns how many bars differed.
+        """
+        block = self.blocks.get("1m")
+        if block is None or rest_1m is None or rest_1m.empty or self.session_date is None:
+            return 0
+
+        ts = pd.to_datetime(rest_1m["timestamp"])
+        today = (ts.dt.date == self.session_date).to_numpy()
+        if not today.any():
+            return 0
+        rest_start = (ts[today].dt.hour * 3600 + ts[today].dt.minute * 60).to_numpy(dtype=np.int32)
+
+        with self.lock:
+            n = block["n"]
+            idx = np.searchsorted(rest_start, block["start"][:n])
+            idx = np.minimum(idx, len(rest_start) - 1)
+            match = rest_start[idx] == block["start"][:n]
+            if not match.any():
+                return 0
+            rows = np.flatnonzero(match)
+            mismatch = np.zeros(len(rows), dtype=bool)
+            for field in ("open", "high", "low", "close"):
+                rest = rest_1m[field].to_numpy(dtype=np.float64)[today][idx[rows]]
+                mismatch |= np.abs(block[field][rows] - rest) > RECONCILE_TOLERANCE
+                block[field][rows] = rest
+            differed = int(mismatch.sum())
+            self.version += 1
+
+        if differed:
+            log.debug("Reconciled {} live 1m bar(s) with REST candles", differed)
+        return differed
+
+    def merge_1m(self, rest_1m):
+        """REST 1m candles followed by the live 1m bars they don't cover yet."""
+        if self.session_date is None or "1m" not in self.blocks:
+            return rest_1m
+        since = None
+        if rest_1m is not None and not rest_1m.empty:
+            since = pd.to_datetime(rest_1m["timestamp"]).max()
+        live = self.frame("1m", since=since)
+        if live.empty:
+            return rest_1m
+        if rest_1m is None or rest_1m.empty:
+            return live
+        return pd.concat([rest_1m.assign(**{LIVE_COLUMN: False}), live], ignore_index=True)
+
+
+# Create singleton BarAggregator instance
+bar_aggregator = BarAggregator()
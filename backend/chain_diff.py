@@ -0,0 +1,95 @@
+"""
+Chain Diff
+----------
+
+Responsibilities:
+- Compare each option chain snapshot with the previous one, by strike
+- Emit a compact change set: changed-row mask, changed / added / removed
+  strikes, per-field change counts
+- Give downstream stages (greeks_engine, oi_analytics) a cheap
+  "has anything moved" signal and the rows they need to recompute
+- Clean reset on expiry or session-date rollover (with chain_history)
+"""
+
+import numpy as np
+
+
+class ChainDiff:
+
+    FIELDS = ("ce_ltp", "pe_ltp", "ce_oi", "pe_oi", "ce_bid", "ce_ask", "pe_bid", "pe_ask")
+
+    def __init__(self):
+        self.reset()
+
+    # ------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------
+    def reset(self):
+        self.strikes = None
+        self.values = None             # (fields, strikes) of the previous snapshot
+        self.underlying_ltp = None
+
+    # ------------------------------------------------------------
+    # Diff
+    # ------------------------------------------------------------
+    def _align_previous(self, strikes):
+        """Previous values re-indexed to `strikes` (NaN for new strikes)."""
+        if np.array_equal(strikes, self.strikes):
+            return self.values, np.ones(len(strikes), dtype=bool)
+
+        idx = np.searchsorted(self.strikes, strikes).clip(max=len(self.strikes) - 1)
+        found = self.strikes[idx] == strikes
+        prev = np.full((len(self.FIELDS), len(strikes)), np.nan)
+        prev[:, found] = self.values[:, idx[found]]
+        return prev, found
+
+    def update(self, strikes, values, underlying_ltp=None):
+        """
+        Diff a snapshot against the previous one and remember it.
+
+        strikes: sorted 1-D array
+        values: {field: 1-D array aligned to strikes} for every FIELDS entry
+        Returns:
+        {
+            first: True for the first snapshot after a reset
+            mask: bool per row, True where any field changed (or strike is new)
+            strikes: changed strikes
+            added / removed: strikes that appeared / disappeared
+            count: number of changed rows
+            by_field: {field: changed rows}
+            underlying_moved: underlying LTP differs from the previous snapshot
+            moved: anything at all changed
+        }
+        """
+        strikes = np.asarray(strikes, dtype=float)
+        current = np.vstack([np.asarray(values[f], dtype=float) for f in self.FIELDS])
+
+        first = self.strikes is None or len(self.strikes) == 0
+        if first:
+            changed = np.ones(current.shape, dtype=bool)
+            found = np.zeros(len(strikes), dtype=bool)
+            removed = np.empty(0)
+        else:
+            prev, found = self._align_previous(strikes)
+            changed = (current != prev) & ~(np.isnan(current) & np.isnan(prev))
+            removed = np.setdiff1d(self.strikes, strikes, assume_unique=True)
+
+        mask = changed.any(axis=0) | ~found
+        underlying_moved = underlying_ltp != self.underlying_ltp
+
+        self.strikes = strikes.copy()
+        self.values = current
+        self.underlying_ltp = underlying_ltp
+
+        count = int(mask.sum())
+        return {
+            "first": first,
+            "mask": mask,
+            "strikes": strikes[mask],
+            "added": strikes[~found] if not first else strikes,
+            "removed": removed,
+            "count": count,
+            "by_field": {f: int(n) for f, n in zip(self.FIELDS, changed.sum(axis=1))},
+            "underlying_moved": underlying_moved,
+            "moved": bool(count or underlying_moved or len(removed)),
+        }
@@ -0,0 +1,155 @@
+"""
+Chain History
+-------------
+
+Responsibilities:
+- Fixed-capacity ring buffer of per-strike OI / LTP arrays
+- Strike index so every snapshot lands in the same column
+- Changes vs previous snapshot, day start, or any time horizon
+  without DataFrame copies
+- Clean reset on expiry or session-date rollover
+"""
+
+import numpy as np
+
+from backend.config import CHAIN_HISTORY_CAPACITY
+
+
+class ChainHistory:
+
+    FIELDS = ("ce_oi", "pe_oi", "ce_ltp", "pe_ltp")
+
+    def __init__(self, capacity=CHAIN_HISTORY_CAPACITY):
+        self.capacity = capacity
+        self.reset()
+
+    # ------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------
+    def reset(self, expiry=None, session_date=None):
+        self.expiry = expiry
+        self.session_date = session_date
+        self.strike_index = {}
+        self.strikes = np.empty(0)
+        self.data = np.full((len(self.FIELDS), self.capacity, 0), np.nan)
+        self.times = np.zeros(self.capacity)
+        self.count = 0
+        self.head = 0                  # next slot to write
+        self.day_start = None          # (fields, strikes) baseline, outlives ring wrap
+        self._last_strikes = None
+        self._last_cols = None
+
+    def state(self):
+        """Copy of all buffers for checkpointing."""
+        return {
+            k: (v.copy() if isinstance(v, (np.ndarray, dict)) else v)
+            for k, v in vars(self).items()
+        }
+
+    def restore(self, state):
+        """Load a checkpointed state in place (keeps object identity)."""
+        if state.get("capacity") != self.capacity:
+            return False
+        vars(self).update(state)
+        return True
+
+    def needs_reset(self, expiry, session_date):
+        return self.expiry != expiry or self.session_date != session_date
+
+    def __len__(self):
+        return self.count
+
+    # ------------------------------------------------------------
+    # Strike alignment
+    # ------------------------------------------------------------
+    def _columns(self, strikes):
+        """Map strikes -> column ids, adding columns for unseen strikes."""
+        if self._last_strikes is not None and np.array_equal(strikes, self._last_strikes):
+            return self._last_cols
+
+        new = [s for s in strikes if s not in self.strike_index]
+        if new:
+            start = len(self.strikes)
+            for i, s in enumerate(new):
+                self.strike_index[s] = start + i
+            self.strikes = np.concatenate([self.strikes, np.asarray(new, dtype=float)])
+            pad = ((0, 0), (0, 0), (0, len(new)))
+            self.data = np.pad(self.data, pad, constant_values=np.nan)
+            if self.day_start is not None:
+                self.day_start = np.pad(self.day_start, ((0, 0), (0, len(new))), constant_values=np.nan)
+
+        cols = np.fromiter((self.strike_index[s] for s in strikes), dtype=np.intp, count=len(strikes))
+        self._last_strikes = strikes.copy()
+        self._last_cols = cols
+        return cols
+
+    # ------------------------------------------------------------
+    # Write
+    # ------------------------------------------------------------
+    def push(self, ts, strikes, values):
+        """
+        Record a snapshot.
+
+        ts: epoch seconds
+        strikes: 1-D array of strikes
+        values: {field: 1-D array aligned to strikes}
+        Re-pushing the latest timestamp overwrites it in place.
+        """
+        cols = self._columns(np.asarray(strikes, dtype=float))
+
+        if self.count and self.times[(self.head - 1) % self.capacity] == ts:
+            slot = (self.head - 1) % self.capacity
+        else:
+            slot = self.head
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+        self.data[:, slot, :] = np.nan
+        for f, field in enumerate(self.FIELDS):
+            self.data[f, slot, cols] = values[field]
+        self.times[slot] = ts
+
+        if self.day_start is None:
+            self.day_start = self.data[:, slot, :].copy()
+        return cols
+
+    # ------------------------------------------------------------
+    # Read
+    # ------------------------------------------------------------
+    def _slot_back(self, steps):
+        """Ring slot `steps` snapshots before the latest, or None."""
+        if steps >= self.count:
+            return None
+        return (self.head - 1 - steps) % self.capacity
+
+    def _slot_at_horizon(self, seconds):
+        """Newest slot at least `seconds` older than the latest snapshot."""
+        if not self.count:
+            return None
+        order = (self.head - self.count + np.arange(self.count)) % self.capacity
+        target = self.times[order[-1]] - seconds
+        pos = np.searchsorted(self.times[order], target, side="right") - 1
+        if pos < 0:
+            return None
+        return order[pos]
+
+    def _diff(self, field, cols, past):
+        f = self.FIELDS.index(field)
+        latest = self.data[f, self._slot_back(0), cols]
+        if past is None:
+            return np.zeros(len(cols))
+        return np.nan_to_num(latest - past[f, cols], nan=0.0)
+
+    def change_since_prev(self, field, cols):
+        slot = self._slot_back(1)
+        past = None if slot is None else self.data[:, slot, :]
+        return self._diff(field, cols, past)
+
+    def change_since_day_start(self, field, cols):
+        return self._diff(field, cols, self.day_start)
+
+    def change_over(self, field, cols, seconds):
+        """Change over the last `seconds`; zeros until enough history exists."""
+        slot = self._slot_at_horizon(seconds)
+        past = None if slot is None else self.data[:, slot, :]
+        return self._diff(field, cols, past)
@@ -0,0 +1,160 @@
+"""
+Checkpoint
+----------
+
+Responsibilities:
+- Periodically snapshot intraday state: DATA_CACHE (1m OHLC, last
+  chains, price table), per-expiry option chain history (day-start
+  baselines) and the position book
+- Capture on the tick thread (cheap copies), pickle + write on a
+  background thread, atomically (tmp file + os.replace)
+- Restore on startup when the checkpoint belongs to today's session,
+  reconciling positions whose orders were in flight at the crash
+"""
+
+import os
+import pickle
+import threading
+import time
+
+from backend.config import market_now
+from backend.data_fetcher import DATA_CACHE, CACHE_LOCK
+from backend.option_chain_parser import OptionChainParser, CHAIN_STATES
+from backend.position_book import position_book
+from backend.order_manager import OrderManager
+from backend.logger import get_logger
+
+log = get_logger("Checkpoint")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+CHECKPOINT_PATH = "storage/checkpoint/state.pkl"
+CHECKPOINT_INTERVAL_SEC = 30
+CHECKPOINT_VERSION = 2
+
+CACHE_KEYS = (
+    "ohlc_1m", "ohlc_timestamp",
+    "option_chain", "option_chain_timestamp", "option_chain_expiry",
+    "option_chains", "expiries",
+    "option_ltp", "last_updated",
+)
+
+
+class Checkpointer:
+
+    def __init__(self, path=CHECKPOINT_PATH, interval_seconds=CHECKPOINT_INTERVAL_SEC):
+        self.path = path
+        self.interval = interval_seconds
+        self.last_saved = 0.0
+        self._writing = threading.Lock()
+
+    # ------------------------------------------------------------
+    # Save
+    # ------------------------------------------------------------
+    @staticmethod
+    def capture():
+        """Snapshot of everything a warm restart needs (copies, no I/O)."""
+        with CACHE_LOCK:
+            cache = {k: DATA_CACHE[k] for k in CACHE_KEYS}
+            cache["option_ltp"] = dict(cache["option_ltp"])
+            cache["option_chains"] = dict(cache["option_chains"])
+        return {
+            "version": CHECKPOINT_VERSION,
+            "session_date": market_now().date(),
+            "saved_at": market_now(),
+            "data_cache": cache,
+            "chain_history": {e: st["history"].state() for e, st in list(CHAIN_STATES.items())},
+            "positions": position_book.state(),
+        }
+
+    def _write(self, snapshot):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            t0 = time.perf_counter()
+            with open(tmp, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+            log.debug("Saved in {:.1f} ms", (time.perf_counter() - t0) * 1000)
+        except Exception as e:
+            log.error("Save ERROR: {}", e)
+        finally:
+            self._writing.release()
+
+    def save(self, background=False):
+        """Capture now and write (in a background thread if asked)."""
+        if not self._writing.acquire(blocking=not background):
+            return False            # previous write still running
+        self.last_saved = time.monotonic()
+        snapshot = self.capture()
+        if background:
+            threading.Thread(target=self._write, args=(snapshot,), name="checkpoint", daemon=True).start()
+        else:
+            self._write(snapshot)
+        return True
+
+    def maybe_save(self):
+        """Called from the bot loop; saves at most once per interval."""
+        if time.monotonic() - self.last_saved >= self.interval:
+            self.save(background=True)
+
+    # ------------------------------------------------------------
+    # Restore
+    # ------------------------------------------------------------
+    def restore(self):
+        """Load today's checkpoint, if any. Returns True when state was restored."""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            log.error("Unreadable checkpoint {}: {}", self.path, e)
+            return False
+
+        if snapshot.get("version") != CHECKPOINT_VERSION:
+            log.warning("Checkpoint version {} ignored", snapshot.get("version"))
+            return False
+        if snapshot["session_date"] != market_now().date():
+            log.info("Checkpoint from {} ignored (new session)", snapshot["session_date"])
+            return False
+
+        with CACHE_LOCK:
+            DATA_CACHE.update(snapshot["data_cache"])
+        for expiry, history in snapshot["chain_history"].items():
+            state = OptionChainParser.state(expiry)
+            if state["history"].restore(history):
+                state["cache"]["key"] = None
+        position_book.restore(snapshot["positions"])
+        Checkpointer._reconcile_positions()
+
+        log.info(
+            "Restored checkpoint from {} ({} chain snapshots over {} expiries, {} open position(s))",
+            snapshot["saved_at"].strftime("%H:%M:%S"),
+            sum(len(st["history"]) for st in CHAIN_STATES.values()), len(CHAIN_STATES), len(position_book)
+        )
+        return True
+
+    @staticmethod
+    def _reconcile_positions():
+        """
+        Orders in flight when the process died (the dispatcher's completed
+        map is gone, so every tag is looked up at the broker). Both are
+        handed to the order manager, which keeps asking until the trade
+        settles:
+        - PENDING_ENTRY: opened once the entry order is found, dropped if
+          no order exists
+        - exit_pending: closed once the exit order is TRADED, re-armed if
+          no order exists so the exit engine resubmits under the same tag
+        """
+        for trade in position_book.open_positions():
+            if trade["status"] == "PENDING_ENTRY":
+                OrderManager.resolve_entry(trade)
+            elif trade.get("exit_pending"):
+                OrderManager.resolve_exit(trade, reason="RESTORED")
+
+
+# Create singleton Checkpointer instance
+checkpointer = Checkpointer()
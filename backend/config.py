@@ -1,5 +1,7 @@
 from dhanhq import DhanContext, dhanhq 
 import os
+from datetime import datetime
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,11 +13,22 @@ DEFAULT_FETCH_INTERVAL = 30
 CLIENT_ID = os.getenv("CLIENT_ID")
 DHAN_API_TOKEN = os.getenv("DHAN_API_TOKEN")
 UNDER_SECURITY_ID = 13
+UNDER_SYMBOL = "NIFTY" #Underlying name in the scrip master
 UNDER_EXCHANGE_SEGMENT = "IDX_I"
 UNDER_INSTRUMENT_TYPE="INDEX"
 UNDER_INTERVAL=1
 OHLC_DAYS = 7 #Need to change after testing 15mins, 5mins trend data
 OI_STRIKE_RANGE = 3 #To get ATM+_ strike prices to calculate OI,COI,Volume
+RISK_FREE_RATE = 0.065 #Annualised rate used for IV / Greeks
+CHAIN_HISTORY_CAPACITY = 1024 #Option chain snapshots kept in memory
+CHAIN_CHANGE_HORIZONS = {"5m": 300, "15m": 900} #OI/LTP change columns by horizon (seconds)
+MARKET_TIMEZONE = "Asia/Kolkata" #Exchange clock; all market times are IST
+
+
+def market_now():
+    """Current exchange (IST) time as a naive datetime, like the OHLC timestamps."""
+    return datetime.now(ZoneInfo(MARKET_TIMEZONE)).replace(tzinfo=None)
+
 
 # Initialize DhanHQ client
 if not CLIENT_ID or not DHAN_API_TOKEN:
@@ -1,28 +1,66 @@
 import threading
 import time
-import pandas as pd
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 
-from backend.config import dhan, UNDER_INTERVAL, DEFAULT_FETCH_INTERVAL, UNDER_SECURITY_ID, UNDER_EXCHANGE_SEGMENT,OHLC_DAYS,UNDER_INSTRUMENT_TYPE
+from backend.config import dhan, DEFAULT_FETCH_INTERVAL, UNDER_SECURITY_ID, UNDER_EXCHANGE_SEGMENT,OHLC_DAYS
+from backend.history_loader import HistoryLoader
+from backend.bar_aggregator import bar_aggregator
+from backend.rate_limiter import option_chain_limiter
+from backend.metrics import dhan_call, CACHE_AGE
+from backend.logger import get_logger, log_throttled
+
+log = get_logger("DataFetcher")
+
+# Expiries fetched every poll; the first one is the primary chain
+# (DATA_CACHE["option_chain"]) that signals trade on.
+# WEEKLY / NEXT_WEEKLY = 1st / 2nd listed expiry, MONTHLY = last expiry
+# in the nearest expiry's month. Duplicates are fetched once.
+TRACKED_EXPIRIES = ("WEEKLY", "NEXT_WEEKLY", "MONTHLY")
 
 
 DATA_CACHE = {
     "option_chain": None,
     "option_chain_timestamp": None,
+    "option_chain_expiry": None,
+
+    # expiry -> {"chain": data, "timestamp": datetime}, label -> expiry
+    "option_chains": {},
+    "expiries": {},
 
     "ohlc_1m": None,
     "ohlc_timestamp": None,
 
+    # security_id -> {"ltp": float, "timestamp": datetime[, "bid", "ask"]}
+    "option_ltp": {},
+
     "last_updated": None
 }
 CACHE_LOCK = threading.RLock()
 
+# Callbacks fired with {security_id: ltp} on every price update
+PRICE_LISTENERS = []
+
+SECURITY_ID_KEYS = ("securityId", "security_id", "securityID")
+
+
+def _cache_age(key):
+    ts = DATA_CACHE[key]
+    return (datetime.now() - ts).total_seconds() if ts else None
+
+
+CACHE_AGE.set_function(lambda: _cache_age("option_chain_timestamp"), item="option_chain")
+CACHE_AGE.set_function(lambda: _cache_age("ohlc_timestamp"), item="ohlc_1m")
+
 
 class DataFetcher :
     def __init__(self, interval_seconds=DEFAULT_FETCH_INTERVAL):
         self.interval = interval_seconds
         self.running = False
         self.thread = None
+        self.expiry_calendar = []          # all listed expiries (refreshed daily)
+        self.calendar_date = None
+        self.chain_pool = ThreadPoolExecutor(max_workers=len(TRACKED_EXPIRIES), thread_name_prefix="chain")
 
     def start(self):
         if self.running:
@@ -32,17 +70,66 @@ class DataFetcher :
         self.thread = threading.Thread(target=self._run_loop, daemon=True)
         self.thread.start()
 
-        print(f"[DataFetcher] Started (interval={self.interval} sec)")
+        log.info("Started (interval={} sec)", self.interval)
 
     # Stop polling
     def stop(self):
         self.running = False
-        print("[DataFetcher] Stopped")
+        log.info("Stopped")
+
+    # Price update subscription (exit engine, monitors)
+    def add_price_listener(self, callback):
+        if callback not in PRICE_LISTENERS:
+            PRICE_LISTENERS.append(callback)
+
+    def remove_price_listener(self, callback):
+        if callback in PRICE_LISTENERS:
+            PRICE_LISTENERS.remove(callback)
+
+    @staticmethod
+    def publish_prices(prices, quotes=None):
+        """
+        Write {security_id: ltp} into the shared price table and notify
+        listeners. Used by chain polls and any faster feed.
+        quotes: optional {security_id: {"bid", "ask"}} stored alongside.
+        """
+        if not prices:
+            return
+        now = datetime.now()
+        quotes = quotes or {}
+        with CACHE_LOCK:
+            table = DATA_CACHE["option_ltp"]
+            for security_id, ltp in prices.items():
+                table[security_id] = {"ltp": ltp, "timestamp": now, **quotes.get(security_id, {})}
+
+        for callback in list(PRICE_LISTENERS):
+            try:
+                callback(prices)
+            except Exception as e:
+                log.exception("Price listener ERROR: {}", e)
+
+    @staticmethod
+    def chain_prices(chain_data):
+        """Extract {security_id: ltp} for every CE / PE leg of a chain."""
+        # Some callers store the whole response, others only response["data"].
+        chain_data = chain_data.get("data", chain_data)
+        prices = {}
+        for leg in ("CE", "PE"):
+            for item in chain_data.get(leg, []) or []:
+                security_id = next(
+                    (item[k] for k in SECURITY_ID_KEYS if item.get(k) is not None),
+                    None
+                )
+                ltp = item.get("ltp")
+                if security_id is None or ltp is None:
+                    continue
+                prices[str(security_id)] = float(ltp)
+        return prices
 
     # Update interval (frontend control)
     def update_interval(self, new_interval):
         self.interval = new_interval
-        print(f"[DataFetcher] Fetch interval changed to {new_interval} sec")
+        log.info("Fetch interval changed to {} sec", new_interval)
 
     # Main polling loop
     def _run_loop(self):
@@ -53,7 +140,7 @@ class DataFetcher :
                 with CACHE_LOCK:
                     DATA_CACHE["last_updated"] = datetime.now()
             except Exception as e:
-                print(f"[DataFetcher] Error: {e}")
+                log.exception("Error: {}", e)
 
             time.sleep(self.interval)
 
@@ -61,81 +148,135 @@ class DataFetcher :
     # Expiry List to get current expiry date via SDK
     #=====================================================
     def expiry_lists(self):
-        expiries = dhan.expiry_list(
+        """
+        All listed expiries (sorted), fetched once per day; the list
+        only changes when a contract expires.
+        """
+        today = date.today()
+        if self.expiry_calendar and self.calendar_date == today:
+            return self.expiry_calendar
+
+        option_chain_limiter.acquire()
+        expiries = dhan_call(
+            "expiry_list",
+            dhan.expiry_list,
             under_security_id=UNDER_SECURITY_ID,                       # Nifty
             under_exchange_segment=UNDER_EXCHANGE_SEGMENT
         )
         if not expiries or not isinstance(expiries, dict):
-            print("[DataFetcher] No expiry data found")
-            return
+            log_throttled(log, "WARNING", "No expiry data found")
+            return self.expiry_calendar
 
         data = expiries.get("data", {}).get("data", [])
+        data = sorted(e for e in data if e >= today.isoformat())
         if not data:
-            print("[DataFetcher] Empty expiry list")
-            return
+            log_throttled(log, "WARNING", "Empty expiry list")
+            return self.expiry_calendar
 
-        nearest_expiry = data[0]
-        return nearest_expiry
+        self.expiry_calendar = data
+        self.calendar_date = today
+        return data
+
+    @staticmethod
+    def select_expiries(calendar, labels=TRACKED_EXPIRIES):
+        """{label: expiry} for the tracked labels, in order, without duplicates."""
+        if not calendar:
+            return {}
+        month = calendar[0][:7]
+        candidates = {
+            "WEEKLY": calendar[0],
+            "NEXT_WEEKLY": calendar[1] if len(calendar) > 1 else None,
+            "MONTHLY": max(e for e in calendar if e[:7] == month),
+        }
+        selected = {}
+        for label in labels:
+            expiry = candidates.get(label)
+            if expiry and expiry not in selected.values():
+                selected[label] = expiry
+        return selected
         
     # =====================================================
     # Option Chain via SDK
     # =====================================================
+    @staticmethod
+    def _fetch_chain(expiry):
+        """One expiry's chain (waits for its option chain rate slot)."""
+        option_chain_limiter.acquire()
+        chain = dhan_call(
+            "option_chain",
+            dhan.option_chain,
+            under_security_id=UNDER_SECURITY_ID,
+            under_exchange_segment=UNDER_EXCHANGE_SEGMENT,
+            expiry=expiry
+        )
+        if not chain or chain.get("status") != "success":
+            log_throttled(log, "WARNING", "Option Chain bad response ({}): {}", expiry, chain, key=f"chain:{expiry}")
+            return None
+        return chain["data"]
+
     def fetch_option_chain(self):
         """
-        Fetch full option chain using Dhan SDK.
-        Auto-detects nearest expiry.
+        Fetch the option chain of every tracked expiry using Dhan SDK,
+        concurrently within the option chain rate budget.
+        The nearest expiry stays the primary chain.
         """
         try:
-            chain = dhan.option_chain(
-                under_security_id=UNDER_SECURITY_ID,               
-                under_exchange_segment=UNDER_EXCHANGE_SEGMENT,      
-                expiry = self.expiry_lists()
-            )
-            if not chain or chain.get("status") != "success":
-                print("[DataFetcher] Option Chain bad response:", chain)
+            tracked = self.select_expiries(self.expiry_lists())
+            if not tracked:
                 return
+            expiries = list(tracked.values())
+            chains = dict(zip(expiries, self.chain_pool.map(self._fetch_chain, expiries)))
+
+            now = datetime.now()
+            primary = expiries[0]
             with CACHE_LOCK:
-                DATA_CACHE["option_chain"] = chain["data"]
-                DATA_CACHE["option_chain_timestamp"] = datetime.now()
+                DATA_CACHE["expiries"] = tracked
+                DATA_CACHE["option_chains"] = {
+                    expiry: {"chain": data, "timestamp": now}
+                    for expiry, data in chains.items() if data is not None
+                }
+                if chains[primary] is not None:
+                    DATA_CACHE["option_chain"] = chains[primary]
+                    DATA_CACHE["option_chain_timestamp"] = now
+                    DATA_CACHE["option_chain_expiry"] = primary
+
+            if chains[primary] is not None:
+                bar_aggregator.on_tick(chains[primary].get("data", {}).get("underlying_ltp"))
+
+            prices = {}
+            for data in chains.values():
+                if data is not None:
+                    prices.update(self.chain_prices(data))
+            self.publish_prices(prices)
 
         except Exception as e:
-            print(f"[DataFetcher] Option Chain Fetch ERROR: {e}")
+            log.error("Option Chain Fetch ERROR: {}", e)
 
 
     # =====================================================
     # OHLC using SDK (1 minute candles)
     # =====================================================
     def fetch_ohlc(self):
+        """
+        OHLC_DAYS of 1m candles: completed days from the local history
+        store (downloaded once), today's candles fetched live.
+        """
         try:
-            # Last 2 days of 1-minute data
             start_date = (datetime.now() - timedelta(OHLC_DAYS)).strftime("%Y-%m-%d")
             end_date = datetime.now().strftime("%Y-%m-%d")
 
-            candles = dhan.intraday_minute_data(
-                security_id=UNDER_SECURITY_ID, 
-                exchange_segment=UNDER_EXCHANGE_SEGMENT,
-                instrument_type=UNDER_INSTRUMENT_TYPE,
-                from_date=start_date,
-                to_date=end_date,
-                interval=UNDER_INTERVAL
-            )
-            if not candles or candles.get("status") != "success":
-                print("[DataFetcher] No OHLC data returned")
+            df = HistoryLoader.load(start_date, end_date)
+            if df.empty:
+                log_throttled(log, "WARNING", "No OHLC data returned")
                 return
 
-            df = pd.DataFrame(candles["data"], columns=[
-                "timestamp", "open", "high", "low", "close", "volume"
-            ])
-            df["timestamp"] = (pd.to_datetime(df["timestamp"], unit="s", utc=True)
-                                .dt.tz_convert("Asia/Kolkata")
-                                .dt.tz_localize(None))
-            df = df.sort_values("timestamp").reset_index(drop=True)
             with CACHE_LOCK:
                 DATA_CACHE["ohlc_1m"] = df
                 DATA_CACHE["ohlc_timestamp"] = datetime.now()
+            bar_aggregator.reconcile(df)
 
         except Exception as e:
-            print(f"[DataFetcher] OHLC Fetch ERROR: {e}")
+            log.error("OHLC Fetch ERROR: {}", e)
 
 
 # Create singleton DataFetcher instance
@@ -0,0 +1,312 @@
+"""
+Execution Quality
+-----------------
+
+Responsibilities:
+- One execution record per order (entry / exit): decision-time LTP,
+  bid / ask and mid, then queued / sent / acknowledged / filled
+  timestamps and the broker's average fill price
+- Resolve fills in the background (order status polled by order id
+  within the data API budget) and append finished records to a JSONL
+  log
+- Analytics over the log: slippage vs LTP and vs mid, ack / fill /
+  signal-to-fill latency distributions, the money MARKET orders pay
+  over mid, and slippage cost by signal-to-fill latency bucket
+"""
+
+import json
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backend.data_fetcher import DATA_CACHE, CACHE_LOCK
+from backend.order_dispatcher import order_dispatcher
+from backend.rate_limiter import data_api_limiter
+from backend.metrics import metrics
+from backend.push_api import jsonable
+from backend.logger import get_logger
+
+log = get_logger("ExecutionQuality")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+EXECUTION_LOG_PATH = "storage/executions.jsonl"
+FILL_POLL_INTERVAL_SEC = 0.5
+FILL_TIMEOUT_SEC = 15            # give up resolving a fill after this long
+RECENT_RECORDS = 500             # kept in memory for the UI / push API
+LATENCY_BUCKETS = 4              # signal-to-fill quantile buckets in the cost report
+
+FILLED_STATUSES = ("TRADED",)
+FINAL_STATUSES = ("TRADED", "REJECTED", "CANCELLED", "EXPIRED")
+
+ORDER_ACK = metrics.histogram("order_ack_seconds", "Order sent -> broker acknowledgement", ["kind"])
+ORDER_FILL = metrics.histogram("order_fill_seconds", "Trading decision -> fill seen", ["kind"])
+
+
+class ExecutionRecorder:
+
+    def __init__(self, path=EXECUTION_LOG_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.open = {}                              # tag -> record awaiting ack / fill
+        self.recent = deque(maxlen=RECENT_RECORDS)
+        self.fills = queue.Queue()
+        self.thread = None
+
+    # ------------------------------------------------------------
+    # Decision -> ack
+    # ------------------------------------------------------------
+    @staticmethod
+    def quote(security_id):
+        """(ltp, bid, ask) from the shared price table; None where unknown."""
+        with CACHE_LOCK:
+            q = DATA_CACHE["option_ltp"].get(str(security_id)) or {}
+        return q.get("ltp"), q.get("bid"), q.get("ask")
+
+    def on_decision(self, tag, kind, security_id, side, qty, ltp, bid=None, ask=None, order_type=None, reason=None):
+        """Record what we knew when deciding to send the order."""
+        _, table_bid, table_ask = ExecutionRecorder.quote(security_id)
+        bid = bid if bid is not None else table_bid
+        ask = ask if ask is not None else table_ask
+        record = {
+            "tag": tag,
+            "kind": kind,
+            "side": side,
+            "security_id": str(security_id),
+            "qty": qty,
+            "order_type": order_type,
+            "reason": reason,
+            "decision_ltp": ltp,
+            "decision_bid": bid,
+            "decision_ask": ask,
+            "decision_mid": (bid + ask) / 2 if bid and ask else None,
+            "decided_at": datetime.now(),
+        }
+        with self.lock:
+            self.open.setdefault(tag, record)
+
+    def on_result(self, result):
+        """Dispatcher completion (order worker thread): ack times, then queue the fill lookup."""
+        with self.lock:
+            record = self.open.get(result["tag"])
+        if record is None or "acked_at" in record:
+            return
+
+        data = (result.get("response") or {}).get("data") or {}
+        record.update({
+            "ok": result["ok"],
+            "attempts": result["attempts"],
+            "error": result["error"],
+            "queued_at": result["queued_at"],
+            "sent_at": result["sent_at"],
+            "acked_at": result["completed_at"],
+            "order_id": data.get("orderId"),
+            "status": data.get("orderStatus"),
+        })
+        if result["sent_at"]:
+            ORDER_ACK.observe((result["completed_at"] - result["sent_at"]).total_seconds(), kind=record["kind"])
+
+        if not result["ok"] or not record["order_id"]:
+            self._finish(record)
+            return
+        self._ensure_worker()
+        self.fills.put(record)
+
+    # ------------------------------------------------------------
+    # Fill resolution
+    # ------------------------------------------------------------
+    def _ensure_worker(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._fill_loop, name="fill-resolver", daemon=True)
+                self.thread.start()
+
+    def _fill_loop(self):
+        pending = []
+        while True:
+            try:
+                pending.append(self.fills.get(timeout=FILL_POLL_INTERVAL_SEC if pending else None))
+                continue                      # drain new records before polling
+            except queue.Empty:
+                pass
+            still = []
+            for record in pending:
+                try:
+                    done = self._poll_fill(record)
+                except Exception as e:
+                    log.error("Fill lookup ERROR ({}): {}", record["tag"], e)
+                    done = False
+                if done or (datetime.now() - record["acked_at"]).total_seconds() > FILL_TIMEOUT_SEC:
+                    self._finish(record)
+                else:
+                    still.append(record)
+            pending = still
+
+    @staticmethod
+    def _poll_fill(record):
+        """
+        Update record from the order book; True once the order is final.
+        Goes through the dispatcher's broker client, like the orders.
+        """
+        data_api_limiter.acquire()
+        data = order_dispatcher.order_status(record["order_id"])
+        if data is None:
+            return False
+
+        record["status"] = data.get("orderStatus")
+        if record["status"] in FILLED_STATUSES:
+            price = data.get("averageTradedPrice") or data.get("price")
+            record["fill_price"] = float(price) if price else None
+            record["filled_qty"] = data.get("filledQty")
+            record["filled_at"] = datetime.now()
+            record["exchange_time"] = data.get("exchangeTime")
+        return record["status"] in FINAL_STATUSES
+
+    # ------------------------------------------------------------
+    # Finished records
+    # ------------------------------------------------------------
+    @staticmethod
+    def derive(record):
+        """Latencies (seconds) and slippage (price, per-order money) of a record."""
+        def seconds(a, b):
+            return (record[b] - record[a]).total_seconds() if record.get(a) and record.get(b) else None
+
+        out = {
+            "decision_to_send": seconds("decided_at", "sent_at"),
+            "ack_latency": seconds("sent_at", "acked_at"),
+            "fill_latency": seconds("acked_at", "filled_at"),
+            "signal_to_fill": seconds("decided_at", "filled_at"),
+        }
+        fill = record.get("fill_price")
+        # positive = paid more (BUY) / received less (SELL) than the reference
+        sign = 1 if record["side"] == "BUY" else -1
+        for ref in ("ltp", "mid"):
+            price = record.get(f"decision_{ref}")
+            slip = sign * (fill - price) if fill and price else None
+            out[f"slippage_vs_{ref}"] = slip
+            out[f"slippage_cost_vs_{ref}"] = slip * record["qty"] if slip is not None else None
+        return out
+
+    def _finish(self, record):
+        record.update(ExecutionRecorder.derive(record))
+        with self.lock:
+            self.open.pop(record["tag"], None)
+            self.recent.append(record)
+        if record.get("signal_to_fill") is not None:
+            ORDER_FILL.observe(record["signal_to_fill"], kind=record["kind"])
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(jsonable(record)) + "\n")
+        except Exception as e:
+            log.error("Write ERROR: {}", e)
+
+
+# Create singleton ExecutionRecorder instance
+execution_recorder = ExecutionRecorder()
+
+
+# ============================================================
+# Analytics
+# ============================================================
+class ExecutionAnalytics:
+
+    TIME_COLUMNS = ("decided_at", "queued_at", "sent_at", "acked_at", "filled_at")
+
+    @staticmethod
+    def load(path=EXECUTION_LOG_PATH):
+        """Execution log as a DataFrame (empty if none yet)."""
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        df = pd.read_json(path, lines=True)
+        for column in ExecutionAnalytics.TIME_COLUMNS:
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column], errors="coerce")
+        return df
+
+    @staticmethod
+    def distribution(values):
+        values = pd.to_numeric(pd.Series(values), errors="coerce").dropna().to_numpy(dtype=float)
+        if not len(values):
+            return None
+        p50, p90, p99 = np.percentile(values, [50, 90, 99])
+        return {
+            "n": int(len(values)),
+            "mean": float(values.mean()),
+            "p50": float(p50),
+            "p90": float(p90),
+            "p99": float(p99),
+            "max": float(values.max()),
+        }
+
+    @staticmethod
+    def latency_cost(df, buckets=LATENCY_BUCKETS):
+        """Mean slippage cost vs mid per signal-to-fill latency quantile bucket."""
+        data = df[["signal_to_fill", "slippage_cost_vs_mid"]].apply(pd.to_numeric, errors="coerce").dropna()
+        if len(data) < buckets:
+            return []
+        data["bucket"] = pd.qcut(data["signal_to_fill"], buckets, duplicates="drop")
+        grouped = data.groupby("bucket", observed=True)
+        return [
+            {
+                "latency_from": float(interval.left),
+                "latency_to": float(interval.right),
+                "orders": int(len(group)),
+                "mean_cost": float(group["slippage_cost_vs_mid"].mean()),
+            }
+            for interval, group in grouped
+        ]
+
+    @staticmethod
+    def summary(df=None):
+        """Slippage, latency and MARKET-order cost report over the execution log."""
+        df = ExecutionAnalytics.load() if df is None else df
+        if df.empty:
+            return {"orders": 0}
+
+        for column in ("ok", "fill_price", "order_type"):
+            if column not in df.columns:
+                df[column] = None
+        filled = df[df["fill_price"].notna()]
+        market = filled[filled["order_type"] == "MARKET"]
+
+        slippage = {}
+        for kind, group in [("ALL", filled)] + list(filled.groupby("kind")):
+            slippage[kind] = {
+                ref: ExecutionAnalytics.distribution(group.get(f"slippage_vs_{ref}", []))
+                for ref in ("ltp", "mid")
+            }
+
+        def total(column):
+            return float(pd.to_numeric(market.get(column, pd.Series(dtype=float)), errors="coerce").sum())
+
+        return {
+            "orders": int(len(df)),
+            "filled": int(len(filled)),
+            "failed": int(df["ok"].eq(False).sum()),
+            "latency": {
+                name: ExecutionAnalytics.distribution(df.get(name, []))
+                for name in ("decision_to_send", "ack_latency", "fill_latency", "signal_to_fill")
+            },
+            "slippage": slippage,
+            "market_orders": {
+                "orders": int(len(market)),
+                "cost_vs_mid": total("slippage_cost_vs_mid"),
+                "cost_vs_ltp": total("slippage_cost_vs_ltp"),
+            },
+            "latency_cost": ExecutionAnalytics.latency_cost(filled) if len(filled) else [],
+        }
+
+
+# ------------------------------------------------------------
+# Local test
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    print(json.dumps(ExecutionAnalytics.summary(), indent=2, default=str))
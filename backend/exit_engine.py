@@ -0,0 +1,128 @@
+"""
+Exit Engine
+-----------
+
+Responsibilities:
+- Evaluate open positions in the position book on every price update
+  (chain poll or feed tick); cost per update is O(positions touched)
+- Fixed SL / Target from STOPLOSS_PCT / TARGET_PCT
+- Trailing stop once premium moves in our favour
+- Time-based exits (max holding time, end-of-day square-off)
+- Fire exits immediately through the non-blocking order path
+"""
+
+from datetime import timedelta
+
+from backend.config import market_now
+from backend.data_fetcher import DATA_CACHE, CACHE_LOCK
+from backend.position_book import position_book
+from backend.order_manager import (
+    OrderManager,
+    TRAIL_ACTIVATE_PCT,
+    TRAIL_PCT,
+    MAX_HOLD_MINUTES,
+    SQUARE_OFF_TIME,
+)
+from backend.logger import get_logger
+
+log = get_logger("ExitEngine")
+
+
+class ExitEngine:
+
+    # ------------------------------------------------------------
+    # Rules
+    # ------------------------------------------------------------
+    @staticmethod
+    def update_trailing(trade, ltp):
+        """
+        Track peak premium and ratchet the SL up once the trade is
+        TRAIL_ACTIVATE_PCT in profit. SL never moves down.
+        """
+        if ltp > trade["peak"]:
+            trade["peak"] = ltp
+
+        if trade["peak"] >= trade["entry_price"] * (1 + TRAIL_ACTIVATE_PCT / 100):
+            trail_sl = trade["peak"] * (1 - TRAIL_PCT / 100)
+            if trail_sl > trade["sl"]:
+                trade["sl"] = trail_sl
+
+    @staticmethod
+    def time_exit_reason(trade, now):
+        """now: naive IST datetime; SQUARE_OFF_TIME and entry_time are IST."""
+        if now.strftime("%H:%M") >= SQUARE_OFF_TIME:
+            return "SQUARE_OFF"
+        if MAX_HOLD_MINUTES and now - trade["entry_time"] >= timedelta(minutes=MAX_HOLD_MINUTES):
+            return "TIME"
+        return None
+
+    @staticmethod
+    def evaluate(trade, ltp, now=None):
+        """
+        Return exit reason (SL / TRAIL_SL / TARGET / SQUARE_OFF / TIME)
+        or None if the trade stays open.
+        """
+        now = now or market_now()
+
+        if ltp is not None:
+            ExitEngine.update_trailing(trade, ltp)
+
+            if ltp <= trade["sl"]:
+                return "TRAIL_SL" if trade["sl"] > trade["initial_sl"] else "SL"
+            if ltp >= trade["target"]:
+                return "TARGET"
+
+        return ExitEngine.time_exit_reason(trade, now)
+
+    # ------------------------------------------------------------
+    # Event handlers
+    # ------------------------------------------------------------
+    @staticmethod
+    def on_tick(security_id, ltp):
+        """Single price update (market feed tick / quote)."""
+        with position_book.lock:
+            trade = position_book.get(security_id)
+            if not trade or trade["status"] != "OPEN" or trade["exit_pending"]:
+                return
+            reason = ExitEngine.evaluate(trade, float(ltp))
+
+        if reason:
+            log.info("{} hit on {} @ {}", reason, trade["symbol"], ltp)
+            OrderManager.exit_trade_async(trade, float(ltp), reason)
+
+    @staticmethod
+    def on_prices(prices):
+        """
+        Batch price update {security_id: ltp}, e.g. from a chain poll.
+        Walks whichever side is smaller: the update or the open book.
+        """
+        if not len(position_book):
+            return
+        if len(prices) <= len(position_book):
+            for security_id, ltp in prices.items():
+                ExitEngine.on_tick(security_id, ltp)
+        else:
+            for trade in position_book.open_positions():
+                ltp = prices.get(trade["security_id"])
+                if ltp is not None:
+                    ExitEngine.on_tick(trade["security_id"], ltp)
+
+    @staticmethod
+    def on_timer():
+        """
+        Periodic check (bot loop) so time exits fire even when no new
+        price arrives. Uses the last known price from the price table.
+        """
+        now = market_now()
+        for trade in position_book.open_positions():
+            with position_book.lock:
+                if trade["status"] != "OPEN" or trade["exit_pending"]:
+                    continue
+                reason = ExitEngine.time_exit_reason(trade, now)
+
+            if reason:
+                with CACHE_LOCK:
+                    quote = DATA_CACHE["option_ltp"].get(trade["security_id"])
+                ltp = quote["ltp"] if quote else trade["entry_price"]
+                log.info("{} exit on {} @ {}", reason, trade["symbol"], ltp)
+                OrderManager.exit_trade_async(trade, ltp, reason)
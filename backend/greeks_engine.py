@@ -0,0 +1,294 @@
+"""
+Greeks Engine
+-------------
+
+Responsibilities:
+- Solve implied volatility for every CE / PE of a chain in one batch
+- Compute Black-Scholes delta, gamma, theta and vega columns
+- Cache results per option chain snapshot; re-solve only changed strikes
+  when the underlying and expiry are unchanged (chain_diff change set)
+- Serve delta-based strike selection for signal_engine
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.config import RISK_FREE_RATE, market_now
+from backend.metrics import COMPUTE_DURATION
+from backend.logger import get_logger, log_throttled
+
+log = get_logger("GreeksEngine")
+
+
+# Expiry contracts settle at market close (IST)
+EXPIRY_CLOSE_TIME = "15:30"
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+MIN_EXPIRY_SECONDS = 60          # floor T so expiry-day maths stays finite
+
+IV_LOWER = 1e-4
+IV_UPPER = 5.0
+IV_PRICE_TOL = 1e-4              # rupees
+IV_MAX_ITER = 50
+
+GREEK_COLUMNS = ("iv", "delta", "gamma", "theta", "vega")
+
+# Unchanged rows may reuse Greeks solved up to this long ago (time decay)
+GREEKS_PARTIAL_MAX_AGE_SEC = 60
+
+# Last computed Greeks per expiry, keyed by snapshot
+GREEKS_CACHE = {}
+
+
+def _cache_slot(expiry):
+    slot = GREEKS_CACHE.get(expiry)
+    if slot is None:
+        today = market_now().date().isoformat()
+        for old in [e for e in GREEKS_CACHE if e and str(e)[:10] < today]:
+            del GREEKS_CACHE[old]
+        slot = GREEKS_CACHE[expiry] = {
+            "key": None,
+            "columns": None,
+            "base": None,        # (underlying_ltp, strikes) of the columns
+            "solved_at": 0.0,    # monotonic time of the last full solve
+        }
+    return slot
+
+
+class GreeksEngine:
+
+    # ============================================================
+    # Normal distribution helpers
+    # ============================================================
+    @staticmethod
+    def _norm_pdf(x):
+        return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+    @staticmethod
+    def _norm_cdf(x):
+        """
+        Standard normal CDF via Abramowitz & Stegun 7.1.26
+        (max abs error 1.5e-7, fully vectorized, no scipy needed).
+        """
+        z = np.abs(x) / np.sqrt(2)
+        t = 1.0 / (1.0 + 0.3275911 * z)
+        poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741
+               + t * (-1.453152027 + t * 1.061405429))))
+        erf = 1.0 - poly * np.exp(-z * z)
+        return 0.5 * (1.0 + np.sign(x) * erf)
+
+    # ============================================================
+    # Time to expiry
+    # ============================================================
+    @staticmethod
+    def time_to_expiry(expiry, now=None):
+        """
+        Year fraction from now until expiry close (15:30 IST).
+        expiry: "YYYY-MM-DD" string / date / Timestamp
+        now: naive IST datetime (defaults to the exchange clock)
+        """
+        if expiry is None:
+            return None
+        try:
+            expiry_ts = pd.Timestamp(f"{pd.Timestamp(expiry).date()} {EXPIRY_CLOSE_TIME}")
+        except (TypeError, ValueError):
+            return None
+
+        now = now or market_now()
+        seconds = (expiry_ts - pd.Timestamp(now)).total_seconds()
+        return max(seconds, MIN_EXPIRY_SECONDS) / SECONDS_PER_YEAR
+
+    # ============================================================
+    # Black-Scholes pricing
+    # ============================================================
+    @staticmethod
+    def _d1_d2(S, K, T, sigma, r):
+        sqrt_t = np.sqrt(T)
+        d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / (sigma * sqrt_t)
+        return d1, d1 - sigma * sqrt_t
+
+    @staticmethod
+    def bs_price(S, K, T, sigma, r, is_call):
+        """
+        Vectorized Black-Scholes price. is_call is a boolean array.
+        """
+        d1, d2 = GreeksEngine._d1_d2(S, K, T, sigma, r)
+        discount = K * np.exp(-r * T)
+        call = S * GreeksEngine._norm_cdf(d1) - discount * GreeksEngine._norm_cdf(d2)
+        put = discount * GreeksEngine._norm_cdf(-d2) - S * GreeksEngine._norm_cdf(-d1)
+        return np.where(is_call, call, put)
+
+    # ============================================================
+    # Implied volatility (batched safeguarded Newton)
+    # ============================================================
+    @staticmethod
+    def implied_vol(price, S, K, T, r, is_call):
+        """
+        Solve IV for all contracts at once.
+
+        Newton steps on vega, falling back to bisection whenever the step
+        leaves the current [lo, hi] bracket, so every element converges.
+        Prices outside no-arbitrage bounds return NaN.
+        """
+        price = np.asarray(price, dtype=float)
+        K = np.asarray(K, dtype=float)
+        is_call = np.asarray(is_call, dtype=bool)
+        n = price.shape[0]
+
+        discount = K * np.exp(-r * T)
+        intrinsic = np.where(is_call, np.maximum(S - discount, 0), np.maximum(discount - S, 0))
+        upper = np.where(is_call, S, discount)
+        valid = np.isfinite(price) & (price > intrinsic) & (price < upper) & (K > 0)
+
+        lo = np.full(n, IV_LOWER)
+        hi = np.full(n, IV_UPPER)
+        # Brenner-Subrahmanyam seed
+        sigma = np.clip(np.sqrt(2 * np.pi / T) * price / S, 0.05, 2.0)
+        sigma = np.where(valid, sigma, np.nan)
+        active = valid.copy()
+
+        sqrt_t = np.sqrt(T)
+        for _ in range(IV_MAX_ITER):
+            if not active.any():
+                break
+
+            s = sigma[active]
+            k = K[active]
+            model = GreeksEngine.bs_price(S, k, T, s, r, is_call[active])
+            diff = model - price[active]
+
+            d1, _ = GreeksEngine._d1_d2(S, k, T, s, r)
+            vega = S * GreeksEngine._norm_pdf(d1) * sqrt_t
+
+            a_lo = np.where(diff < 0, s, lo[active])
+            a_hi = np.where(diff > 0, s, hi[active])
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = s - diff / vega
+            bisect = ~np.isfinite(step) | (step <= a_lo) | (step >= a_hi)
+            s_new = np.where(bisect, 0.5 * (a_lo + a_hi), step)
+
+            idx = np.flatnonzero(active)
+            lo[idx] = a_lo
+            hi[idx] = a_hi
+            sigma[idx] = s_new
+
+            done = np.abs(diff) < IV_PRICE_TOL
+            active[idx[done]] = False
+
+        return sigma
+
+    # ============================================================
+    # Greeks
+    # ============================================================
+    @staticmethod
+    def greeks(S, K, T, sigma, r, is_call):
+        """
+        Delta, gamma, theta (per calendar day) and vega (per 1% IV).
+        """
+        d1, d2 = GreeksEngine._d1_d2(S, K, T, sigma, r)
+        pdf_d1 = GreeksEngine._norm_pdf(d1)
+        sqrt_t = np.sqrt(T)
+        discount = K * np.exp(-r * T)
+
+        delta = np.where(is_call, GreeksEngine._norm_cdf(d1), GreeksEngine._norm_cdf(d1) - 1)
+        gamma = pdf_d1 / (S * sigma * sqrt_t)
+        decay = -S * pdf_d1 * sigma / (2 * sqrt_t)
+        theta = np.where(
+            is_call,
+            decay - r * discount * GreeksEngine._norm_cdf(d2),
+            decay + r * discount * GreeksEngine._norm_cdf(-d2),
+        ) / 365
+        vega = S * pdf_d1 * sqrt_t / 100
+
+        return {"delta": delta, "gamma": gamma, "theta": theta, "vega": vega}
+
+    # ============================================================
+    # Chain enrichment
+    # ============================================================
+    @staticmethod
+    @COMPUTE_DURATION.timed(stage="greeks")
+    def compute(df, underlying_ltp, expiry, r=RISK_FREE_RATE):
+        """
+        Return {column_name: ndarray} of IV + Greeks for both legs.
+        CE and PE rows are solved together in a single 2N batch.
+        """
+        T = GreeksEngine.time_to_expiry(expiry)
+        n = len(df)
+        if T is None or not underlying_ltp or n == 0:
+            return None
+
+        S = float(underlying_ltp)
+        strikes = df["strike"].to_numpy(dtype=float)
+        K = np.concatenate([strikes, strikes])
+        price = np.concatenate([
+            df["ce_ltp"].to_numpy(dtype=float),
+            df["pe_ltp"].to_numpy(dtype=float),
+        ])
+        is_call = np.concatenate([np.ones(n, dtype=bool), np.zeros(n, dtype=bool)])
+
+        iv = GreeksEngine.implied_vol(price, S, K, T, r, is_call)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = GreeksEngine.greeks(S, K, T, iv, r, is_call)
+        values["iv"] = iv * 100
+
+        columns = {}
+        for name in GREEK_COLUMNS:
+            columns[f"ce_{name}"] = values[name][:n]
+            columns[f"pe_{name}"] = values[name][n:]
+        return columns
+
+    @staticmethod
+    def _partial(df, underlying_ltp, expiry, changes):
+        """
+        Cached columns with only the changed rows re-solved, or None when
+        a full solve is needed (underlying / expiry / strikes differ, or
+        the cached solve is too old).
+        """
+        slot = _cache_slot(expiry)
+        base = slot["base"]
+        if (
+            changes is None or changes["first"] or base is None
+            or base[0] != underlying_ltp
+            or time.monotonic() - slot["solved_at"] > GREEKS_PARTIAL_MAX_AGE_SEC
+            or not np.array_equal(base[1], df["strike"].to_numpy(dtype=float))
+        ):
+            return None
+
+        rows = np.flatnonzero(changes["mask"])
+        columns = {name: values.copy() for name, values in slot["columns"].items()}
+        if len(rows):
+            solved = GreeksEngine.compute(df.iloc[rows], underlying_ltp, expiry)
+            if solved is None:
+                return None
+            for name, values in solved.items():
+                columns[name][rows] = values
+        return columns
+
+    @staticmethod
+    def enrich(df, underlying_ltp, expiry, snapshot_key=None, changes=None):
+        """
+        Add ce_/pe_ iv, delta, gamma, theta, vega columns to df.
+        Re-uses the cached result when snapshot, LTP and expiry are unchanged;
+        with a chain_diff change set, only changed strikes are re-solved.
+        """
+        key = (snapshot_key, underlying_ltp, len(df))
+        slot = _cache_slot(expiry)
+        if snapshot_key is not None and slot["key"] == key:
+            columns = slot["columns"]
+        else:
+            columns = GreeksEngine._partial(df, underlying_ltp, expiry, changes)
+            if columns is None:
+                columns = GreeksEngine.compute(df, underlying_ltp, expiry)
+                if columns is None:
+                    log_throttled(log, "WARNING", "Expiry or underlying unavailable, Greeks skipped.")
+                    return df
+                slot["solved_at"] = time.monotonic()
+            slot["key"] = key
+            slot["columns"] = columns
+            slot["base"] = (underlying_ltp, df["strike"].to_numpy(dtype=float))
+
+        for name, values in columns.items():
+            df[name] = values
+        return df
@@ -0,0 +1,234 @@
+"""
+History Loader
+--------------
+
+Responsibilities:
+- Bulk-load 1-minute candles for any date range
+- Split missing ranges into API-sized chunks, fetched concurrently
+  within the data API rate limit
+- Persist every completed trading day as an immutable file on disk
+- Serve later loads (restarts, backtests) from disk, requesting only
+  the days that are missing
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend.config import dhan, market_now, UNDER_SECURITY_ID, UNDER_EXCHANGE_SEGMENT, UNDER_INSTRUMENT_TYPE, UNDER_INTERVAL
+from backend.rate_limiter import data_api_limiter
+from backend.metrics import dhan_call
+from backend.schema import DataSchema, OHLC_SCHEMA
+from backend.logger import get_logger
+
+log = get_logger("HistoryLoader")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+HISTORY_DIR = "storage/history"
+HISTORY_CHUNK_DAYS = 30          # Dhan intraday API allows up to 90 days per call
+HISTORY_WORKERS = 4
+
+OHLC_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+class HistoryLoader:
+
+    # In-memory copy of day files already read (files never change)
+    _day_cache = {}
+
+    # ------------------------------------------------------------
+    # Conversion
+    # ------------------------------------------------------------
+    @staticmethod
+    def to_frame(data):
+        """
+        Convert Dhan candle payload into the 1m frame used everywhere:
+        timestamp (IST, tz-naive), open, high, low, close, volume.
+        """
+        df = pd.DataFrame(data, columns=OHLC_COLUMNS)
+        df["timestamp"] = (pd.to_datetime(df["timestamp"], unit="s", utc=True)
+                            .dt.tz_convert("Asia/Kolkata")
+                            .dt.tz_localize(None))
+        df = df.sort_values("timestamp").reset_index(drop=True)
+        return DataSchema.apply_ohlc(df)
+
+    # ------------------------------------------------------------
+    # Disk layout: <HISTORY_DIR>/<security_id>_<interval>m/<YYYY-MM-DD>.npz
+    # ------------------------------------------------------------
+    @staticmethod
+    def _day_path(day, security_id, interval):
+        return os.path.join(HISTORY_DIR, f"{security_id}_{interval}m", f"{day.isoformat()}.npz")
+
+    @staticmethod
+    def _write_day(path, df):
+        """Atomic write; existing day files are never overwritten."""
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                timestamp=df["timestamp"].to_numpy(dtype="datetime64[ns]"),
+                **{c: df[c].to_numpy(dtype=OHLC_SCHEMA[c]) for c in OHLC_COLUMNS[1:]}
+            )
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _read_day(path):
+        df = HistoryLoader._day_cache.get(path)
+        if df is None:
+            with np.load(path) as data:
+                df = pd.DataFrame({c: data[c] for c in OHLC_COLUMNS})
+            HistoryLoader._day_cache[path] = df
+        return df
+
+    # ------------------------------------------------------------
+    # Range planning
+    # ------------------------------------------------------------
+    @staticmethod
+    def trading_days(start, end):
+        """Weekdays in [start, end]. Holidays inside a fetched span are stored as empty files."""
+        days = pd.bdate_range(start, end)
+        return [d.date() for d in days]
+
+    @staticmethod
+    def _chunks(days):
+        """Group sorted days into contiguous ranges of <= HISTORY_CHUNK_DAYS."""
+        chunks = []
+        for day in days:
+            if (
+                chunks
+                and (day - chunks[-1][-1]).days <= 3
+                and (day - chunks[-1][0]).days < HISTORY_CHUNK_DAYS
+            ):
+                chunks[-1].append(day)
+            else:
+                chunks.append([day])
+        return chunks
+
+    # ------------------------------------------------------------
+    # Fetch
+    # ------------------------------------------------------------
+    @staticmethod
+    def _fetch_range(start, end, security_id, exchange_segment, instrument_type, interval):
+        data_api_limiter.acquire()
+        candles = dhan_call(
+            "intraday_minute_data",
+            dhan.intraday_minute_data,
+            security_id=security_id,
+            exchange_segment=exchange_segment,
+            instrument_type=instrument_type,
+            from_date=start.strftime("%Y-%m-%d"),
+            to_date=(end + timedelta(days=1)).strftime("%Y-%m-%d"),
+            interval=interval
+        )
+        if not candles or candles.get("status") != "success":
+            raise RuntimeError(f"No OHLC data for {start}..{end}: {candles}")
+        return HistoryLoader.to_frame(candles["data"])
+
+    @staticmethod
+    def _fetch_chunk(days, security_id, exchange_segment, instrument_type, interval):
+        df = HistoryLoader._fetch_range(
+            days[0], days[-1], security_id, exchange_segment, instrument_type, interval
+        )
+        by_day = dict(tuple(df.groupby(df["timestamp"].dt.date)))
+        if not by_day:
+            log.warning("No candles for {}..{}; nothing stored", days[0], days[-1])
+            return 0
+
+        # A weekday without candles is only a holiday when the response
+        # covers it; days outside that span are retried on the next load
+        first, last = min(by_day), max(by_day)
+        stored = 0
+        for day in days:
+            if not first <= day <= last:
+                continue
+            day_df = by_day.get(day, df.iloc[0:0])
+            HistoryLoader._write_day(
+                HistoryLoader._day_path(day, security_id, interval),
+                day_df
+            )
+            stored += 1
+        return stored
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
+    @staticmethod
+    def load(
+        start,
+        end=None,
+        security_id=UNDER_SECURITY_ID,
+        exchange_segment=UNDER_EXCHANGE_SEGMENT,
+        instrument_type=UNDER_INSTRUMENT_TYPE,
+        interval=UNDER_INTERVAL,
+        include_today=True
+    ):
+        """
+        Return 1m candles for [start, end] (dates or YYYY-MM-DD strings).
+
+        Completed days come from disk (downloaded once, in parallel chunks,
+        when missing). Today is always fetched live and never persisted.
+        """
+        today = market_now().date()
+        start = pd.Timestamp(start).date()
+        end = pd.Timestamp(end).date() if end is not None else today
+
+        past_days = [d for d in HistoryLoader.trading_days(start, end) if d < today]
+        missing = [
+            d for d in past_days
+            if not os.path.exists(HistoryLoader._day_path(d, security_id, interval))
+        ]
+
+        if missing:
+            chunks = HistoryLoader._chunks(missing)
+            log.info("Downloading {} day(s) in {} chunk(s)", len(missing), len(chunks))
+            with ThreadPoolExecutor(max_workers=HISTORY_WORKERS) as pool:
+                futures = [
+                    pool.submit(
+                        HistoryLoader._fetch_chunk,
+                        chunk, security_id, exchange_segment, instrument_type, interval
+                    )
+                    for chunk in chunks
+                ]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        log.error("Chunk ERROR: {}", e)
+
+        frames = []
+        for d in past_days:
+            path = HistoryLoader._day_path(d, security_id, interval)
+            if os.path.exists(path):
+                frames.append(HistoryLoader._read_day(path))
+
+        if include_today and end >= today and today.weekday() < 5:
+            try:
+                frames.append(HistoryLoader._fetch_range(
+                    today, today, security_id, exchange_segment, instrument_type, interval
+                ))
+            except Exception as e:
+                log.error("Today fetch ERROR: {}", e)
+
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return DataSchema.apply_ohlc(pd.DataFrame(columns=OHLC_COLUMNS))
+        return DataSchema.apply_ohlc(pd.concat(frames, ignore_index=True))
+
+
+# ------------------------------------------------------------------
+# Local test
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    start = datetime.now() - timedelta(days=30)
+    df = HistoryLoader.load(start)
+    print(df.tail())
+    print("rows:", len(df))
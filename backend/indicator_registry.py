@@ -0,0 +1,169 @@
+"""
+Indicator Registry
+------------------
+
+Responsibilities:
+- Indicators declare their output columns, input columns (base OHLC
+  columns or other indicators' outputs) and default parameters
+- Resolve a request for some columns into the minimal dependency
+  order; shared intermediates (e.g. typical price) are computed once
+- Cache every indicator's output per (timeframe, data version,
+  indicator, params), so callers only pay for what changed
+"""
+
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from backend.logger import get_logger
+
+log = get_logger("IndicatorRegistry")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+INDICATOR_CACHE_SIZE = 256      # cached indicator outputs (LRU)
+
+
+class IndicatorRegistry:
+
+    def __init__(self, cache_size=INDICATOR_CACHE_SIZE):
+        self.indicators = {}        # name -> spec, in registration order
+        self.producers = {}         # column -> indicator name
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    # ------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------
+    def register(self, name, outputs, inputs=(), params=None, internal=False):
+        """
+        Decorator for fn(df, **params) -> {column: Series}.
+
+        outputs: column names, or fn(params) -> names for parametrised ones
+        inputs: columns read from df (base columns or other outputs)
+        internal: intermediates left out of the returned frame unless asked for
+        """
+        def decorator(fn):
+            spec = {
+                "name": name,
+                "fn": fn,
+                "outputs": outputs,
+                "inputs": tuple(inputs),
+                "params": dict(params or {}),
+                "internal": internal,
+            }
+            self.indicators[name] = spec
+            for column in self.outputs(name):
+                self.producers[column] = name
+            return fn
+        return decorator
+
+    def outputs(self, name, params=None):
+        spec = self.indicators[name]
+        params = {**spec["params"], **(params or {})}
+        outputs = spec["outputs"]
+        return list(outputs(params) if callable(outputs) else outputs)
+
+    def public_columns(self):
+        return [
+            column for name, spec in self.indicators.items() if not spec["internal"]
+            for column in self.outputs(name)
+        ]
+
+    # ------------------------------------------------------------
+    # Resolution
+    # ------------------------------------------------------------
+    def resolve(self, columns):
+        """Indicator names needed for `columns`, dependencies first."""
+        order, seen = [], set()
+
+        def visit(name, path):
+            if name in seen:
+                return
+            if name in path:
+                raise ValueError(f"Indicator cycle: {' -> '.join(path + (name,))}")
+            for column in self.indicators[name]["inputs"]:
+                producer = self.producers.get(column)
+                if producer is not None:
+                    visit(producer, path + (name,))
+            seen.add(name)
+            order.append(name)
+
+        for column in columns:
+            producer = self.producers.get(column)
+            if producer is None:
+                raise KeyError(f"No indicator produces column {column!r}")
+            visit(producer, ())
+        return order
+
+    # ------------------------------------------------------------
+    # Compute
+    # ------------------------------------------------------------
+    @staticmethod
+    def data_version(df, columns):
+        """Content hash of the base columns; equal frames share cache entries."""
+        return int(pd.util.hash_pandas_object(df[list(columns)], index=False).sum())
+
+    def _cached(self, key):
+        with self.lock:
+            value = self.cache.get(key)
+            if value is not None:
+                self.cache.move_to_end(key)
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+            return value
+
+    def _store(self, key, value):
+        with self.lock:
+            self.cache[key] = value
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def compute(self, df, columns=None, params=None, timeframe=None, version=None):
+        """
+        Return df with the requested indicator columns added (all public
+        ones when columns is None), in registration order.
+
+        params: {indicator name: {param: value}} overrides
+        timeframe / version: cache key; version defaults to a content hash
+        of the base columns, so callers need not track it.
+        """
+        columns = self.public_columns() if columns is None else list(columns)
+        params = params or {}
+        order = self.resolve(columns)
+
+        base = [c for c in df.columns if c not in self.producers]
+        if version is None:
+            version = IndicatorRegistry.data_version(df, base)
+
+        # overrides are part of every key: they change downstream inputs too
+        overrides = tuple(sorted((n, tuple(sorted(v.items()))) for n, v in params.items()))
+        work = df.copy()
+        for name in order:
+            spec = self.indicators[name]
+            p = {**spec["params"], **params.get(name, {})}
+            key = (timeframe, version, name, overrides)
+            result = self._cached(key)
+            if result is None:
+                result = spec["fn"](work, **p)
+                self._store(key, result)
+            # positional copy: cached values stay untouched by callers
+            for column, values in result.items():
+                work[column] = values.values.copy()
+
+        wanted = set(columns)
+        keep = base + [
+            column for name in self.indicators if name in order
+            for column in self.outputs(name, params.get(name)) if column in wanted
+        ]
+        return work[keep]
+
+
+# Shared registry (analysis_engine registers the technical indicators)
+indicators = IndicatorRegistry()
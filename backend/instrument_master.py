@@ -0,0 +1,298 @@
+"""
+Instrument Master
+-----------------
+
+Responsibilities:
+- Download Dhan's scrip master once per trading day
+- Keep the derivatives of configured underlyings as memory-mapped
+  columnar arrays (one .npy per column, one directory per day)
+- Hash indexes for O(1) lookups on the order path:
+  (underlying, expiry, strike, CE / PE) -> security_id and
+  security_id -> contract (symbol, lot size, tick size)
+- Refresh in the background when the trading day rolls over
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from backend.config import dhan
+from backend.logger import get_logger
+
+log = get_logger("InstrumentMaster")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+INSTRUMENT_DIR = "storage/instruments"
+INSTRUMENT_UNDERLYINGS = ("NIFTY", "BANKNIFTY", "FINNIFTY")
+INSTRUMENT_KEEP_DAYS = 3         # day directories kept on disk
+INSTRUMENT_RETRY_SEC = 300       # wait between failed refresh attempts
+SCRIP_MASTER_MODE = "compact"
+SCRIP_EXCHANGE = "NSE"
+SCRIP_SEGMENT = "D"              # derivatives
+TICK_SIZE_SCALE = 0.01           # compact scrip master quotes tick size in paise
+SYMBOL_WIDTH = 48
+
+OPTION_TYPE_CODES = {"XX": 0, "CE": 1, "PE": 2}    # XX = futures
+OPTION_TYPES = {code: name for name, code in OPTION_TYPE_CODES.items()}
+
+# Column name -> dtype of the memory-mapped arrays
+COLUMNS = {
+    "security_id": "int64",
+    "underlying": "int16",       # index into meta["underlyings"]
+    "expiry": "int32",           # yyyymmdd
+    "strike": "float64",
+    "option_type": "int8",       # OPTION_TYPE_CODES
+    "lot_size": "int32",
+    "tick_size": "float64",
+    "symbol": f"S{SYMBOL_WIDTH}",
+}
+
+
+class InstrumentMaster:
+
+    def __init__(self, root=INSTRUMENT_DIR, underlyings=INSTRUMENT_UNDERLYINGS):
+        self.root = root
+        self.wanted = tuple(underlyings)
+        self.lock = threading.Lock()
+        self.trading_date = None
+        self._refreshing = False
+        self._last_attempt = 0.0
+        # Swapped as one object on reload, so lookups never mix two days
+        self._index = {"columns": {}, "underlyings": [], "codes": {}, "by_contract": {}, "by_security": {}}
+
+    def __len__(self):
+        return len(self._index["by_security"])
+
+    # ------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------
+    @staticmethod
+    def expiry_key(expiry):
+        """'2026-10-27' / date / datetime -> 20261027."""
+        if expiry is None:
+            return None
+        if isinstance(expiry, (date, datetime)):
+            return expiry.year * 10000 + expiry.month * 100 + expiry.day
+        return int(str(expiry)[:10].replace("-", ""))
+
+    @staticmethod
+    def strike_key(strike):
+        """Strike in paise, so float noise can't miss the index."""
+        return int(round(float(strike) * 100))
+
+    # ------------------------------------------------------------
+    # Build (scrip master CSV -> column files)
+    # ------------------------------------------------------------
+    def _day_dir(self, day):
+        return os.path.join(self.root, day.isoformat())
+
+    def _download(self, csv_path):
+        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+        df = dhan.fetch_security_list(SCRIP_MASTER_MODE, filename=csv_path)
+        if df is None:
+            raise RuntimeError("Scrip master download failed")
+        return df
+
+    @staticmethod
+    def build(scrip, out_dir, underlyings=INSTRUMENT_UNDERLYINGS):
+        """
+        Filter the scrip master (DataFrame) to derivatives of
+        `underlyings` and write one .npy per column plus meta.json.
+        Written to a temp directory and renamed, so readers never see
+        a partial day.
+        """
+        df = scrip[
+            (scrip["SEM_EXM_EXCH_ID"] == SCRIP_EXCHANGE)
+            & (scrip["SEM_SEGMENT"] == SCRIP_SEGMENT)
+        ]
+        underlying = df["SEM_TRADING_SYMBOL"].astype(str).str.split("-").str[0]
+        keep = underlying.isin(underlyings)
+        df, underlying = df[keep], underlying[keep]
+
+        names = sorted(set(underlying))
+        codes = {name: i for i, name in enumerate(names)}
+        expiry = pd.to_datetime(df["SEM_EXPIRY_DATE"], errors="coerce")
+        symbol = df["SEM_CUSTOM_SYMBOL"].fillna(df["SEM_TRADING_SYMBOL"]).astype(str)
+
+        arrays = {
+            "security_id": df["SEM_SMST_SECURITY_ID"].to_numpy(),
+            "underlying": underlying.map(codes).to_numpy(),
+            "expiry": (expiry.dt.year * 10000 + expiry.dt.month * 100 + expiry.dt.day).fillna(0).to_numpy(),
+            "strike": pd.to_numeric(df["SEM_STRIKE_PRICE"], errors="coerce").fillna(0).to_numpy(),
+            "option_type": df["SEM_OPTION_TYPE"].map(OPTION_TYPE_CODES).fillna(0).to_numpy(),
+            "lot_size": pd.to_numeric(df["SEM_LOT_UNITS"], errors="coerce").fillna(0).to_numpy(),
+            "tick_size": pd.to_numeric(df["SEM_TICK_SIZE"], errors="coerce").fillna(0).to_numpy() * TICK_SIZE_SCALE,
+            "symbol": symbol.str.slice(0, SYMBOL_WIDTH).str.encode("utf-8").to_numpy(),
+        }
+
+        tmp_dir = f"{out_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name, dtype in COLUMNS.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), arrays[name].astype(dtype))
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump({"underlyings": names, "rows": int(len(df))}, f)
+
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp_dir, out_dir)
+        return len(df)
+
+    def _prune(self, keep_day):
+        days = sorted(
+            d for d in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, d)) and not d.endswith(".tmp")
+        )
+        for d in days[:-INSTRUMENT_KEEP_DAYS]:
+            if d != keep_day.isoformat():
+                shutil.rmtree(os.path.join(self.root, d), ignore_errors=True)
+        for name in os.listdir(self.root):
+            if name.endswith(".csv") and not name.startswith(keep_day.isoformat()):
+                os.remove(os.path.join(self.root, name))
+
+    # ------------------------------------------------------------
+    # Load
+    # ------------------------------------------------------------
+    def load(self, day=None):
+        """
+        Memory-map the day's columns (building them from a fresh
+        scrip master download if missing) and rebuild the indexes.
+        Returns True on success; on failure the previous day stays loaded.
+        """
+        day = day or date.today()
+        day_dir = self._day_dir(day)
+        try:
+            if not os.path.exists(os.path.join(day_dir, "meta.json")):
+                csv_path = os.path.join(self.root, f"{day.isoformat()}.csv")
+                rows = InstrumentMaster.build(self._download(csv_path), day_dir, self.wanted)
+                log.info("Scrip master refreshed: {} contracts", rows)
+                self._prune(day)
+
+            columns = {
+                name: np.load(os.path.join(day_dir, f"{name}.npy"), mmap_mode="r")
+                for name in COLUMNS
+            }
+            with open(os.path.join(day_dir, "meta.json")) as f:
+                meta = json.load(f)
+        except Exception as e:
+            log.error("Load ERROR ({}): {}", day, e)
+            return False
+
+        by_contract = dict(zip(
+            zip(
+                columns["underlying"].tolist(),
+                columns["expiry"].tolist(),
+                np.rint(columns["strike"] * 100).astype(np.int64).tolist(),
+                columns["option_type"].tolist(),
+            ),
+            range(len(columns["security_id"]))
+        ))
+        by_security = dict(zip(columns["security_id"].tolist(), range(len(columns["security_id"]))))
+
+        with self.lock:
+            self._index = {
+                "columns": columns,
+                "underlyings": meta["underlyings"],
+                "codes": {name: i for i, name in enumerate(meta["underlyings"])},
+                "by_contract": by_contract,
+                "by_security": by_security,
+            }
+            self.trading_date = day
+
+        log.info("Loaded {} contracts for {}", len(by_security), day)
+        return True
+
+    def ensure_loaded(self):
+        """
+        True when contracts are loaded. If nothing is loaded yet (e.g. UI
+        before bot start) a background load is started, with the same
+        retry backoff as ensure_fresh; callers never wait on the download.
+        """
+        if self.trading_date is None:
+            self.ensure_fresh()
+        return self.trading_date is not None
+
+    def ensure_fresh(self):
+        """Reload in the background once the trading day has rolled over."""
+        with self.lock:
+            if self.trading_date == date.today() or self._refreshing:
+                return
+            if time.monotonic() - self._last_attempt < INSTRUMENT_RETRY_SEC:
+                return
+            self._refreshing = True
+            self._last_attempt = time.monotonic()
+
+        def _refresh():
+            try:
+                self.load()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=_refresh, name="instrument-refresh", daemon=True).start()
+
+    # ------------------------------------------------------------
+    # Lookups (O(1))
+    # ------------------------------------------------------------
+    @staticmethod
+    def _row(index, security_id):
+        try:
+            return index["by_security"].get(int(security_id))
+        except (TypeError, ValueError):
+            return None
+
+    def security_id(self, underlying, expiry, strike, option_type):
+        """security_id of a contract, or None if unknown."""
+        index = self._index
+        code = index["codes"].get(underlying)
+        if code is None or expiry is None:
+            return None
+        row = index["by_contract"].get((
+            code,
+            InstrumentMaster.expiry_key(expiry),
+            InstrumentMaster.strike_key(strike),
+            OPTION_TYPE_CODES.get(option_type, 0),
+        ))
+        if row is None:
+            return None
+        return str(index["columns"]["security_id"][row])
+
+    def contract(self, security_id):
+        """Contract details for a security_id, or None if unknown."""
+        index = self._index
+        row = InstrumentMaster._row(index, security_id)
+        if row is None:
+            return None
+        c = index["columns"]
+        expiry = int(c["expiry"][row])
+        return {
+            "security_id": str(c["security_id"][row]),
+            "underlying": index["underlyings"][c["underlying"][row]],
+            "expiry": f"{expiry // 10000:04d}-{expiry // 100 % 100:02d}-{expiry % 100:02d}",
+            "strike": float(c["strike"][row]),
+            "option_type": OPTION_TYPES[int(c["option_type"][row])],
+            "lot_size": int(c["lot_size"][row]),
+            "tick_size": float(c["tick_size"][row]),
+            "symbol": c["symbol"][row].decode("utf-8"),
+        }
+
+    def lot_size(self, security_id):
+        index = self._index
+        row = InstrumentMaster._row(index, security_id)
+        return None if row is None else int(index["columns"]["lot_size"][row])
+
+    def tick_size(self, security_id):
+        index = self._index
+        row = InstrumentMaster._row(index, security_id)
+        return None if row is None else float(index["columns"]["tick_size"][row])
+
+
+# Create singleton InstrumentMaster instance
+instrument_master = InstrumentMaster()
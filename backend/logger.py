@@ -0,0 +1,173 @@
+"""
+Logger
+------
+
+Responsibilities:
+- Configure loguru once for the whole bot
+- Non-blocking: the calling thread only builds the record and puts it
+  on an in-process queue; a writer thread formats and writes
+- Human-readable console output + JSON-lines file (one per day) for
+  offline analysis
+- Per-component loggers (``get_logger("OrderManager")``)
+- Rate-limit repeated messages (``log_throttled``)
+"""
+
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from datetime import date, timedelta
+
+from loguru import logger
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_DIR = os.getenv("LOG_DIR", "storage/logs")
+LOG_JSON = True
+LOG_RETENTION_DAYS = 14
+LOG_REPEAT_INTERVAL_SEC = 60     # identical throttled messages at most once per interval
+
+_configured = False
+_config_lock = threading.Lock()
+
+# key -> [last_emitted_monotonic, suppressed_count]
+_THROTTLE = {}
+_THROTTLE_LOCK = threading.Lock()
+
+
+# ============================================================
+# Queue-backed sink
+# ============================================================
+class QueueSink:
+    """
+    loguru sink whose write() is a SimpleQueue.put (no pickling, no I/O
+    on the caller). The writer thread renders console and JSON lines.
+    """
+
+    def __init__(self, stream=sys.stderr, json_dir=None):
+        self.stream = stream
+        self.json_dir = json_dir
+        self.queue = queue.SimpleQueue()
+        self._file = None
+        self._file_day = None
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, message):
+        self.queue.put(message.record)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join(timeout=5)
+
+    # ------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------
+    def _run(self):
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            try:
+                self._write_console(record)
+                if self.json_dir:
+                    self._write_json(record)
+            except Exception as e:
+                sys.__stderr__.write(f"[Logger] Write ERROR: {e}\n")
+        if self._file:
+            self._file.close()
+
+    @staticmethod
+    def _exception_text(record):
+        exc = record["exception"]
+        if exc is None or exc.type is None:
+            return None
+        return "".join(traceback.format_exception(exc.type, exc.value, exc.traceback))
+
+    def _write_console(self, record):
+        line = (
+            f"{record['time']:%H:%M:%S}.{record['time'].microsecond // 1000:03d} | "
+            f"{record['level'].name: <7} | [{record['extra'].get('component', '-')}] {record['message']}\n"
+        )
+        exc = self._exception_text(record)
+        if exc:
+            line += exc
+        self.stream.write(line)
+        self.stream.flush()
+
+    def _write_json(self, record):
+        day = record["time"].date()
+        if day != self._file_day:
+            self._rotate(day)
+        self._file.write(json.dumps({
+            "time": record["time"].isoformat(),
+            "level": record["level"].name,
+            "component": record["extra"].get("component"),
+            "message": record["message"],
+            "module": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            "thread": record["thread"].name,
+            "exception": self._exception_text(record),
+        }, default=str) + "\n")
+        self._file.flush()
+
+    def _rotate(self, day):
+        if self._file:
+            self._file.close()
+        os.makedirs(self.json_dir, exist_ok=True)
+        self._file = open(os.path.join(self.json_dir, f"bot_{day.isoformat()}.jsonl"), "a")
+        self._file_day = day
+
+        cutoff = (date.today() - timedelta(days=LOG_RETENTION_DAYS)).isoformat()
+        for name in os.listdir(self.json_dir):
+            if name.startswith("bot_") and name.endswith(".jsonl") and name[4:14] < cutoff:
+                os.remove(os.path.join(self.json_dir, name))
+
+
+def configure(level=LOG_LEVEL, json_file=LOG_JSON):
+    """Install the sink (idempotent; first call wins)."""
+    global _configured
+    with _config_lock:
+        if _configured:
+            return
+        sink = QueueSink(json_dir=LOG_DIR if json_file else None)
+        logger.remove()
+        logger.configure(extra={"component": "-"})
+        logger.add(sink, level=level, format="{message}", backtrace=False, diagnose=False)
+        atexit.register(sink.close)
+        _configured = True
+
+
+def get_logger(component):
+    """Logger bound to a component name (shown as [component])."""
+    configure()
+    return logger.bind(component=component)
+
+
+def log_throttled(log, level, message, *args, key=None, interval=LOG_REPEAT_INTERVAL_SEC, **kwargs):
+    """
+    Emit at most once per `interval` seconds per key (default: the
+    message template). The next emitted line reports how many repeats
+    were dropped.
+    """
+    key = key or message
+    now = time.monotonic()
+    with _THROTTLE_LOCK:
+        state = _THROTTLE.get(key)
+        if state is not None and now - state[0] < interval:
+            state[1] += 1
+            return
+        suppressed = state[1] if state else 0
+        _THROTTLE[key] = [now, 0]
+
+    if suppressed:
+        message = f"{message} (repeated {suppressed}x)"
+    log.opt(depth=1).log(level, message, *args, **kwargs)
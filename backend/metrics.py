@@ -0,0 +1,315 @@
+"""
+Metrics
+-------
+
+Responsibilities:
+- In-process registry of counters, gauges and histograms (with labels)
+- Prometheus text exposition (format 0.0.4)
+- Stdlib HTTP endpoint (/metrics) for scraping a long-running bot
+- Shared instruments for Dhan API calls, cache age, tick / compute
+  durations, signals and order round-trips
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.logger import get_logger
+
+log = get_logger("MetricsServer")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+METRICS_PREFIX = "options_bot_"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+# ============================================================
+# Instruments
+# ============================================================
+class _Metric:
+
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = METRICS_PREFIX + name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_label_str(self.label_names, key)} {_fmt(v)}" for key, v in items
+        ]
+
+
+class Gauge(_Metric):
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._functions = {}
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, fn, **labels):
+        """Evaluate fn() at scrape time (e.g. cache age); None skips the sample."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def value(self, **labels):
+        key = self._key(labels)
+        fn = self._functions.get(key)
+        return fn() if fn else self._values.get(key)
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+            functions = list(self._functions.items())
+        for key, fn in functions:
+            try:
+                items.append((key, fn()))
+            except Exception:
+                continue
+        return self.header() + [
+            f"{self.name}{_label_str(self.label_names, key)} {_fmt(v)}"
+            for key, v in items if v is not None
+        ]
+
+
+class Histogram(_Metric):
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def timed(self, **labels):
+        """Decorator form of time()."""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - t0, **labels)
+            return wrapper
+        return decorator
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def render(self):
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._values.items()]
+        lines = self.header()
+        names = self.label_names + ("le",)
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_label_str(names, key + (_fmt(bound),))} {cumulative}")
+            labels = _label_str(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_fmt(total)}")
+            lines.append(f"{self.name}_count{labels} {n}")
+        return lines
+
+
+# ============================================================
+# Registry
+# ============================================================
+class MetricsRegistry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, cls, name, documentation, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter, name, documentation, labels)
+
+    def gauge(self, name, documentation, labels=()):
+        return self._register(Gauge, name, documentation, labels)
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, documentation, labels, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+# ============================================================
+# Shared instruments
+# ============================================================
+API_LATENCY = metrics.histogram("dhan_api_latency_seconds", "Dhan API call latency", ["endpoint"])
+API_ERRORS = metrics.counter("dhan_api_errors_total", "Dhan API calls that raised or returned non-success", ["endpoint"])
+CACHE_AGE = metrics.gauge("cache_age_seconds", "Seconds since the cached item was refreshed", ["item"])
+TICK_DURATION = metrics.histogram("tick_duration_seconds", "TradingBot.tick wall time")
+COMPUTE_DURATION = metrics.histogram("compute_duration_seconds", "Analytics stage wall time", ["stage"])
+CHAIN_CHANGED = metrics.gauge("chain_changed_strikes", "Strikes that changed in the latest option chain snapshot")
+SIGNALS = metrics.counter("signals_total", "Signals by source and outcome", ["source", "outcome"])
+ORDER_RTT = metrics.histogram("order_round_trip_seconds", "Order queued -> broker result", ["kind"])
+ORDER_RESULTS = metrics.counter("order_results_total", "Completed orders by kind and outcome", ["kind", "outcome"])
+
+
+def dhan_call(endpoint, fn, *args, **kwargs):
+    """
+    Call a Dhan SDK method, recording latency and errors (exceptions or
+    non-success status) under `endpoint`. Returns / raises as fn does.
+    """
+    t0 = time.perf_counter()
+    try:
+        response = fn(*args, **kwargs)
+    except Exception:
+        API_ERRORS.inc(endpoint=endpoint)
+        raise
+    finally:
+        API_LATENCY.observe(time.perf_counter() - t0, endpoint=endpoint)
+    if not isinstance(response, dict) or response.get("status") != "success":
+        API_ERRORS.inc(endpoint=endpoint)
+    return response
+
+
+# ============================================================
+# HTTP endpoint
+# ============================================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+
+    def __init__(self, host=METRICS_HOST, port=METRICS_PORT):
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        if self.server is not None:
+            return
+        try:
+            self.server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+        except OSError as e:
+            log.error("Could not bind {}:{}: {}", self.host, self.port, e)
+            return
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+        self.thread.start()
+        log.info("Serving http://{}:{}/metrics", self.host, self.port)
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+        log.info("Stopped")
+
+
+# Create singleton MetricsServer instance
+metrics_server = MetricsServer()
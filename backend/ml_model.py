@@ -0,0 +1,354 @@
+"""
+ML Model
+--------
+
+Responsibilities:
+- Build the direction-model feature vector from AnalysisEngine columns
+  (5m / 15m) and chain OI analytics; one definition serves both the
+  vectorized training frame and the single live row
+- Offline training over archived history with parallel cross-validation
+  (joblib) and versioned model artifacts
+- Low-latency in-process inference returning the PredictionEngine
+  direction / confidence dict
+"""
+
+import json
+import os
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from backend.analysis_engine import AnalysisEngine
+from backend.ohlc_processor import OHLCProcessor
+from backend.history_loader import HistoryLoader
+from backend.oi_analytics import OIAnalytics
+from backend.logger import get_logger, log_throttled
+
+log = get_logger("MLModel")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+MODEL_DIR = "storage/models"
+LATEST_POINTER = "LATEST"
+LABEL_BARS = 3                   # predict direction over the next 3 x 5m
+LABEL_THRESHOLD = 0.001          # |return| below 0.1% is NO_TRADE
+CV_SPLITS = 5
+
+CLASS_DIRECTION = {1: "BULLISH", -1: "BEARISH", 0: "NO_TRADE"}
+TREND_CODE = {"BULLISH": 1.0, "BEARISH": -1.0, "NEUTRAL": 0.0}
+
+
+# ============================================================
+# Features
+# ============================================================
+def _flow(flow, key):
+    """Option-flow value from a dict (live) or DataFrame (training)."""
+    if flow is None:
+        return np.nan
+    value = flow[key] if isinstance(flow, pd.DataFrame) else flow.get(key)
+    return np.nan if value is None else value
+
+
+def _trend(value):
+    if isinstance(value, pd.Series):
+        return value.astype(str).map(TREND_CODE).astype(float)
+    return TREND_CODE.get(value, 0.0)
+
+
+def _ltp(c5, flow):
+    ltp = _flow(flow, "underlying_ltp")
+    if isinstance(ltp, pd.Series):
+        return ltp.fillna(c5["close"])
+    return c5["close"] if ltp is None or np.isnan(ltp) else ltp
+
+
+# name -> fn(c5, c15, flow). Works on Series rows and aligned DataFrames alike.
+FEATURES = {
+    "ema_9_20_5m": lambda c5, c15, f: (c5["ema_9"] - c5["ema_20"]) / c5["close"],
+    "ema_20_50_5m": lambda c5, c15, f: (c5["ema_20"] - c5["ema_50"]) / c5["close"],
+    "ema_9_20_15m": lambda c5, c15, f: (c15["ema_9"] - c15["ema_20"]) / c15["close"],
+    "ema_20_50_15m": lambda c5, c15, f: (c15["ema_20"] - c15["ema_50"]) / c15["close"],
+    "rsi_5m": lambda c5, c15, f: c5["rsi"] / 100 - 0.5,
+    "rsi_15m": lambda c5, c15, f: c15["rsi"] / 100 - 0.5,
+    "vwap_dist_5m": lambda c5, c15, f: (c5["close"] - c5["vwap"]) / c5["close"],
+    "volume_ratio_5m": lambda c5, c15, f: c5["volume_ratio"],
+    "trend_5m": lambda c5, c15, f: _trend(c5["trend_bias"]),
+    "trend_15m": lambda c5, c15, f: _trend(c15["trend_bias"]),
+    "pcr_window": lambda c5, c15, f: _flow(f, "pcr_window") - 1,
+    "flow_bias": lambda c5, c15, f: _flow(f, "flow_bias"),
+    "max_pain_dist": lambda c5, c15, f: (_ltp(c5, f) - _flow(f, "max_pain")) / _ltp(c5, f),
+    "ce_wall_dist": lambda c5, c15, f: (_flow(f, "ce_wall") - _ltp(c5, f)) / _ltp(c5, f),
+    "pe_wall_dist": lambda c5, c15, f: (_ltp(c5, f) - _flow(f, "pe_wall")) / _ltp(c5, f),
+}
+FEATURE_COLUMNS = list(FEATURES)
+
+
+class FeatureBuilder:
+
+    @staticmethod
+    def vector(c5, c15, flow):
+        """Live feature vector (float64, NaN -> 0) from the latest rows."""
+        x = np.fromiter(
+            (float(fn(c5, c15, flow)) for fn in FEATURES.values()),
+            dtype=float,
+            count=len(FEATURES)
+        )
+        return np.nan_to_num(x, nan=0.0, posinf=0.0, neginf=0.0)
+
+    @staticmethod
+    def frame(c5, c15, flow):
+        """Training feature matrix from aligned 5m / 15m / flow frames."""
+        X = pd.DataFrame({name: fn(c5, c15, flow) for name, fn in FEATURES.items()})
+        return X.astype(float).replace([np.inf, -np.inf], np.nan).fillna(0.0)
+
+    # ------------------------------------------------------------
+    # Dataset from history
+    # ------------------------------------------------------------
+    @staticmethod
+    def _timeframe(df_1m, timeframe):
+        df = OHLCProcessor.filter_market_hours(df_1m)
+        return AnalysisEngine.enrich(OHLCProcessor.resample(df, timeframe))
+
+    @staticmethod
+    def aligned(df_1m, oi_archive=None):
+        """
+        Enriched 5m bars with the last 15m bar (``*_15m`` columns) and OI
+        snapshot that were complete when each 5m bar closed (no look-ahead).
+        available_at is the 5m bar close time.
+        """
+        df_1m = OHLCProcessor.convert_to_ist(df_1m.copy())
+        c5 = FeatureBuilder._timeframe(df_1m, "5T")
+        c15 = FeatureBuilder._timeframe(df_1m, "15T")
+
+        c5["available_at"] = c5["timestamp"] + pd.Timedelta(minutes=5)
+        c15["available_at"] = c15["timestamp"] + pd.Timedelta(minutes=15)
+        merged = pd.merge_asof(
+            c5.sort_values("available_at"),
+            c15.sort_values("available_at").drop(columns=["timestamp"]),
+            on="available_at",
+            direction="backward",
+            suffixes=("", "_15m")
+        ).dropna(subset=["ema_9_15m"])
+
+        if oi_archive is not None and not oi_archive.empty:
+            merged = pd.merge_asof(
+                merged,
+                oi_archive.rename(columns={"timestamp": "oi_timestamp"}).sort_values("oi_timestamp"),
+                left_on="available_at",
+                right_on="oi_timestamp",
+                direction="backward",
+                tolerance=pd.Timedelta(minutes=5)
+            )
+        return merged.reset_index(drop=True)
+
+    @staticmethod
+    def dataset(df_1m, oi_archive=None):
+        """Build (X, y, timestamps) from 1m candles for training."""
+        merged = FeatureBuilder.aligned(df_1m, oi_archive)
+        flow = merged if "flow_bias" in merged.columns else None
+
+        # Forward return label, never crossing a session boundary
+        day = merged["timestamp"].dt.date
+        future = merged.groupby(day)["close"].shift(-LABEL_BARS)
+        ret = future / merged["close"] - 1
+        y = np.select([ret > LABEL_THRESHOLD, ret < -LABEL_THRESHOLD], [1, -1], default=0)
+
+        c15_cols = {f"{c}_15m": c for c in ("close", "ema_9", "ema_20", "ema_50", "rsi", "trend_bias")}
+        c15_view = merged[list(c15_cols)].rename(columns=c15_cols)
+        X = FeatureBuilder.frame(merged, c15_view, flow)
+
+        valid = ret.notna().to_numpy()
+        return X[valid].reset_index(drop=True), y[valid], merged["timestamp"][valid].reset_index(drop=True)
+
+
+# ============================================================
+# Training
+# ============================================================
+def _candidates():
+    from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    return {
+        "logreg_c0.1": make_pipeline(StandardScaler(), LogisticRegression(C=0.1, max_iter=2000)),
+        "logreg_c1": make_pipeline(StandardScaler(), LogisticRegression(C=1.0, max_iter=2000)),
+        "hgb": HistGradientBoostingClassifier(max_depth=3, learning_rate=0.05, max_iter=200),
+        "rf": RandomForestClassifier(n_estimators=200, max_depth=6, min_samples_leaf=20),
+    }
+
+
+def _fit_score(name, estimator, X, y, train_idx, test_idx):
+    from sklearn.base import clone
+    from sklearn.metrics import balanced_accuracy_score
+
+    model = clone(estimator).fit(X[train_idx], y[train_idx])
+    return name, balanced_accuracy_score(y[test_idx], model.predict(X[test_idx]))
+
+
+class ModelTrainer:
+
+    @staticmethod
+    def train(start, end=None, n_jobs=-1):
+        """
+        Train every candidate with walk-forward CV in parallel, refit the
+        best on all data and save it as a new versioned artifact.
+        Returns the artifact metadata.
+        """
+        from joblib import Parallel, delayed
+        from sklearn.base import clone
+        from sklearn.model_selection import TimeSeriesSplit
+
+        df_1m = HistoryLoader.load(start, end, include_today=False)
+        X_df, y, ts = FeatureBuilder.dataset(df_1m, OIAnalytics.load_archive(start, end))
+        if len(X_df) < CV_SPLITS * 20:
+            raise ValueError(f"Not enough samples to train ({len(X_df)})")
+        X = X_df.to_numpy(dtype=float)
+        log.info("{} samples, class counts {}", len(X), dict(zip(*np.unique(y, return_counts=True))))
+
+        candidates = _candidates()
+        splits = list(TimeSeriesSplit(n_splits=CV_SPLITS).split(X))
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_score)(name, est, X, y, tr, te)
+            for name, est in candidates.items()
+            for tr, te in splits
+        )
+
+        scores = {}
+        for name, score in results:
+            scores.setdefault(name, []).append(score)
+        cv = {name: round(float(np.mean(s)), 4) for name, s in scores.items()}
+        best = max(cv, key=cv.get)
+        log.info("CV balanced accuracy: {} -> {}", cv, best)
+
+        model = clone(candidates[best]).fit(X, y)
+        return ModelTrainer.save(model, {
+            "model": best,
+            "cv_balanced_accuracy": cv,
+            "samples": int(len(X)),
+            "trained_from": str(ts.iloc[0]),
+            "trained_to": str(ts.iloc[-1]),
+        })
+
+    @staticmethod
+    def save(model, meta):
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        version = datetime.now().strftime("%Y%m%d_%H%M%S")
+        meta = dict(meta, version=version, features=FEATURE_COLUMNS, classes=[int(c) for c in model.classes_])
+
+        filename = f"direction_{version}.joblib"
+        joblib.dump({"model": model, "meta": meta}, os.path.join(MODEL_DIR, filename))
+        with open(os.path.join(MODEL_DIR, f"direction_{version}.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        with open(os.path.join(MODEL_DIR, LATEST_POINTER), "w") as f:
+            f.write(filename)
+
+        log.info("Saved model {}", filename)
+        return meta
+
+
+# ============================================================
+# Inference
+# ============================================================
+class MLPredictor:
+
+    _model = None
+    _meta = None
+    _linear = None        # (W, b) fast path for scaler + logistic regression
+    _failed = None        # pointer mtime of the last failed load (not retried until it changes)
+
+    @staticmethod
+    def load(filename=None):
+        """
+        Load a model artifact (latest by default). Returns True on success.
+        A latest model that failed to load is not read again until the
+        pointer file changes (a new model is trained).
+        """
+        pointer_mtime = None
+        if filename is None:
+            pointer = os.path.join(MODEL_DIR, LATEST_POINTER)
+            if not os.path.exists(pointer):
+                log_throttled(log, "WARNING", "No trained model found.")
+                return False
+            pointer_mtime = os.stat(pointer).st_mtime_ns
+            if pointer_mtime == MLPredictor._failed:
+                return False
+            with open(pointer) as f:
+                filename = f.read().strip()
+
+        try:
+            artifact = joblib.load(os.path.join(MODEL_DIR, filename))
+        except Exception as e:
+            log.error("Unreadable model {}: {}", filename, e)
+            MLPredictor._failed = pointer_mtime
+            return False
+        if artifact["meta"]["features"] != FEATURE_COLUMNS:
+            log.error("Feature mismatch in {}, not loaded.", filename)
+            MLPredictor._failed = pointer_mtime
+            return False
+
+        MLPredictor._model = artifact["model"]
+        MLPredictor._meta = artifact["meta"]
+        MLPredictor._linear = MLPredictor._fold_linear(artifact["model"])
+        MLPredictor._failed = None
+        log.info("Loaded model {} ({})", artifact["meta"]["version"], artifact["meta"]["model"])
+        return True
+
+    @staticmethod
+    def _fold_linear(model):
+        """
+        Fold StandardScaler into LogisticRegression weights so inference
+        is one small matrix-vector product.
+        """
+        steps = getattr(model, "named_steps", None)
+        if not steps or set(steps) != {"standardscaler", "logisticregression"}:
+            return None
+        scaler, clf = steps["standardscaler"], steps["logisticregression"]
+        W = clf.coef_ / scaler.scale_
+        b = clf.intercept_ - W @ scaler.mean_
+        if W.shape[0] == 1:                       # binary: expand to two rows
+            W = np.vstack([-W[0] / 2, W[0] / 2])
+            b = np.array([-b[0] / 2, b[0] / 2])
+        return W, b
+
+    @staticmethod
+    def predict_proba(x):
+        if MLPredictor._linear is not None:
+            W, b = MLPredictor._linear
+            z = W @ x + b
+            z = np.exp(z - z.max())
+            return z / z.sum()
+        return MLPredictor._model.predict_proba(x.reshape(1, -1))[0]
+
+    @staticmethod
+    def predict(c5, c15, flow):
+        """
+        Same dict shape as PredictionEngine.predict, or None if no model.
+        """
+        if MLPredictor._model is None and not MLPredictor.load():
+            return None
+
+        proba = MLPredictor.predict_proba(FeatureBuilder.vector(c5, c15, flow))
+        classes = MLPredictor._meta["classes"]
+        by_class = dict(zip(classes, proba))
+        best = classes[int(np.argmax(proba))]
+
+        p_bull = float(by_class.get(1, 0.0))
+        p_bear = float(by_class.get(-1, 0.0))
+        return {
+            "direction": CLASS_DIRECTION[best],
+            "confidence": int(round(float(np.max(proba)) * 100)),
+            "score": int(round((p_bull - p_bear) * 100)),
+            "details": {
+                "15m_trend": c15["trend_bias"],
+                "5m_trend": c5["trend_bias"],
+                "rsi_15m": round(float(c15["rsi"]), 2),
+                "option_flow": flow,
+                "model_version": MLPredictor._meta["version"],
+                "reasons": [f"ML {MLPredictor._meta['model']}: P(bull)={p_bull:.2f} P(bear)={p_bear:.2f}"]
+            }
+        }
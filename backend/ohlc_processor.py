@@ -6,10 +6,18 @@ Responsibilities:
 - Convert raw 1-minute OHLC timestamps to IST
 - Filter NSE market hours (09:15–15:30)
 - Resample 1m data into 5m and 15m candles
+- Derive several timeframes from one filtered 1m frame, each from the
+  largest already-built timeframe that divides it (15m / 30m from 5m)
+- Extend REST 1m candles with live bars (bar_aggregator) and serve
+  sub-minute (15s / 30s) bars
 """
 
 import pandas as pd
 from backend.data_fetcher import DATA_CACHE, CACHE_LOCK
+from backend.bar_aggregator import bar_aggregator, LIVE_COLUMN
+from backend.logger import get_logger, log_throttled
+
+log = get_logger("OHLCProcessor")
 
 
 class OHLCProcessor:
@@ -17,17 +25,29 @@ class OHLCProcessor:
     MARKET_START = "09:15"
     MARKET_END = "15:30"
     TIMEZONE = "Asia/Kolkata"
+    LIVE_BARS = True             # append live 1m bars newer than the last REST candle
     
     @staticmethod
     def get_1m():
         """Return raw 1-minute OHLC DataFrame from cache."""
         with CACHE_LOCK:
             df = DATA_CACHE.get("ohlc_1m")
+        if OHLCProcessor.LIVE_BARS:
+            df = bar_aggregator.merge_1m(df)
         if df is None or df.empty:
-            print("[OHLCProcessor] No 1m OHLC data available.")
+            log_throttled(log, "WARNING", "No 1m OHLC data available.")
             return None
         return df.copy()
 
+    @staticmethod
+    def get_bars(timeframe):
+        """Today's live bars for a bar_aggregator timeframe ("15s", "30s", "1m")."""
+        df = bar_aggregator.frame(timeframe)
+        if df.empty:
+            log_throttled(log, "WARNING", "No live {} bars yet.", timeframe)
+            return None
+        return df
+
     # ------------------------------------------------------------------
     # Timestamp handling
     # ------------------------------------------------------------------
@@ -77,24 +97,65 @@ class OHLCProcessor:
         """
         df = df.set_index("timestamp")
 
+        agg = {
+            "open": "first",
+            "high": "max",
+            "low": "min",
+            "close": "last",
+            "volume": "sum"
+        }
+        # a bar with any live (tick-built) minute has incomplete volume
+        if LIVE_COLUMN in df.columns:
+            agg[LIVE_COLUMN] = "max"
+
         ohlc = (
             df.resample(timeframe,origin="start_day",
         offset="9h15min")
-              .agg({
-                  "open": "first",
-                  "high": "max",
-                  "low": "min",
-                  "close": "last",
-                  "volume": "sum"
-              })
+              .agg(agg)
               .dropna()
         )
 
         return ohlc.reset_index()
 
+    @staticmethod
+    def resample_many(df_1m, timeframes):
+        """
+        {label: candles} for labels like "1m", "3m", "5m", "15m", "30m"
+        from an IST, market-hours 1m frame. Sessions start at 09:15, so a
+        bar of N minutes is exactly the union of the M-minute bars for
+        any M dividing N; each timeframe is built from the largest such
+        timeframe already available.
+        """
+        built = {1: df_1m}
+        out = {}
+        for label in sorted(timeframes, key=OHLCProcessor.minutes):
+            minutes = OHLCProcessor.minutes(label)
+            if minutes not in built:
+                base = max(m for m in built if minutes % m == 0)
+                built[minutes] = OHLCProcessor.resample(built[base], f"{minutes}min")
+            out[label] = built[minutes]
+        return out
+
+    @staticmethod
+    def minutes(label):
+        """"15m" -> 15."""
+        return int(label.rstrip("m"))
+
     # ------------------------------------------------------------------
     # Public helpers
     # ------------------------------------------------------------------
+    @staticmethod
+    def get_timeframes(timeframes):
+        """Candles for several timeframes from one load + filter of the 1m data."""
+        df = OHLCProcessor.get_1m()
+        if df is None:
+            return None
+
+        df = OHLCProcessor.convert_to_ist(df)
+        df = OHLCProcessor.filter_market_hours(df)
+
+        return OHLCProcessor.resample_many(df, timeframes)
+
     @staticmethod
     def get_5m():
         """Return 5-minute OHLC candles."""
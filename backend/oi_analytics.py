@@ -0,0 +1,303 @@
+"""
+OI Analytics
+------------
+
+Responsibilities:
+- Chain-wide option-flow metrics computed once per snapshot:
+  PCR (total & ATM window), max pain, CE / PE OI walls
+  (chain-wide OI metrics reused while no strike's OI changed)
+- Classify OI buildup per strike (long/short buildup, covering, unwinding)
+- Serve scored option-flow features to prediction_engine
+- Archive per-snapshot features for model training (queued to a
+  writer thread, off the parse / predict path)
+"""
+
+import atexit
+import os
+import queue
+import threading
+
+import numpy as np
+import pandas as pd
+
+from backend.option_chain_parser import OptionChainParser
+from backend.metrics import COMPUTE_DURATION
+from backend.logger import get_logger, log_throttled
+
+log = get_logger("OIAnalytics")
+
+
+OI_ARCHIVE_DIR = "storage/oi_features"
+ARCHIVE_FIELDS = ["pcr_total", "pcr_window", "max_pain", "ce_wall", "pe_wall", "flow_bias", "underlying_ltp"]
+
+BUILDUP_LABELS = ["LONG_BUILDUP", "SHORT_BUILDUP", "SHORT_COVERING", "LONG_UNWINDING"]
+
+# Last computed analytics, keyed by snapshot
+OI_ANALYTICS_CACHE = {
+    "key": None,
+    "result": None,
+    "chain_wide": {},            # expiry -> pcr_total / max_pain / walls of the last OI change
+}
+
+
+class OIAnalytics:
+
+    # ============================================================
+    # PCR
+    # ============================================================
+    @staticmethod
+    def pcr(ce_oi, pe_oi):
+        """Put-call ratio on open interest."""
+        total_ce = np.nansum(ce_oi)
+        if total_ce <= 0:
+            return None
+        return float(np.nansum(pe_oi) / total_ce)
+
+    # ============================================================
+    # Max pain
+    # ============================================================
+    @staticmethod
+    def max_pain(strikes, ce_oi, pe_oi):
+        """
+        Strike at which total option-writer payout is minimal.
+        Payout matrix is strikes x strikes, built with broadcasting.
+        """
+        if len(strikes) == 0:
+            return None
+        settle = strikes[:, None]
+        ce_payout = np.maximum(settle - strikes[None, :], 0) * ce_oi[None, :]
+        pe_payout = np.maximum(strikes[None, :] - settle, 0) * pe_oi[None, :]
+        pain = (ce_payout + pe_payout).sum(axis=1)
+        return float(strikes[np.argmin(pain)])
+
+    # ============================================================
+    # OI walls
+    # ============================================================
+    @staticmethod
+    def oi_wall(strikes, oi):
+        """Strike holding the largest open interest."""
+        if len(strikes) == 0 or np.all(oi <= 0):
+            return None
+        return float(strikes[np.argmax(oi)])
+
+    # ============================================================
+    # Buildup classification
+    # ============================================================
+    @staticmethod
+    def classify_buildup(oi_change, ltp_change):
+        """
+        OI up + price up   -> LONG_BUILDUP
+        OI up + price down -> SHORT_BUILDUP
+        OI down + price up -> SHORT_COVERING
+        OI down + price down -> LONG_UNWINDING
+        """
+        conditions = [
+            (oi_change > 0) & (ltp_change > 0),
+            (oi_change > 0) & (ltp_change < 0),
+            (oi_change < 0) & (ltp_change > 0),
+            (oi_change < 0) & (ltp_change < 0),
+        ]
+        return np.select(conditions, BUILDUP_LABELS, default="NONE")
+
+    @staticmethod
+    def flow_bias(window_df):
+        """
+        Net writer flow in the ATM window, in [-1, 1].
+
+        Put writing / call covering is read as bullish,
+        call writing / put covering as bearish.
+        """
+        ce_oi_chg = window_df["ce_oi_daily_intraday_change"].to_numpy(dtype=float)
+        pe_oi_chg = window_df["pe_oi_daily_intraday_change"].to_numpy(dtype=float)
+        ce_build = window_df["ce_buildup"].to_numpy()
+        pe_build = window_df["pe_buildup"].to_numpy()
+
+        bullish = (
+            np.abs(pe_oi_chg[pe_build == "SHORT_BUILDUP"]).sum()
+            + np.abs(ce_oi_chg[ce_build == "SHORT_COVERING"]).sum()
+        )
+        bearish = (
+            np.abs(ce_oi_chg[ce_build == "SHORT_BUILDUP"]).sum()
+            + np.abs(pe_oi_chg[pe_build == "SHORT_COVERING"]).sum()
+        )
+        total = bullish + bearish
+        if total <= 0:
+            return 0.0
+        return float((bullish - bearish) / total)
+
+    # ============================================================
+    # Snapshot analytics
+    # ============================================================
+    @staticmethod
+    def _oi_moved(changes):
+        """False only when the chain_diff change set shows no OI change."""
+        if changes is None or changes["first"]:
+            return True
+        return bool(
+            changes["by_field"]["ce_oi"] or changes["by_field"]["pe_oi"]
+            or len(changes["added"]) or len(changes["removed"])
+        )
+
+    @staticmethod
+    def chain_wide(strikes, ce_oi, pe_oi):
+        return {
+            "pcr_total": OIAnalytics.pcr(ce_oi, pe_oi),
+            "max_pain": OIAnalytics.max_pain(strikes, ce_oi, pe_oi),
+            "ce_wall": OIAnalytics.oi_wall(strikes, ce_oi),
+            "pe_wall": OIAnalytics.oi_wall(strikes, pe_oi),
+        }
+
+    @staticmethod
+    @COMPUTE_DURATION.timed(stage="oi_analytics")
+    def compute(parsed):
+        """
+        Compute option-flow analytics from an OptionChainParser.parse() result.
+        Adds ce_buildup / pe_buildup columns to parsed["df"].
+        """
+        df = parsed["df"]
+        window_df = parsed["window_df"]
+
+        chain_wide = OI_ANALYTICS_CACHE["chain_wide"].get(parsed.get("expiry"))
+        if chain_wide is None or OIAnalytics._oi_moved(parsed.get("changes")):
+            chain_wide = OIAnalytics.chain_wide(
+                df["strike"].to_numpy(dtype=float),
+                np.nan_to_num(df["ce_oi"].to_numpy(dtype=float)),
+                np.nan_to_num(df["pe_oi"].to_numpy(dtype=float)),
+            )
+            OI_ANALYTICS_CACHE["chain_wide"][parsed.get("expiry")] = chain_wide
+
+        df["ce_buildup"] = OIAnalytics.classify_buildup(
+            df["ce_oi_daily_intraday_change"].to_numpy(dtype=float),
+            df["ce_ltp_daily_intraday_change"].to_numpy(dtype=float),
+        )
+        df["pe_buildup"] = OIAnalytics.classify_buildup(
+            df["pe_oi_daily_intraday_change"].to_numpy(dtype=float),
+            df["pe_ltp_daily_intraday_change"].to_numpy(dtype=float),
+        )
+
+        result = {
+            "pcr_total": chain_wide["pcr_total"],
+            "pcr_window": None,
+            "max_pain": chain_wide["max_pain"],
+            "ce_wall": chain_wide["ce_wall"],
+            "pe_wall": chain_wide["pe_wall"],
+            "flow_bias": 0.0,
+            "underlying_ltp": parsed.get("underlying_ltp"),
+        }
+
+        if window_df is not None and not window_df.empty:
+            window_df = df.loc[window_df.index]
+            result["pcr_window"] = OIAnalytics.pcr(
+                window_df["ce_oi"].to_numpy(dtype=float),
+                window_df["pe_oi"].to_numpy(dtype=float),
+            )
+            result["flow_bias"] = OIAnalytics.flow_bias(window_df)
+            parsed["window_df"] = window_df
+
+        return result
+
+    @staticmethod
+    def for_snapshot(parsed=None):
+        """
+        Return analytics for the current snapshot, computing them only
+        when the snapshot (or ATM) changed since the previous call.
+        """
+        if parsed is None:
+            parsed = OptionChainParser.parse()
+        if not isinstance(parsed, dict):
+            return None
+
+        key = (parsed.get("snapshot_ts"), parsed.get("atm_strike"), parsed.get("expiry"))
+        if key[0] is not None and OI_ANALYTICS_CACHE["key"] == key:
+            return OI_ANALYTICS_CACHE["result"]
+
+        result = OIAnalytics.compute(parsed)
+        OI_ANALYTICS_CACHE["key"] = key
+        OI_ANALYTICS_CACHE["result"] = result
+
+        if key[0] is not None:
+            archive_writer.put(result, key[0])
+        return result
+
+    # ============================================================
+    # Archive (one CSV row per snapshot, one file per day)
+    # ============================================================
+    @staticmethod
+    def archive(result, snapshot_ts):
+        """Append one row (blocking; the tick path goes through archive_writer)."""
+        path = os.path.join(OI_ARCHIVE_DIR, f"{snapshot_ts.date().isoformat()}.csv")
+        new_file = not os.path.exists(path)
+        if new_file:
+            os.makedirs(OI_ARCHIVE_DIR, exist_ok=True)
+
+        values = ["" if result[f] is None else f"{result[f]:.8g}" for f in ARCHIVE_FIELDS]
+        with open(path, "a") as f:
+            if new_file:
+                f.write(",".join(["timestamp"] + ARCHIVE_FIELDS) + "\n")
+            f.write(",".join([snapshot_ts.isoformat()] + values) + "\n")
+
+    @staticmethod
+    def load_archive(start=None, end=None):
+        """Archived snapshot features as a DataFrame sorted by timestamp."""
+        if not os.path.isdir(OI_ARCHIVE_DIR):
+            return pd.DataFrame(columns=["timestamp"] + ARCHIVE_FIELDS)
+
+        frames = []
+        for name in sorted(os.listdir(OI_ARCHIVE_DIR)):
+            day = name.removesuffix(".csv")
+            if (start and day < str(pd.Timestamp(start).date())) or (end and day > str(pd.Timestamp(end).date())):
+                continue
+            frames.append(pd.read_csv(os.path.join(OI_ARCHIVE_DIR, name), parse_dates=["timestamp"]))
+
+        if not frames:
+            return pd.DataFrame(columns=["timestamp"] + ARCHIVE_FIELDS)
+        return pd.concat(frames, ignore_index=True).sort_values("timestamp").reset_index(drop=True)
+
+
+# ============================================================
+# Archive writer
+# ============================================================
+class ArchiveWriter:
+    """
+    Queue of (result, snapshot_ts) rows written by one daemon thread,
+    so analyze() never waits on disk. Started on first use.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def put(self, result, snapshot_ts):
+        if self.thread is None:
+            self._start()
+        self.queue.put((result, snapshot_ts))
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="oi-archive", daemon=True)
+                self.thread.start()
+
+    def close(self):
+        """Write what is queued, then stop the thread."""
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.queue.put(None)
+            thread.join(timeout=5)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                OIAnalytics.archive(*item)
+            except OSError as e:
+                log_throttled(log, "ERROR", "Archive ERROR: {}", e)
+
+
+# Create singleton ArchiveWriter instance
+archive_writer = ArchiveWriter()
+atexit.register(archive_writer.close)
@@ -0,0 +1,378 @@
+"""
+Optimizer
+---------
+
+Responsibilities:
+- Grid / random search over PredictionEngine.WEIGHTS, SignalEngine
+  thresholds and exit parameters
+- Vectorized backtest on a Black-Scholes option premium proxy
+- Indicator arrays computed once, written to disk and memory-mapped
+  read-only by every worker process
+- Walk-forward evaluation (expanding train window, next block as test)
+- Ranked results table saved under storage/optimizer
+"""
+
+import itertools
+import os
+import random
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backend.config import RISK_FREE_RATE
+from backend.greeks_engine import GreeksEngine, SECONDS_PER_YEAR
+from backend.history_loader import HistoryLoader
+from backend.ml_model import FeatureBuilder, TREND_CODE
+from backend.oi_analytics import OIAnalytics
+from backend.prediction_engine import PredictionEngine
+from backend.signal_engine import SignalEngine
+import backend.order_manager as om
+from backend.logger import get_logger
+
+log = get_logger("ParameterSweep")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+OPTIMIZER_DIR = "storage/optimizer"
+OPTIMIZER_WORKERS = os.cpu_count() or 2
+OPTIMIZER_BATCH = 8              # parameter sets per worker task
+
+PROXY_IV = 0.12                  # flat IV for the premium proxy
+PROXY_DAYS_TO_EXPIRY = 3         # premium proxy assumes a weekly 3 days out
+STRIKE_STEP = 50
+DELTA_SEARCH_STEPS = 10          # strikes either side of ATM for DELTA mode
+
+RANK_METRIC = "test_total_pnl_pct"
+
+# Default search space (keys from PredictionEngine.WEIGHTS or signal_params())
+PARAM_GRID = {
+    "trend_15m": [20, 30, 40],
+    "align_5m": [10, 20],
+    "ema_stack": [10, 15, 20],
+    "direction_threshold": [30, 40, 50],
+    "min_confidence": [40, 50, 60, 70],
+    "strike_mode": ["ATM", "OTM", "ITM"],
+    "stoploss_pct": [15, 25, 35],
+    "target_pct": [25, 40, 60],
+}
+
+# Arrays the backtest reads; shared with workers via memory-mapped .npy
+SCORE_FIELDS = (
+    "trend_5m", "trend_15m", "ema_9", "ema_20", "ema_50", "rsi", "volume_ratio",
+    "pcr_window", "flow_bias", "underlying_ltp", "ce_wall", "pe_wall", "max_pain",
+)
+BAR_FIELDS = ("entry_idx", "day")
+MINUTE_FIELDS = ("minute_close", "session_end_idx")
+
+# Worker-side shared arrays (set by _init_worker)
+_SHARED = {}
+
+
+def signal_params():
+    """Current live SignalEngine / exit settings as optimizer params."""
+    return {
+        "min_confidence": SignalEngine.MIN_CONFIDENCE,
+        "strike_mode": SignalEngine.STRIKE_MODE,
+        "target_delta": SignalEngine.TARGET_DELTA,
+        "stoploss_pct": om.STOPLOSS_PCT,
+        "target_pct": om.TARGET_PCT,
+        "trail_activate_pct": om.TRAIL_ACTIVATE_PCT,
+        "trail_pct": om.TRAIL_PCT,
+        "max_hold_minutes": om.MAX_HOLD_MINUTES,
+    }
+
+
+# ============================================================
+# Backtest (runs in worker processes)
+# ============================================================
+def _init_worker(shared_dir):
+    for name in SCORE_FIELDS + BAR_FIELDS + MINUTE_FIELDS:
+        _SHARED[name] = np.load(os.path.join(shared_dir, f"{name}.npy"), mmap_mode="r")
+
+
+def _strike(spot, is_call, p, T):
+    atm = np.round(spot / STRIKE_STEP) * STRIKE_STEP
+    mode = p["strike_mode"]
+    # Same strikes as live: the parser's OTM / ITM are the next strike
+    # above / below ATM for both legs
+    if mode == "OTM":
+        return atm + STRIKE_STEP
+    if mode == "ITM":
+        return atm - STRIKE_STEP
+    if mode == "DELTA":
+        strikes = atm + STRIKE_STEP * np.arange(-DELTA_SEARCH_STEPS, DELTA_SEARCH_STEPS + 1)
+        delta = GreeksEngine.greeks(spot, strikes, T, PROXY_IV, RISK_FREE_RATE, is_call)["delta"]
+        return strikes[np.argmin(np.abs(np.abs(delta) - p["target_delta"]))]
+    return atm
+
+
+def _simulate_trade(start, end, is_call, p):
+    """
+    Walk one trade over 1m closes [start, end]; same SL / trailing /
+    target order as ExitEngine.evaluate. Returns (exit_idx, pnl_pct, reason).
+    """
+    closes = np.asarray(_SHARED["minute_close"][start:end + 1], dtype=float)
+    elapsed = np.arange(len(closes)) * 60.0
+    T = PROXY_DAYS_TO_EXPIRY * 86400.0 / SECONDS_PER_YEAR - elapsed / SECONDS_PER_YEAR
+
+    strike = _strike(closes[0], is_call, p, T[0])
+    premium = GreeksEngine.bs_price(closes, strike, T, PROXY_IV, RISK_FREE_RATE, is_call)
+    entry = premium[0]
+
+    initial_sl = entry * (1 - p["stoploss_pct"] / 100)
+    target = entry * (1 + p["target_pct"] / 100)
+    peak = np.maximum.accumulate(premium)
+    trailing = peak >= entry * (1 + p["trail_activate_pct"] / 100)
+    sl = np.where(trailing, np.maximum(initial_sl, peak * (1 - p["trail_pct"] / 100)), initial_sl)
+
+    hit = np.flatnonzero((premium[1:] <= sl[1:]) | (premium[1:] >= target)) + 1
+    if len(hit):
+        i = hit[0]
+        if premium[i] <= sl[i]:
+            reason = "TRAIL_SL" if sl[i] > initial_sl else "SL"
+        else:
+            reason = "TARGET"
+    else:
+        i = len(premium) - 1
+        reason = "TIME"
+    return start + i, (premium[i] / entry - 1) * 100, reason
+
+
+def backtest(params):
+    """
+    Run one parameter set over the shared arrays.
+    Returns a DataFrame of trades (day, entry_idx, exit_idx, pnl_pct, reason).
+    """
+    p = dict(signal_params(), **params)
+    weights = {k: p.get(k, v) for k, v in PredictionEngine.WEIGHTS.items()}
+
+    f = {name: _SHARED[name] for name in SCORE_FIELDS}
+    score = PredictionEngine.score_arrays(f, weights)
+    confidence = np.minimum(np.abs(score), 100)
+    tradable = (np.abs(score) >= weights["direction_threshold"]) & (confidence >= p["min_confidence"])
+
+    entry_idx = _SHARED["entry_idx"]
+    session_end = _SHARED["session_end_idx"]
+    day = _SHARED["day"]
+    max_hold = p["max_hold_minutes"]
+
+    trades = []
+    free_from = -1
+    for bar in np.flatnonzero(tradable):
+        start = int(entry_idx[bar])
+        if start <= free_from or start < 0:
+            continue
+        end = int(session_end[start])
+        if max_hold:
+            end = min(end, start + max_hold)
+        if end <= start:
+            continue
+        exit_idx, pnl, reason = _simulate_trade(start, end, score[bar] > 0, p)
+        trades.append((int(day[bar]), start, exit_idx, pnl, reason))
+        free_from = exit_idx
+
+    return pd.DataFrame(trades, columns=["day", "entry_idx", "exit_idx", "pnl_pct", "reason"])
+
+
+def _metrics(pnl):
+    pnl = np.asarray(pnl, dtype=float)
+    if not len(pnl):
+        return {"trades": 0, "win_rate": 0.0, "total_pnl_pct": 0.0, "avg_pnl_pct": 0.0,
+                "profit_factor": 0.0, "max_drawdown_pct": 0.0}
+    equity = np.cumsum(pnl)
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0)) - equity
+    losses = -pnl[pnl < 0].sum()
+    return {
+        "trades": len(pnl),
+        "win_rate": float((pnl > 0).mean()),
+        "total_pnl_pct": float(pnl.sum()),
+        "avg_pnl_pct": float(pnl.mean()),
+        "profit_factor": float(pnl[pnl > 0].sum() / losses) if losses > 0 else float("inf"),
+        "max_drawdown_pct": float(drawdown.max()),
+    }
+
+
+def _evaluate(params, folds):
+    trades = backtest(params)
+    row = dict(params)
+    row.update({f"all_{k}": v for k, v in _metrics(trades["pnl_pct"]).items()})
+    for i, (train_days, test_days) in enumerate(folds):
+        for part, days in (("train", train_days), ("test", test_days)):
+            in_part = trades["day"].between(days[0], days[1])
+            for k, v in _metrics(trades.loc[in_part, "pnl_pct"]).items():
+                row[f"fold{i}_{part}_{k}"] = v
+    return row
+
+
+def _evaluate_batch(batch, folds):
+    return [_evaluate(params, folds) for params in batch]
+
+
+# ============================================================
+# Sweep driver
+# ============================================================
+class ParameterSweep:
+
+    # ------------------------------------------------------------
+    # Shared arrays (computed once in the parent)
+    # ------------------------------------------------------------
+    @staticmethod
+    def prepare(start, end, shared_dir):
+        """
+        Load history, compute indicators once and write every array the
+        backtest needs as .npy into shared_dir. Returns the trading days.
+        """
+        df_1m = HistoryLoader.load(start, end, include_today=False)
+        bars = FeatureBuilder.aligned(df_1m, OIAnalytics.load_archive(start, end))
+
+        minutes = df_1m.sort_values("timestamp").reset_index(drop=True)
+        minute_ts = minutes["timestamp"].to_numpy(dtype="datetime64[ns]")
+        minute_day = minutes["timestamp"].dt.normalize().to_numpy(dtype="datetime64[ns]")
+
+        # Last bar before square-off, per minute
+        minute_time = minutes["timestamp"].dt.strftime("%H:%M").to_numpy()
+        live = minute_time < om.SQUARE_OFF_TIME
+        session_end = np.empty(len(minutes), dtype=np.int64)
+        for d in np.unique(minute_day):
+            idx = np.flatnonzero((minute_day == d) & live)
+            day_idx = np.flatnonzero(minute_day == d)
+            session_end[day_idx] = idx[-1] if len(idx) else day_idx[0]
+
+        # Entry at the first 1m bar opening once the 5m bar has closed
+        bar_day = bars["timestamp"].dt.normalize().to_numpy(dtype="datetime64[ns]")
+        entry_idx = np.searchsorted(minute_ts, bars["available_at"].to_numpy(dtype="datetime64[ns]"))
+        in_range = entry_idx < len(minute_ts)
+        same_day = in_range & (minute_day[np.minimum(entry_idx, len(minute_ts) - 1)] == bar_day)
+        entry_idx = np.where(same_day, entry_idx, -1)
+
+        days = np.unique(minute_day)
+        arrays = {
+            "trend_5m": bars["trend_bias"].astype(str).map(TREND_CODE).to_numpy(dtype=float),
+            "trend_15m": bars["trend_bias_15m"].astype(str).map(TREND_CODE).to_numpy(dtype=float),
+            "entry_idx": entry_idx.astype(np.int64),
+            "day": np.searchsorted(days, bar_day),
+            "minute_close": minutes["close"].to_numpy(dtype=float),
+            "session_end_idx": session_end,
+        }
+        for name in ("ema_9", "ema_20", "ema_50", "rsi", "volume_ratio"):
+            arrays[name] = bars[name].to_numpy(dtype=float)
+        for name in ("pcr_window", "flow_bias", "ce_wall", "pe_wall", "max_pain"):
+            arrays[name] = bars[name].to_numpy(dtype=float) if name in bars else np.full(len(bars), np.nan)
+        ltp = bars["underlying_ltp"] if "underlying_ltp" in bars else bars["close"]
+        arrays["underlying_ltp"] = ltp.fillna(bars["close"]).to_numpy(dtype=float)
+
+        os.makedirs(shared_dir, exist_ok=True)
+        for name, arr in arrays.items():
+            np.save(os.path.join(shared_dir, f"{name}.npy"), arr)
+
+        log.info("{} 5m bars, {} 1m bars, {} days", len(bars), len(minutes), len(days))
+        return days
+
+    # ------------------------------------------------------------
+    # Search space / splits
+    # ------------------------------------------------------------
+    @staticmethod
+    def candidates(grid=None, samples=None, seed=0):
+        """Full grid, or `samples` random points from it."""
+        grid = grid or PARAM_GRID
+        keys = list(grid)
+        if samples is None:
+            return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+        rng = random.Random(seed)
+        seen = set()
+        total = int(np.prod([len(v) for v in grid.values()]))
+        while len(seen) < min(samples, total):
+            seen.add(tuple(rng.randrange(len(grid[k])) for k in keys))
+        return [{k: grid[k][i] for k, i in zip(keys, point)} for point in sorted(seen)]
+
+    @staticmethod
+    def walk_forward_folds(n_days, n_splits):
+        """
+        Expanding-window folds over day numbers: train on blocks[0..i],
+        test on block i+1. Returns [((train_lo, train_hi), (test_lo, test_hi))].
+        """
+        edges = np.linspace(0, n_days, n_splits + 2).astype(int)
+        return [
+            ((0, int(edges[i + 1]) - 1), (int(edges[i + 1]), int(edges[i + 2]) - 1))
+            for i in range(n_splits)
+        ]
+
+    # ------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------
+    @staticmethod
+    def run(start, end=None, grid=None, samples=None, n_splits=3, workers=OPTIMIZER_WORKERS):
+        """
+        Backtest every candidate in a process pool.
+
+        Returns (results, walk_forward):
+        results      one row per parameter set, ranked by RANK_METRIC
+                     (mean over folds of the out-of-sample test window)
+        walk_forward per fold, the best train-window params and how they
+                     did on the following test window
+        """
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        shared_dir = os.path.join(OPTIMIZER_DIR, f"shared_{stamp}")
+        days = ParameterSweep.prepare(start, end, shared_dir)
+        folds = ParameterSweep.walk_forward_folds(len(days), n_splits)
+        params = ParameterSweep.candidates(grid, samples)
+        batches = [params[i:i + OPTIMIZER_BATCH] for i in range(0, len(params), OPTIMIZER_BATCH)]
+        log.info("{} parameter sets, {} folds, {} workers", len(params), len(folds), workers)
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(shared_dir,)
+            ) as pool:
+                rows = [row for batch in pool.map(_evaluate_batch, batches, itertools.repeat(folds))
+                        for row in batch]
+        finally:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
+        results = pd.DataFrame(rows)
+        for part in ("train", "test"):
+            for metric in ("total_pnl_pct", "win_rate", "max_drawdown_pct", "trades"):
+                cols = [f"fold{i}_{part}_{metric}" for i in range(len(folds))]
+                results[f"{part}_{metric}"] = results[cols].mean(axis=1)
+        results = results.sort_values(
+            [RANK_METRIC, "test_max_drawdown_pct"], ascending=[False, True]
+        ).reset_index(drop=True)
+
+        walk_forward = []
+        for i, (train_days, test_days) in enumerate(folds):
+            best = results.loc[results[f"fold{i}_train_total_pnl_pct"].idxmax()]
+            walk_forward.append({
+                "fold": i,
+                "train_from": str(pd.Timestamp(days[train_days[0]]).date()),
+                "test_from": str(pd.Timestamp(days[test_days[0]]).date()),
+                "test_to": str(pd.Timestamp(days[test_days[1]]).date()),
+                **{k: best[k] for k in params[0]},
+                "train_total_pnl_pct": best[f"fold{i}_train_total_pnl_pct"],
+                "test_total_pnl_pct": best[f"fold{i}_test_total_pnl_pct"],
+                "test_trades": best[f"fold{i}_test_trades"],
+            })
+        walk_forward = pd.DataFrame(walk_forward)
+
+        os.makedirs(OPTIMIZER_DIR, exist_ok=True)
+        results.to_csv(os.path.join(OPTIMIZER_DIR, f"sweep_{stamp}.csv"), index=False)
+        walk_forward.to_csv(os.path.join(OPTIMIZER_DIR, f"walkforward_{stamp}.csv"), index=False)
+        log.info("Results saved to {}/sweep_{}.csv", OPTIMIZER_DIR, stamp)
+        return results, walk_forward
+
+
+# ------------------------------------------------------------------
+# Local test
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    from datetime import timedelta
+
+    end = datetime.now() - timedelta(days=1)
+    results, walk_forward = ParameterSweep.run(end - timedelta(days=120), end, samples=200)
+    print(results.head(10))
+    print(walk_forward)
@@ -8,23 +8,66 @@ and provides structured outputs:
 - ATM strike
 - CE / PE extraction
 - Distance-based strike selection (OTM/ITM)
+- Delta-based strike selection (via greeks_engine)
+- OI / LTP changes since last poll, day start and 5m / 15m (via chain_history)
+- Per-strike change set vs the previous snapshot (via chain_diff)
+- Intraday state kept per expiry, so primary-expiry rollovers don't reset it
+- Term structure (ATM IV, OI, PCR) across the tracked expiries
 - Clean DataFrame version for analytics
 """
-from backend.config import OI_STRIKE_RANGE  
+from backend.config import OI_STRIKE_RANGE, CHAIN_CHANGE_HORIZONS
 from backend.data_fetcher import DATA_CACHE, CACHE_LOCK
+from backend.greeks_engine import GreeksEngine
+from backend.chain_history import ChainHistory
+from backend.chain_diff import ChainDiff
+from backend.schema import DataSchema
+from backend.metrics import COMPUTE_DURATION, CHAIN_CHANGED
+from backend.push_api import state_hub, snapshot_view
+from backend.logger import get_logger, log_throttled
+import numpy as np
 import pandas as pd
-PREV_OPTION_DF = None
-DAY_START_OPTION_DF = None
-PREV_EXPIRY = None
-SESSION_DATE = None
+
+log = get_logger("OptionChainParser")
+
+# expiry -> {"history": ChainHistory, "diff": ChainDiff, "cache": {"key", "result"}}
+CHAIN_STATES = {}
 
 class OptionChainParser:
 
     @staticmethod
-    def get_raw_chain():
-        """Return raw option chain JSON from DATA_CACHE."""
+    def get_raw_chain(expiry=None):
+        """Return raw option chain JSON from DATA_CACHE (primary expiry by default)."""
+        return OptionChainParser._snapshot(expiry)[0]
+
+    @staticmethod
+    def _snapshot(expiry=None):
+        """(raw chain, snapshot timestamp, expiry) for one expiry, read atomically."""
         with CACHE_LOCK:
-            return DATA_CACHE.get("option_chain")
+            if expiry is None:
+                return (
+                    DATA_CACHE.get("option_chain"),
+                    DATA_CACHE.get("option_chain_timestamp"),
+                    DATA_CACHE.get("option_chain_expiry"),
+                )
+            entry = DATA_CACHE["option_chains"].get(expiry)
+            if not entry:
+                return None, None, expiry
+            return entry["chain"], entry["timestamp"], expiry
+
+    @staticmethod
+    def state(expiry):
+        """Intraday parser state of an expiry (created on first use; expired ones dropped)."""
+        state = CHAIN_STATES.get(expiry)
+        if state is None:
+            today = pd.Timestamp.now(tz="Asia/Kolkata").date().isoformat()
+            for old in [e for e in CHAIN_STATES if e and str(e)[:10] < today]:
+                del CHAIN_STATES[old]
+            state = CHAIN_STATES[expiry] = {
+                "history": ChainHistory(),
+                "diff": ChainDiff(),
+                "cache": {"key": None, "result": None},
+            }
+        return state
 
     @staticmethod
     def _first_present(item, keys):
@@ -43,13 +86,13 @@ class OptionChainParser:
             raw_chain = OptionChainParser.get_raw_chain()
 
         if not raw_chain:
-            print("[OptionChainParser] No valid option chain found.")
+            log_throttled(log, "WARNING", "No valid option chain found.")
             return None
 
         # Some callers store the whole response, others only response["data"].
         chain_data = raw_chain.get("data", raw_chain)
         if not chain_data:
-            print("[OptionChainParser] No valid option chain found.")
+            log_throttled(log, "WARNING", "No valid option chain found.")
             return None
 
         ce_list = []
@@ -127,7 +170,7 @@ class OptionChainParser:
         numeric_cols = [c for c in df.columns if c not in ("strike", "ce_security_id", "pe_security_id")]
         df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors="coerce")
 
-        return df.reset_index(drop=True)
+        return DataSchema.apply_chain(df.reset_index(drop=True))
     
     @staticmethod
     def get_atm_window(df, atm_strike, window=3):
@@ -177,23 +220,35 @@ class OptionChainParser:
         return None
 
     @staticmethod
-    def parse(underlying_ltp=None):
+    def get_strike_by_delta(df, option_type, target_delta):
+        """
+        Return the row whose |delta| for the given leg is closest to target_delta.
+        Requires Greeks columns (see GreeksEngine.enrich).
+        """
+        col = "ce_delta" if option_type == "CE" else "pe_delta"
+        if col not in df.columns:
+            return None
+
+        distance = (df[col].abs() - abs(target_delta)).abs()
+        if distance.isna().all():
+            return None
+
+        return df.loc[distance.idxmin()]
+
+    @staticmethod
+    @COMPUTE_DURATION.timed(stage="parse")
+    def parse(underlying_ltp=None, expiry=None):
         """
         Convenience helper:
         - Convert chain to DataFrame
         - Find ATM
         - Find 1-step OTM and ITM
-        """
-        global PREV_OPTION_DF, DAY_START_OPTION_DF, PREV_EXPIRY, SESSION_DATE
 
-        raw = OptionChainParser.get_raw_chain()
+        expiry: one of the fetched expiries; the primary chain when omitted.
+        """
+        raw, snapshot_ts, cached_expiry = OptionChainParser._snapshot(expiry)
         if not raw:
-            print("[OptionChainParser] No option chain cached.")
-            return None
-
-        df = OptionChainParser.to_dataframe(raw)
-
-        if df is None:
+            log_throttled(log, "WARNING", "No option chain cached.")
             return None
 
         # If LTP not passed, try from data_fetcher stored chain
@@ -204,72 +259,76 @@ class OptionChainParser:
             except AttributeError:
                 underlying_ltp = None
 
+        chain_data = raw.get("data", raw)
+        current_expiry = chain_data.get("expiry") or cached_expiry
+        state = OptionChainParser.state(current_expiry)
+        history, diff, cache = state["history"], state["diff"], state["cache"]
+
+        # Parse each snapshot once: repeated calls (dashboard, prediction,
+        # signal) must not advance the intraday baselines.
+        cache_key = (snapshot_ts, underlying_ltp)
+        if snapshot_ts is not None and cache["key"] == cache_key:
+            return cache["result"]
+
+        df = OptionChainParser.to_dataframe(raw)
+
+        if df is None:
+            return None
+
         if underlying_ltp is None:
-            print("[OptionChainParser] underlying_ltp unavailable.")
+            log_throttled(log, "WARNING", "underlying_ltp unavailable.")
             return df
 
         atm = OptionChainParser.get_atm(df, underlying_ltp)
         if atm is None:
-            print("[OptionChainParser] Unable to locate ATM strike.")
+            log_throttled(log, "WARNING", "Unable to locate ATM strike.")
             return None
         otm = OptionChainParser.get_strike_offset(df, atm, +1)
         itm = OptionChainParser.get_strike_offset(df, atm, -1)
         df = df.sort_values("strike").reset_index(drop=True)
-        chain_data = raw.get("data", raw)
-        current_expiry = chain_data.get("expiry")
         current_session_date = pd.Timestamp.now(tz="Asia/Kolkata").date()
 
-        # Reset on expiry/day change
-        if PREV_EXPIRY != current_expiry or SESSION_DATE != current_session_date:
-            PREV_OPTION_DF = None
-            DAY_START_OPTION_DF = None
-            PREV_EXPIRY = current_expiry
-            SESSION_DATE = current_session_date
-
-        # First snapshot of the day for day-level intraday deltas.
-        if DAY_START_OPTION_DF is None:
-            DAY_START_OPTION_DF = df.copy()
-
-        # -------------------------------
-        # SNAPSHOT-INTRADAY CHANGE
-        # -------------------------------
-        df_indexed = df.set_index("strike")
-        if PREV_OPTION_DF is not None:
-            prev = PREV_OPTION_DF.set_index("strike")
-            df["ce_oi_intraday_change"] = (
-                (df_indexed["ce_oi"] - prev["ce_oi"]).fillna(0).values
-            )
-            df["pe_oi_intraday_change"] = (
-                (df_indexed["pe_oi"] - prev["pe_oi"]).fillna(0).values
-            )
-            df["ce_ltp_intraday_change"] = (
-                (df_indexed["ce_ltp"] - prev["ce_ltp"]).fillna(0).values
-            )
-            df["pe_ltp_intraday_change"] = (
-                (df_indexed["pe_ltp"] - prev["pe_ltp"]).fillna(0).values
-            )
-        else:
-            df["ce_oi_intraday_change"] = 0
-            df["pe_oi_intraday_change"] = 0
-            df["ce_ltp_intraday_change"] = 0
-            df["pe_ltp_intraday_change"] = 0
-
-        # -------------------------------
-        # DAILY INTRADAY CHANGE
-        # -------------------------------
-        day_start = DAY_START_OPTION_DF.set_index("strike")
-        df["ce_oi_daily_intraday_change"] = (
-            (df_indexed["ce_oi"] - day_start["ce_oi"]).fillna(0).values
-        )
-        df["pe_oi_daily_intraday_change"] = (
-            (df_indexed["pe_oi"] - day_start["pe_oi"]).fillna(0).values
-        )
-        df["ce_ltp_daily_intraday_change"] = (
-            (df_indexed["ce_ltp"] - day_start["ce_ltp"]).fillna(0).values
-        )
-        df["pe_ltp_daily_intraday_change"] = (
-            (df_indexed["pe_ltp"] - day_start["pe_ltp"]).fillna(0).values
+        # Reset on day change (state is per expiry already)
+        if history.needs_reset(current_expiry, current_session_date):
+            history.reset(current_expiry, current_session_date)
+            diff.reset()
+
+        # Which strikes moved since the previous snapshot; downstream
+        # stages recompute only those rows (or skip when nothing moved).
+        strikes = df["strike"].to_numpy(dtype=float)
+        changes = diff.update(
+            strikes,
+            {field: df[field].to_numpy(dtype=float) for field in ChainDiff.FIELDS},
+            underlying_ltp
         )
+        CHAIN_CHANGED.set(changes["count"])
+
+        # Record snapshot; first one of the day is the daily baseline.
+        # OI of an absent leg is stored as 0 by the schema; history keeps
+        # it as NaN so it doesn't show up as a fake unwinding.
+        values = {field: df[field].to_numpy(dtype=float) for field in ChainHistory.FIELDS}
+        for leg in ("ce", "pe"):
+            values[f"{leg}_oi"][np.isnan(values[f"{leg}_ltp"])] = np.nan
+
+        snapshot_epoch = (snapshot_ts or pd.Timestamp.now()).timestamp()
+        cols = history.push(snapshot_epoch, strikes, values)
+
+        for field in ChainHistory.FIELDS:
+            # -------------------------------
+            # SNAPSHOT-INTRADAY CHANGE
+            # -------------------------------
+            df[f"{field}_intraday_change"] = history.change_since_prev(field, cols)
+
+            # -------------------------------
+            # DAILY INTRADAY CHANGE
+            # -------------------------------
+            df[f"{field}_daily_intraday_change"] = history.change_since_day_start(field, cols)
+
+            # -------------------------------
+            # HORIZON CHANGE (e.g. 5m / 15m buildup)
+            # -------------------------------
+            for label, seconds in CHAIN_CHANGE_HORIZONS.items():
+                df[f"{field}_change_{label}"] = history.change_over(field, cols, seconds)
 
         # -------------------------------
         # OVERALL CHANGE FROM PREVIOUS DAY
@@ -291,19 +350,76 @@ class OptionChainParser:
             (df["pe_ltp"] - df["pe_prev_close"]).where(df["pe_prev_close"].notna(), df["pe_ltp_daily_intraday_change"])
         )
 
+        # -------------------------------
+        # IV / GREEKS
+        # -------------------------------
+        df = GreeksEngine.enrich(
+            df,
+            underlying_ltp,
+            current_expiry,
+            snapshot_key=snapshot_ts,
+            changes=changes
+        )
+        df = DataSchema.apply_chain(df)
+
         atm_window = OptionChainParser.get_atm_window(
             df,
             atm["strike"],
             window=OI_STRIKE_RANGE
         )
 
-        # Save snapshot
-        PREV_OPTION_DF = df.copy()           
-        return {
+        result = {
             "df": df,
             "atm": atm,
             "otm": otm,
             "itm": itm,
             "atm_strike": atm["strike"],
             "window_df": atm_window,
+            "underlying_ltp": underlying_ltp,
+            "snapshot_ts": snapshot_ts,
+            "expiry": current_expiry,
+            "changes": changes,
         }
+        cache["key"] = cache_key
+        cache["result"] = result
+        if expiry is None:
+            state_hub.publish("snapshot", lambda: snapshot_view(result))
+        return result
+
+    # ------------------------------------------------------------
+    # Term structure
+    # ------------------------------------------------------------
+    @staticmethod
+    def term_structure():
+        """
+        One row per fetched expiry (nearest first): ATM strike, ATM CE / PE
+        IV, total OI and PCR. Each expiry is parsed once per snapshot.
+        """
+        with CACHE_LOCK:
+            labels = dict(DATA_CACHE["expiries"])
+        rows = []
+        for label, expiry in labels.items():
+            parsed = OptionChainParser.parse(expiry=expiry)
+            if not isinstance(parsed, dict):
+                continue
+            df = parsed["df"]
+            atm = df.loc[df["strike"] == parsed["atm_strike"]].iloc[0]
+            ce_oi = float(np.nansum(df["ce_oi"].to_numpy(dtype=float)))
+            pe_oi = float(np.nansum(df["pe_oi"].to_numpy(dtype=float)))
+            ivs = [float(atm.get(f"{leg}_iv", np.nan)) for leg in ("ce", "pe")]
+            T = GreeksEngine.time_to_expiry(expiry)
+            rows.append({
+                "label": label,
+                "expiry": expiry,
+                "days_to_expiry": T * 365 if T is not None else np.nan,
+                "underlying_ltp": parsed["underlying_ltp"],
+                "atm_strike": parsed["atm_strike"],
+                "atm_ce_iv": ivs[0],
+                "atm_pe_iv": ivs[1],
+                "atm_iv": np.nan if np.isnan(ivs).all() else float(np.nanmean(ivs)),
+                "ce_oi": ce_oi,
+                "pe_oi": pe_oi,
+                "pcr": pe_oi / ce_oi if ce_oi > 0 else np.nan,
+                "snapshot_ts": parsed["snapshot_ts"],
+            })
+        return pd.DataFrame(rows).sort_values("expiry").reset_index(drop=True) if rows else pd.DataFrame()
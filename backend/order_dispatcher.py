@@ -0,0 +1,304 @@
+"""
+Order Dispatcher
+----------------
+
+Responsibilities:
+- Take broker calls off the caller's thread (Streamlit / price callbacks)
+- Run dhan.place_order on dedicated worker threads
+- Tag every order with a client-side correlation id (idempotency)
+- Retry failed orders with bounded exponential backoff (exits)
+- Look orders up by tag without sending (resolving failed / restored
+  orders)
+- Report the outcome through completion callbacks
+"""
+
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from backend.config import dhan
+from backend.metrics import dhan_call, ORDER_RTT, ORDER_RESULTS
+from backend.logger import get_logger
+
+log = get_logger("OrderDispatcher")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+ORDER_WORKERS = 2
+ENTRY_MAX_RETRIES = 0            # never chase a stale entry
+EXIT_MAX_RETRIES = 4             # exits must go through
+RETRY_BACKOFF_SEC = 0.5          # doubled on each retry
+RETRY_BACKOFF_MAX_SEC = 4.0
+COMPLETED_TAGS_KEPT = 500
+ORDER_NOT_FOUND_CODES = ("DH-907",)   # Dhan "no data" error: nothing placed under the tag
+DEAD_STATUSES = ("REJECTED", "CANCELLED")
+
+# find_by_tag result when the broker could not be asked (API / network
+# failure): the order may or may not exist, so it must not be resent
+ORDER_UNKNOWN = object()
+
+# Result errors of lookup() requests
+ORDER_NOT_FOUND = "order not found"
+LOOKUP_FAILED = "order lookup failed"
+
+
+class OrderDispatcher:
+
+    def __init__(self, workers=ORDER_WORKERS):
+        self.workers = workers
+        self.queue = queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+        self.inflight = {}                 # tag -> request
+        self.completed = OrderedDict()     # tag -> result (bounded)
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    def start(self):
+        with self.lock:
+            if self.threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(
+                    target=self._run_loop,
+                    name=f"order-worker-{i}",
+                    daemon=True
+                )
+                t.start()
+                self.threads.append(t)
+        log.info("Started ({} workers)", self.workers)
+
+    def stop(self):
+        with self.lock:
+            threads, self.threads = self.threads, []
+        for _ in threads:
+            self.queue.put(None)
+        log.info("Stopped")
+
+    @staticmethod
+    def new_tag(kind):
+        """Correlation id, unique per logical order (<= 25 chars)."""
+        return f"{kind[:2]}{uuid.uuid4().hex[:20]}"
+
+    # ------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------
+    def submit(self, order, kind="ENTRY", callback=None, tag=None, max_retries=None, resend=False, lookup=False):
+        """
+        Queue an order and return its tag immediately.
+
+        order: dhan.place_order keyword arguments (without tag)
+        kind: ENTRY / EXIT
+        callback: fn(result) called on a worker thread when done
+        tag: re-use to make resubmission idempotent
+        resend: the tag may already have reached the broker (re-armed or
+        restored order); look it up before the first send. Implied when
+        the tag is in the completed map.
+        lookup: only look the tag up, never send (see lookup())
+        """
+        if not self.threads:
+            self.start()
+
+        tag = tag or OrderDispatcher.new_tag(kind)
+        if max_retries is None:
+            max_retries = EXIT_MAX_RETRIES if kind == "EXIT" else ENTRY_MAX_RETRIES
+
+        with self.lock:
+            if tag in self.inflight:
+                return tag
+            # a lookup always asks the broker: the order may have moved on
+            done = None if lookup else self.completed.get(tag)
+            if done is None or not done["ok"]:
+                resend = resend or done is not None
+                done = None
+                request = {
+                    "tag": tag,
+                    "kind": kind,
+                    "order": dict(order) if order else None,
+                    "callback": callback,
+                    "max_retries": max_retries,
+                    "resend": resend,
+                    "lookup": lookup,
+                    "queued_at": datetime.now(),
+                }
+                self.inflight[tag] = request
+
+        if done is not None:
+            # already filled under this tag: replay the result, don't resend
+            if callback:
+                callback(done)
+            return tag
+
+        self.queue.put(request)
+        return tag
+
+    def lookup(self, tag, kind="ENTRY", callback=None, delay=0.0):
+        """
+        Queue a broker lookup of `tag` on the workers; nothing is sent.
+        callback(result): ok=True with the live order as response, or
+        ok=False with error ORDER_NOT_FOUND / LOOKUP_FAILED (broker could
+        not be asked within the retry budget).
+        delay: seconds to wait before queueing (periodic re-checks).
+        """
+        if delay > 0:
+            timer = threading.Timer(delay, self.lookup, (tag, kind, callback))
+            timer.daemon = True
+            timer.start()
+            return tag
+        return self.submit(None, kind=kind, callback=callback, tag=tag, max_retries=EXIT_MAX_RETRIES, lookup=True)
+
+    def pending(self):
+        with self.lock:
+            return len(self.inflight)
+
+    # ------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------
+    def _run_loop(self):
+        while True:
+            request = self.queue.get()
+            if request is None:
+                return
+            try:
+                result = self._execute(request)
+            except Exception as e:
+                result = self._result(request, False, None, 0, str(e))
+
+            with self.lock:
+                self.inflight.pop(request["tag"], None)
+                if not request["lookup"]:
+                    self.completed[request["tag"]] = result
+                    while len(self.completed) > COMPLETED_TAGS_KEPT:
+                        self.completed.popitem(last=False)
+
+            ORDER_RTT.observe(
+                (result["completed_at"] - result["queued_at"]).total_seconds(),
+                kind=request["kind"]
+            )
+            ORDER_RESULTS.inc(kind=request["kind"], outcome="ok" if result["ok"] else "failed")
+
+            if request["callback"]:
+                try:
+                    request["callback"](result)
+                except Exception as e:
+                    log.exception("Callback ERROR ({}): {}", request["tag"], e)
+
+    def _execute(self, request):
+        if request["lookup"]:
+            return self._lookup(request)
+
+        tag = request["tag"]
+        attempt = 0
+        error = None
+        response = None
+        sent_at = None
+
+        while True:
+            attempt += 1
+
+            # An earlier attempt (or an earlier submit of this tag) may have
+            # reached the broker even though we saw an error; never send
+            # the same logical order twice, nor send while we can't tell.
+            existing = None
+            if attempt > 1 or request["resend"]:
+                existing = self.find_by_tag(tag)
+                if existing is ORDER_UNKNOWN:
+                    error = LOOKUP_FAILED
+                elif existing is not None:
+                    return self._result(request, True, existing, attempt, None)
+
+            if existing is not ORDER_UNKNOWN:
+                sent_at = datetime.now()
+                try:
+                    response = dhan_call("place_order", dhan.place_order, tag=tag, **request["order"])
+                    if isinstance(response, dict) and response.get("status") == "success":
+                        return self._result(request, True, response, attempt, None, sent_at)
+                    error = response.get("remarks") if isinstance(response, dict) else response
+                except Exception as e:
+                    error = str(e)
+
+            if attempt > request["max_retries"]:
+                log.error("{} {} failed after {} attempt(s): {}", request["kind"], tag, attempt, error)
+                return self._result(request, False, response, attempt, error, sent_at)
+
+            delay = min(RETRY_BACKOFF_SEC * 2 ** (attempt - 1), RETRY_BACKOFF_MAX_SEC)
+            log.warning("{} {} retry {} in {}s: {}", request["kind"], tag, attempt, delay, error)
+            time.sleep(delay)
+
+    def _lookup(self, request):
+        attempt = 0
+        while True:
+            attempt += 1
+            existing = self.find_by_tag(request["tag"])
+            if existing is None:
+                return self._result(request, False, None, attempt, ORDER_NOT_FOUND)
+            if existing is not ORDER_UNKNOWN:
+                return self._result(request, True, existing, attempt, None)
+            if attempt > request["max_retries"]:
+                return self._result(request, False, None, attempt, LOOKUP_FAILED)
+            time.sleep(min(RETRY_BACKOFF_SEC * 2 ** (attempt - 1), RETRY_BACKOFF_MAX_SEC))
+
+    @staticmethod
+    def find_by_tag(tag):
+        """
+        Live broker order placed under this correlation tag:
+        - {"status": "success", "data": order} when one exists (the first
+          one not REJECTED / CANCELLED: a reused tag can match several)
+        - None when the broker says there is none
+        - ORDER_UNKNOWN when the lookup itself failed
+        """
+        try:
+            response = dhan_call("get_order_by_correlation_id", dhan.get_order_by_correlationID, tag)
+        except Exception as e:
+            log.warning("Order lookup {} ERROR: {}", tag, e)
+            return ORDER_UNKNOWN
+        if not isinstance(response, dict):
+            return ORDER_UNKNOWN
+        if response.get("status") != "success":
+            remarks = response.get("remarks")
+            if isinstance(remarks, dict) and remarks.get("error_code") in ORDER_NOT_FOUND_CODES:
+                return None
+            log.warning("Order lookup {} failed: {}", tag, remarks)
+            return ORDER_UNKNOWN
+
+        data = response.get("data")
+        orders = data if isinstance(data, list) else [data]
+        for order in orders:
+            if order and order.get("orderStatus") not in DEAD_STATUSES:
+                return {"status": "success", "data": order}
+        return None
+
+    @staticmethod
+    def order_status(order_id):
+        """Broker order by id (status, fill price, filled qty), or None."""
+        response = dhan_call("get_order_by_id", dhan.get_order_by_id, order_id)
+        if not isinstance(response, dict) or response.get("status") != "success":
+            return None
+        data = response.get("data")
+        if isinstance(data, list):
+            data = data[0] if data else None
+        return data or None
+
+    @staticmethod
+    def _result(request, ok, response, attempts, error, sent_at=None):
+        return {
+            "tag": request["tag"],
+            "kind": request["kind"],
+            "ok": ok,
+            "response": response,
+            "attempts": attempts,
+            "error": error,
+            "queued_at": request["queued_at"],
+            "sent_at": sent_at,
+            "completed_at": datetime.now(),
+        }
+
+
+# Create singleton OrderDispatcher instance
+order_dispatcher = OrderDispatcher()
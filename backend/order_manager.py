@@ -3,202 +3,338 @@ Order Manager
 -------------
 
 Responsibilities:
-- Place orders using DhanHQ SDK
-- Manage SL & Target
-- Prevent duplicate trades
-- Log trades to local storage
+- Run the auto-entry tick as a stage graph (tick_pipeline): risk gate,
+  chain parse and multi-timeframe analysis concurrently, predict, strike
+  selection, submit; NO_TRADE ends the run early
+- Place orders using DhanHQ SDK (via order_dispatcher, non-blocking)
+- Hold SL / Target state (evaluated by exit_engine)
+- Prevent duplicate trades (via position_book limits)
+- Log trades to local storage (background writer, off the order workers)
 """
 
+import atexit
 import os
-from datetime import datetime
+import queue
+import threading
+
 import pandas as pd
 
-from backend.config import dhan
-from backend.signal_engine import SignalEngine
+from backend.config import market_now
 from backend.data_fetcher import DATA_CACHE, CACHE_LOCK
+from backend.signal_engine import SignalEngine
+from backend.option_chain_parser import OptionChainParser
+from backend.analysis_engine import AnalysisEngine
+from backend.prediction_engine import PredictionEngine
+from backend.pipeline import Pipeline, Stop
+from backend.position_book import position_book
+from backend.order_dispatcher import order_dispatcher, ORDER_NOT_FOUND
+from backend.execution_quality import execution_recorder
+from backend.instrument_master import instrument_master
+from backend.profiler import tick_profiler
+from backend.metrics import SIGNALS
+from backend.push_api import state_hub
+from backend.logger import get_logger, log_throttled
+
+log = get_logger("OrderManager")
 
 
 # ============================================================
 # Configuration (can move to config.py later)
 # ============================================================
-TRADE_QTY = 50                   # lot size
+TRADE_LOTS = 1                   # quantity = lots x lot size (instrument master)
 PRODUCT_TYPE = "INTRADAY"
 ORDER_TYPE = "MARKET"
 EXCHANGE_SEGMENT = "NFO"
 TRANSACTION_TYPE_BUY = "BUY"
 TRANSACTION_TYPE_SELL = "SELL"
+LOOKUP_RECHECK_SEC = 5           # re-ask the broker about an order it could not report
 
 STOPLOSS_PCT = 25                # % SL on option premium
 TARGET_PCT = 40                  # % target on option premium
+TRAIL_ACTIVATE_PCT = 15          # start trailing once premium is up this %
+TRAIL_PCT = 10                   # trail SL this % below the peak premium
+MAX_HOLD_MINUTES = 30            # time exit (0 disables)
+SQUARE_OFF_TIME = "15:15"        # exit everything after this time
 
 TRADE_LOG_PATH = "storage/trades.xlsx"
 
 
 class OrderManager:
 
-    active_trade = None   # holds current open trade (single trade model)
-
     # ------------------------------------------------------------
     # Entry point
     # ------------------------------------------------------------
     @staticmethod
+    @tick_profiler.profiled
     def process_signal(underlying_ltp):
         """
-        Main entry called from bot loop.
+        Main entry called from bot loop. Runs tick_pipeline; returns
+        the run (outcome, per-stage timings, skipped stages).
         """
-        if OrderManager.active_trade:
-            print("[OrderManager] Trade already active, skipping new entry.")
-            return
-
-        signal = SignalEngine.generate_signal(underlying_ltp)
+        return tick_pipeline.run(underlying_ltp=underlying_ltp)
 
+    @staticmethod
+    def _emit_signal(signal):
+        """Count / publish the tick's signal; NO_TRADE ends the pipeline."""
+        SIGNALS.inc(source="AUTO", outcome=signal["action"])
+        state_hub.publish("signal", signal)
         if signal["action"] == "NO_TRADE":
-            print("[OrderManager] NO_TRADE:", signal["reason"])
-            return
+            log.debug("NO_TRADE: {}", signal["reason"])
+            return Stop(signal)
+        return signal
 
-        OrderManager._place_entry(signal)
+    @staticmethod
+    def place_manual_entry(signal):
+        """
+        Entry from the UI. Shares the position book with the bot, so
+        manual and automatic positions never overwrite each other.
+        Returns (placed, message).
+        """
+        SIGNALS.inc(source="MANUAL", outcome=signal.get("action", "NO_TRADE"))
+        state_hub.publish("signal", signal)
+        if signal.get("action") == "NO_TRADE":
+            return False, signal.get("reason")
+
+        trade = OrderManager._place_entry(signal, source="MANUAL")
+        if trade is None:
+            return False, "Order not placed"
+        return True, f"{trade['symbol']} queued ({trade['entry_tag']})"
 
     # ------------------------------------------------------------
     # Place entry order
     # ------------------------------------------------------------
     @staticmethod
-    def _place_entry(signal):
+    def _order(security_id, transaction_type, quantity):
+        return {
+            "security_id": str(security_id),
+            "exchange_segment": EXCHANGE_SEGMENT,
+            "transaction_type": transaction_type,
+            "quantity": quantity,
+            "order_type": ORDER_TYPE,
+            "product_type": PRODUCT_TYPE,
+            "price": 0
+        }
+
+    @staticmethod
+    def _place_entry(signal, source="AUTO"):
         """
-        Places entry order based on signal.
+        Queue entry order based on signal. Returns the PENDING_ENTRY trade;
+        it becomes OPEN in _on_entry_result once the broker accepts.
+        The book slot is reserved first so concurrent entries cannot
+        exceed limits or double up on the same security_id.
+        Symbol and lot size come from the instrument master; unknown
+        contracts are never traded.
         """
         option_type = signal["option_type"]
         strike = signal["strike"]
-        security_id = signal["security_id"]
-
-        option_symbol = f"NIFTY {strike} {option_type}"
-
-        try:
-            print(f"[OrderManager] Placing order: {option_symbol}")
-
-            response = dhan.place_order(
-                security_id=str(security_id),
-                exchange_segment=EXCHANGE_SEGMENT,
-                transaction_type=TRANSACTION_TYPE_BUY,
-                quantity=TRADE_QTY,
-                order_type=ORDER_TYPE,
-                product_type=PRODUCT_TYPE
-            )
-
-            if not isinstance(response, dict) or response.get("status") != "success":
-                print("[OrderManager] Order failed:", response)
-                return
-
-            entry_price = response.get("data", {}).get("average_price", signal.get("option_ltp"))
-            if entry_price is None or float(entry_price) <= 0:
-                print("[OrderManager] Invalid entry price in response:", response)
-                return
-            entry_price = float(entry_price)
-
-            OrderManager.active_trade = {
-                "symbol": option_symbol,
-                "strike": strike,
-                "option_type": option_type,
-                "security_id": str(security_id),
-                "entry_price": entry_price,
-                "qty": TRADE_QTY,
-                "entry_time": datetime.now(),
-                "sl": entry_price * (1 - STOPLOSS_PCT / 100),
-                "target": entry_price * (1 + TARGET_PCT / 100)
-            }
-
-            OrderManager._log_trade("ENTRY", OrderManager.active_trade)
-
-            print("[OrderManager] Entry placed:", OrderManager.active_trade)
+        security_id = str(signal["security_id"])
+
+        if not instrument_master.ensure_loaded():
+            log_throttled(log, "ERROR", "Instrument master not loaded, order not placed")
+            return None
+        contract = instrument_master.contract(security_id)
+        if contract is None or contract["lot_size"] <= 0:
+            log.error("Unknown contract {} ({} {}), order not placed", security_id, strike, option_type)
+            return None
+        option_symbol = contract["symbol"]
+        quantity = TRADE_LOTS * contract["lot_size"]
+
+        trade = {
+            "symbol": option_symbol,
+            "strike": strike,
+            "option_type": option_type,
+            "security_id": security_id,
+            "source": source,
+            "status": "PENDING_ENTRY",
+            "entry_price": signal.get("option_ltp"),
+            "qty": quantity,
+            "entry_tag": order_dispatcher.new_tag("ENTRY"),
+            "exit_pending": False
+        }
+        if not position_book.add(trade):
+            return None
+
+        log.info("Placing order: {} ({})", option_symbol, source)
+        execution_recorder.on_decision(
+            trade["entry_tag"], "ENTRY", security_id, TRANSACTION_TYPE_BUY, quantity,
+            signal.get("option_ltp"), signal.get("option_bid"), signal.get("option_ask"),
+            order_type=ORDER_TYPE, reason=source
+        )
+        order_dispatcher.submit(
+            OrderManager._order(security_id, TRANSACTION_TYPE_BUY, quantity),
+            kind="ENTRY",
+            tag=trade["entry_tag"],
+            callback=lambda result: OrderManager._on_entry_result(trade, signal, result)
+        )
+        return trade
 
-        except Exception as e:
-            print("[OrderManager] Entry ERROR:", e)
+    @staticmethod
+    def _on_entry_result(trade, signal, result):
+        """Entry completion callback (order worker thread)."""
+        execution_recorder.on_result(result)
+        if not result["ok"]:
+            # a timed-out MARKET BUY may still have filled: ask before freeing the slot
+            log.error("Order failed: {}", result["error"])
+            OrderManager.resolve_entry(trade, signal)
+            return
+        OrderManager._open_entry(trade, signal, result["response"])
 
-    # ------------------------------------------------------------
-    # Monitor active trade
-    # ------------------------------------------------------------
     @staticmethod
-    def monitor_trade(current_option_ltp):
+    def resolve_entry(trade, signal=None, delay=0.0):
         """
-        Check SL / Target for active trade.
+        Settle a PENDING_ENTRY whose outcome is unknown (failed send,
+        restored checkpoint) by asking the broker for its entry tag.
+        The trade ends OPEN (order traded or still working) or discarded
+        (no order); while the broker can't be asked the slot is kept.
         """
-        if not OrderManager.active_trade:
+        signal = signal or {"option_ltp": trade.get("entry_price")}
+        order_dispatcher.lookup(
+            trade["entry_tag"],
+            kind="ENTRY",
+            callback=lambda result: OrderManager._on_entry_lookup(trade, signal, result),
+            delay=delay
+        )
+
+    @staticmethod
+    def _on_entry_lookup(trade, signal, result):
+        """resolve_entry callback (order worker thread)."""
+        if trade["status"] != "PENDING_ENTRY":
             return
+        if result["ok"]:
+            log.warning("Entry {} found at broker ({}), opening", trade["entry_tag"],
+                        result["response"]["data"].get("orderStatus"))
+            OrderManager._open_entry(trade, signal, result["response"])
+        elif result["error"] == ORDER_NOT_FOUND:
+            log.warning("Entry {} not found at broker, dropping", trade["entry_tag"])
+            position_book.discard(trade["security_id"])
+        else:
+            log_throttled(log, "WARNING", "Entry {} status unknown, slot kept: {}", trade["entry_tag"], result["error"])
+            OrderManager.resolve_entry(trade, signal, delay=LOOKUP_RECHECK_SEC)
 
-        trade = OrderManager.active_trade
+    @staticmethod
+    def _open_entry(trade, signal, response):
+        data = response.get("data") or {}
+        entry_price = data.get("averageTradedPrice") or data.get("average_price") or signal.get("option_ltp")
+        if entry_price is None or float(entry_price) <= 0:
+            log.error("Invalid entry price in response: {}", response)
+            position_book.discard(trade["security_id"])
+            return
+        entry_price = float(entry_price)
 
-        if current_option_ltp <= trade["sl"]:
-            print("[OrderManager] Stoploss hit")
-            OrderManager._exit_trade(current_option_ltp, "SL")
+        with position_book.lock:
+            trade.update({
+                "order_id": data.get("orderId"),
+                "entry_price": entry_price,
+                "entry_time": market_now(),
+                "sl": entry_price * (1 - STOPLOSS_PCT / 100),
+                "initial_sl": entry_price * (1 - STOPLOSS_PCT / 100),
+                "target": entry_price * (1 + TARGET_PCT / 100),
+                "peak": entry_price,
+                "status": "OPEN"
+            })
 
-        elif current_option_ltp >= trade["target"]:
-            print("[OrderManager] Target hit")
-            OrderManager._exit_trade(current_option_ltp, "TARGET")
+        log.info("Entry placed: {}", trade)
+        OrderManager._log_trade("ENTRY", trade)
 
     # ------------------------------------------------------------
     # Exit trade
     # ------------------------------------------------------------
     @staticmethod
-    def _exit_trade(exit_price, reason):
-        trade = OrderManager.active_trade
+    def exit_trade_async(trade, exit_price, reason):
+        """
+        Queue the exit order on the dispatcher so price callbacks and the
+        UI loop never wait on the broker. No-op if an exit is in flight.
+        The exit tag is fixed per trade and a re-armed exit looks it up at
+        the broker before sending, so it can never produce a second SELL.
+        """
+        with position_book.lock:
+            if trade.get("exit_pending") or trade["status"] != "OPEN":
+                return False
+            trade["exit_pending"] = True
+            rearmed = "exit_tag" in trade
+            trade.setdefault("exit_tag", order_dispatcher.new_tag("EXIT"))
+
+        execution_recorder.on_decision(
+            trade["exit_tag"], "EXIT", trade["security_id"], TRANSACTION_TYPE_SELL, trade["qty"],
+            exit_price, order_type=ORDER_TYPE, reason=reason
+        )
+        order_dispatcher.submit(
+            OrderManager._order(trade["security_id"], TRANSACTION_TYPE_SELL, trade["qty"]),
+            kind="EXIT",
+            tag=trade["exit_tag"],
+            callback=lambda result: OrderManager._on_exit_result(trade, exit_price, reason, result),
+            resend=rearmed
+        )
+        return True
 
-        try:
-            response = dhan.place_order(
-                security_id=str(trade["security_id"]),
-                exchange_segment=EXCHANGE_SEGMENT,
-                transaction_type=TRANSACTION_TYPE_SELL,
-                quantity=trade["qty"],
-                order_type=ORDER_TYPE,
-                product_type=PRODUCT_TYPE
-            )
-            if not isinstance(response, dict) or response.get("status") != "success":
-                print("[OrderManager] Exit order failed:", response)
-                return
+    @staticmethod
+    def _on_exit_result(trade, exit_price, reason, result):
+        """Exit completion callback (order worker thread)."""
+        execution_recorder.on_result(result)
+        if not result["ok"]:
+            log.error("Exit order failed: {}", result["error"])
+            with position_book.lock:
+                # allow the next price update to retry the exit
+                trade["exit_pending"] = False
+            return
 
+        with position_book.lock:
             trade["exit_price"] = exit_price
-            trade["exit_time"] = datetime.now()
+            trade["exit_time"] = market_now()
             trade["exit_reason"] = reason
             trade["pnl"] = (exit_price - trade["entry_price"]) * trade["qty"]
+            trade["status"] = "CLOSED"
+            position_book.close(trade["security_id"])
 
-            OrderManager._log_trade("EXIT", trade)
-
-            print("[OrderManager] Trade exited:", trade)
-
-        except Exception as e:
-            print("[OrderManager] Exit ERROR:", e)
-
-        finally:
-            if trade.get("exit_price") is not None:
-                OrderManager.active_trade = None
+        log.info("Trade exited: {}", trade)
+        OrderManager._log_trade("EXIT", trade)
 
     @staticmethod
-    def monitor_active_trade_from_chain():
+    def resolve_exit(trade, reason="RESTORED", delay=0.0):
         """
-        Pull current option LTP from cache and evaluate SL/Target.
+        Settle an exit_pending trade whose exit order outcome is unknown
+        (restored checkpoint): close it once the exit order is TRADED,
+        re-arm it if no order exists, and keep asking while the order is
+        still working or the broker can't be asked.
         """
-        if not OrderManager.active_trade:
-            return
-        with CACHE_LOCK:
-            chain = DATA_CACHE.get("option_chain")
-        if not chain:
+        if not trade.get("exit_tag"):
+            with position_book.lock:
+                trade["exit_pending"] = False
             return
+        order_dispatcher.lookup(
+            trade["exit_tag"],
+            kind="EXIT",
+            callback=lambda result: OrderManager._on_exit_lookup(trade, reason, result),
+            delay=delay
+        )
 
-        strike = OrderManager.active_trade["strike"]
-        option_type = OrderManager.active_trade["option_type"]
-        leg_key = "CE" if option_type == "CE" else "PE"
-        leg_list = chain.get(leg_key, [])
-
-        current_ltp = None
-        for item in leg_list:
-            if item.get("strike_price") == strike:
-                current_ltp = item.get("ltp")
-                break
-        if current_ltp is None:
+    @staticmethod
+    def _on_exit_lookup(trade, reason, result):
+        """resolve_exit callback (order worker thread)."""
+        if trade["status"] != "OPEN" or not trade.get("exit_pending"):
+            return
+        if result["error"] == ORDER_NOT_FOUND:
+            log.warning("Exit {} not found at broker, re-armed", trade["exit_tag"])
+            with position_book.lock:
+                trade["exit_pending"] = False
             return
+        order = result["response"]["data"] if result["ok"] else {}
+        if order.get("orderStatus") != "TRADED":
+            log_throttled(log, "WARNING", "Exit {} not settled ({}), checking again", trade["exit_tag"],
+                          order.get("orderStatus") or result["error"])
+            OrderManager.resolve_exit(trade, reason, delay=LOOKUP_RECHECK_SEC)
+            return
+        OrderManager._on_exit_result(trade, OrderManager._exit_price(trade, order), reason, result)
 
-        try:
-            OrderManager.monitor_trade(float(current_ltp))
-        except Exception as e:
-            print("[OrderManager] Monitor ERROR:", e)
+    @staticmethod
+    def _exit_price(trade, order):
+        """Broker fill price, else the last known LTP, else the entry price."""
+        price = order.get("averageTradedPrice")
+        if price and float(price) > 0:
+            return float(price)
+        with CACHE_LOCK:
+            quote = DATA_CACHE["option_ltp"].get(str(trade["security_id"])) or {}
+        return quote.get("ltp") or trade["entry_price"]
 
     # ------------------------------------------------------------
     # Trade logger
@@ -206,34 +342,154 @@ class OrderManager:
     @staticmethod
     def _log_trade(event_type, trade):
         """
-        Append trade details to Excel.
+        Queue trade details for the Excel log. Called from order callbacks:
+        never blocks on disk and never raises into order handling.
         """
-        os.makedirs(os.path.dirname(TRADE_LOG_PATH), exist_ok=True)
+        try:
+            row = {
+                "event": event_type,
+                "timestamp": market_now(),
+                "symbol": trade["symbol"],
+                "strike": trade["strike"],
+                "option_type": trade["option_type"],
+                "qty": trade["qty"],
+                "entry_price": trade.get("entry_price"),
+                "exit_price": trade.get("exit_price"),
+                "sl": trade.get("sl"),
+                "target": trade.get("target"),
+                "pnl": trade.get("pnl"),
+                "reason": trade.get("exit_reason")
+            }
+            trade_log_writer.put(row)
+        except Exception as e:
+            log.error("Trade log ERROR: {}", e)
 
-        row = {
-            "event": event_type,
-            "timestamp": datetime.now(),
-            "symbol": trade["symbol"],
-            "strike": trade["strike"],
-            "option_type": trade["option_type"],
-            "qty": trade["qty"],
-            "entry_price": trade.get("entry_price"),
-            "exit_price": trade.get("exit_price"),
-            "sl": trade.get("sl"),
-            "target": trade.get("target"),
-            "pnl": trade.get("pnl"),
-            "reason": trade.get("exit_reason")
-        }
 
-        df = pd.DataFrame([row])
+# ============================================================
+# Trade log writer
+# ============================================================
+class TradeLogWriter:
+    """
+    Appends queued trade rows to TRADE_LOG_PATH on one daemon thread.
+    Rows queued while a write runs go out together in the next one, so
+    the read / rewrite of the workbook is paid once per batch.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def put(self, row):
+        if self.thread is None:
+            self._start()
+        self.queue.put(row)
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="trade-log", daemon=True)
+                self.thread.start()
+
+    def close(self):
+        """Write what is queued, then stop the thread."""
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.queue.put(None)
+            thread.join(timeout=10)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            rows = [self.queue.get()]
+            while True:
+                try:
+                    rows.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in rows
+            rows = [row for row in rows if row is not None]
+            if not rows:
+                continue
+            try:
+                TradeLogWriter.append(rows)
+            except Exception as e:
+                log_throttled(log, "ERROR", "Trade log write ERROR: {}", e)
 
+    @staticmethod
+    def append(rows):
+        """Append rows to the Excel trade log (blocking)."""
+        os.makedirs(os.path.dirname(TRADE_LOG_PATH), exist_ok=True)
+        df = pd.DataFrame(rows)
         if os.path.exists(TRADE_LOG_PATH):
             existing = pd.read_excel(TRADE_LOG_PATH)
             df = pd.concat([existing, df], ignore_index=True)
-
         df.to_excel(TRADE_LOG_PATH, index=False)
 
 
+# Create singleton TradeLogWriter instance
+trade_log_writer = TradeLogWriter()
+atexit.register(trade_log_writer.close)
+
+
+# ============================================================
+# Tick pipeline
+# ============================================================
+#   risk ──────────────────────────────────────────┐
+#   parse ─────────┐                               │
+#   analyze ───────┴─ predict ─ decide ─ select ─ submit
+tick_pipeline = Pipeline("tick")
+
+
+@tick_pipeline.stage("risk", inline=True)
+def _stage_risk(ctx):
+    allowed, reason = position_book.can_open("AUTO")
+    if not allowed:
+        log_throttled(log, "INFO", "Skipping new entry: {}", reason, key=f"skip:{reason}")
+        SIGNALS.inc(source="AUTO", outcome="SKIPPED")
+        return Stop(None)
+    return True
+
+
+@tick_pipeline.stage("parse", deps=("risk",))
+def _stage_parse(ctx):
+    return OptionChainParser.parse(underlying_ltp=ctx["underlying_ltp"])
+
+
+@tick_pipeline.stage("analyze", deps=("risk",))
+def _stage_analyze(ctx):
+    bundle = AnalysisEngine.analyze_timeframes()
+    if bundle is None:
+        # prediction can only say NO_TRADE; don't wait for the parse
+        return OrderManager._emit_signal(SignalEngine._no_trade("Insufficient OHLC data"))
+    return bundle
+
+
+@tick_pipeline.stage("predict", deps=("parse", "analyze"), inline=True)
+def _stage_predict(ctx):
+    prediction = PredictionEngine.predict(ctx["parse"], bundle=ctx["analyze"])
+    state_hub.publish("prediction", prediction)
+    return prediction
+
+
+@tick_pipeline.stage("decide", deps=("predict",), inline=True)
+def _stage_decide(ctx):
+    option_type, no_trade = SignalEngine.decide(ctx["predict"])
+    return OrderManager._emit_signal(no_trade) if no_trade else option_type
+
+
+@tick_pipeline.stage("select", deps=("decide",), inline=True)
+def _stage_select(ctx):
+    signal = SignalEngine.build_signal(ctx["parse"], ctx["decide"])
+    return OrderManager._emit_signal(SignalEngine.finalize(signal, ctx["predict"]))
+
+
+@tick_pipeline.stage("submit", deps=("select",), inline=True)
+def _stage_submit(ctx):
+    return OrderManager._place_entry(ctx["select"], source="AUTO")
+
+
 # ------------------------------------------------------------
 # Local test (DRY RUN – no real orders)
 # ------------------------------------------------------------
@@ -0,0 +1,125 @@
+"""
+Pipeline
+--------
+
+Responsibilities:
+- Small dependency-graph executor for the per-tick stages
+- Stages whose dependencies are done run concurrently on a shared
+  thread pool; cheap gates can run inline on the caller thread
+- A stage returning Stop(outcome) ends the run at once: stages not yet
+  started are skipped (a decision like NO_TRADE is already known)
+- Per-stage wall time recorded per run and in a Prometheus histogram
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from backend.metrics import metrics
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+PIPELINE_WORKERS = 4
+
+STAGE_DURATION = metrics.histogram("pipeline_stage_seconds", "Pipeline stage wall time", ["pipeline", "stage"])
+
+
+class Stop:
+    """Returned by a stage to end the run with `outcome`."""
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+
+
+class Pipeline:
+
+    def __init__(self, name, workers=PIPELINE_WORKERS):
+        self.name = name
+        self.stages = {}            # name -> {"fn", "deps", "inline"}, in registration order
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-stage")
+        self.last_run = None
+
+    def stage(self, name, deps=(), inline=False):
+        """
+        Decorator registering fn(ctx) -> value | Stop(outcome).
+        ctx holds the run inputs plus the value of every finished stage.
+        inline: run on the caller thread (cheap gates / decisions).
+        """
+        def decorator(fn):
+            for dep in deps:
+                if dep not in self.stages:
+                    raise ValueError(f"{self.name}: stage {name!r} depends on unknown {dep!r}")
+            self.stages[name] = {"fn": fn, "deps": tuple(deps), "inline": inline}
+            return fn
+        return decorator
+
+    def _timed(self, name, ctx, timings):
+        t0 = time.perf_counter()
+        try:
+            return self.stages[name]["fn"](ctx)
+        finally:
+            elapsed = time.perf_counter() - t0
+            STAGE_DURATION.observe(elapsed, pipeline=self.name, stage=name)
+            timings[name] = elapsed
+
+    def run(self, **inputs):
+        """
+        Run every stage once. Returns
+        {"outcome", "stopped_at", "ctx", "timings", "skipped", "total"}:
+        outcome is the Stop value (None when every stage ran).
+        A stage exception cancels the queued stages and propagates.
+        """
+        t0 = time.perf_counter()
+        ctx = dict(inputs)
+        timings = {}
+        waiting = list(self.stages)
+        running = {}
+        stop = None
+
+        def ready():
+            ready_now = [n for n in waiting if all(d in ctx for d in self.stages[n]["deps"])]
+            # inline gates first, so a Stop there never starts pool work
+            return sorted(ready_now, key=lambda n: not self.stages[n]["inline"])
+
+        try:
+            while stop is None:
+                scheduled = True
+                while scheduled and stop is None:
+                    scheduled = False
+                    for name in ready():
+                        waiting.remove(name)
+                        scheduled = True
+                        if not self.stages[name]["inline"]:
+                            running[self.pool.submit(self._timed, name, ctx, timings)] = name
+                            continue
+                        value = self._timed(name, ctx, timings)
+                        if isinstance(value, Stop):
+                            stop = (name, value.outcome)
+                            break
+                        ctx[name] = value
+                if stop is not None or not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    value = future.result()
+                    if isinstance(value, Stop):
+                        stop = (name, value.outcome)
+                        break
+                    ctx[name] = value
+        finally:
+            # queued stages never start; running ones finish unobserved
+            for future in running:
+                future.cancel()
+
+        self.last_run = {
+            "outcome": stop[1] if stop else None,
+            "stopped_at": stop[0] if stop else None,
+            "ctx": ctx,
+            "timings": dict(timings),
+            "skipped": waiting + list(running.values()),
+            "total": time.perf_counter() - t0,
+        }
+        return self.last_run
@@ -0,0 +1,180 @@
+"""
+Position Book
+-------------
+
+Responsibilities:
+- Hold every open position keyed by security_id (O(1) lookup)
+- Keep per-position SL / Target / trailing state
+  (status: PENDING_ENTRY -> OPEN; slot reserved before the entry order)
+- Enforce concurrency limits (total and per source: AUTO / MANUAL)
+- Aggregate exposure and realized / unrealized PnL
+"""
+
+import copy
+import threading
+
+from backend.data_fetcher import DATA_CACHE, CACHE_LOCK
+from backend.logger import get_logger, log_throttled
+
+log = get_logger("PositionBook")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+MAX_OPEN_POSITIONS = 5           # across all sources
+MAX_POSITIONS_PER_SOURCE = {
+    "AUTO": 1,                   # bot keeps its single-trade behaviour
+    "MANUAL": 5,
+}
+
+
+class PositionBook:
+
+    def __init__(self, max_open=MAX_OPEN_POSITIONS, per_source=None):
+        self.max_open = max_open
+        self.per_source = dict(per_source or MAX_POSITIONS_PER_SOURCE)
+        self.lock = threading.RLock()
+        self._positions = {}
+        self._source_counts = {}
+        self.realized_pnl = 0.0
+        self.closed_count = 0
+
+    # ------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, security_id):
+        return str(security_id) in self._positions
+
+    def get(self, security_id):
+        return self._positions.get(str(security_id))
+
+    def open_positions(self):
+        """Snapshot list of open positions (safe to iterate)."""
+        with self.lock:
+            return list(self._positions.values())
+
+    # ------------------------------------------------------------
+    # Limits
+    # ------------------------------------------------------------
+    def can_open(self, source, security_id=None):
+        """Return (allowed, reason)."""
+        with self.lock:
+            if security_id is not None and str(security_id) in self._positions:
+                return False, f"Position already open for {security_id}"
+            if len(self._positions) >= self.max_open:
+                return False, f"Max open positions reached ({self.max_open})"
+            limit = self.per_source.get(source)
+            if limit is not None and self._source_counts.get(source, 0) >= limit:
+                return False, f"Max {source} positions reached ({limit})"
+            return True, None
+
+    # ------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------
+    def add(self, trade):
+        """Register an open position. Returns False if limits forbid it."""
+        with self.lock:
+            allowed, reason = self.can_open(trade.get("source"), trade["security_id"])
+            if not allowed:
+                log_throttled(log, "INFO", "Rejected {}: {}", trade["symbol"], reason, key=f"reject:{reason}")
+                return False
+            self._positions[trade["security_id"]] = trade
+            source = trade.get("source")
+            self._source_counts[source] = self._source_counts.get(source, 0) + 1
+            return True
+
+    def discard(self, security_id):
+        """Drop a position that never opened (entry rejected)."""
+        with self.lock:
+            trade = self._positions.pop(str(security_id), None)
+            if trade is not None:
+                source = trade.get("source")
+                self._source_counts[source] = max(self._source_counts.get(source, 0) - 1, 0)
+            return trade
+
+    def close(self, security_id):
+        """Remove a position after its exit filled and book its PnL."""
+        with self.lock:
+            trade = self._positions.pop(str(security_id), None)
+            if trade is None:
+                return None
+            source = trade.get("source")
+            self._source_counts[source] = max(self._source_counts.get(source, 0) - 1, 0)
+            self.realized_pnl += trade.get("pnl") or 0.0
+            self.closed_count += 1
+            return trade
+
+    # ------------------------------------------------------------
+    # Checkpoint
+    # ------------------------------------------------------------
+    def state(self):
+        """Deep copy of the book for checkpointing."""
+        with self.lock:
+            return {
+                "positions": copy.deepcopy(self._positions),
+                "realized_pnl": self.realized_pnl,
+                "closed_count": self.closed_count,
+            }
+
+    def restore(self, state):
+        """Replace the book with a checkpointed state."""
+        with self.lock:
+            self._positions = dict(state["positions"])
+            self._source_counts = {}
+            for trade in self._positions.values():
+                source = trade.get("source")
+                self._source_counts[source] = self._source_counts.get(source, 0) + 1
+            self.realized_pnl = state["realized_pnl"]
+            self.closed_count = state["closed_count"]
+
+    # ------------------------------------------------------------
+    # Aggregates
+    # ------------------------------------------------------------
+    def exposure(self):
+        """Premium deployed across open positions."""
+        with self.lock:
+            return sum(
+                t["entry_price"] * t["qty"]
+                for t in self._positions.values()
+                if t["status"] == "OPEN"
+            )
+
+    def unrealized_pnl(self, prices=None):
+        """
+        Mark-to-market PnL. prices: {security_id: ltp}; defaults to the
+        shared price table.
+        """
+        with self.lock:
+            positions = [t for t in self._positions.values() if t["status"] == "OPEN"]
+
+        pnl = 0.0
+        with CACHE_LOCK:
+            table = DATA_CACHE["option_ltp"]
+            for trade in positions:
+                if prices is not None:
+                    ltp = prices.get(trade["security_id"])
+                else:
+                    quote = table.get(trade["security_id"])
+                    ltp = quote["ltp"] if quote else None
+                if ltp is not None:
+                    pnl += (ltp - trade["entry_price"]) * trade["qty"]
+        return pnl
+
+    def summary(self):
+        with self.lock:
+            return {
+                "open": len(self._positions),
+                "by_source": dict(self._source_counts),
+                "exposure": round(self.exposure(), 2),
+                "unrealized_pnl": round(self.unrealized_pnl(), 2),
+                "realized_pnl": round(self.realized_pnl, 2),
+                "closed": self.closed_count,
+            }
+
+
+# Create singleton PositionBook instance
+position_book = PositionBook()
@@ -3,17 +3,51 @@ Prediction Engine
 -----------------
 
 Responsibilities:
-- Combine multi-timeframe analysis (1m / 5m / 15m)
+- Combine multi-timeframe analysis (1m / 3m / 5m / 15m / 30m bundle)
+- Score option-flow features (PCR, max pain, OI walls, buildup)
 - Produce directional bias with confidence
+  (rule scoring, or a trained model when MODE = "ML")
 - Feed signal_engine for order decisions
 """
 
 import numpy as np
 from backend.analysis_engine import AnalysisEngine
+from backend.oi_analytics import OIAnalytics
+from backend.ml_model import MLPredictor
+from backend.metrics import COMPUTE_DURATION
 
 
 class PredictionEngine:
 
+    # "RULES" -> weighted rule score below
+    # "ML"    -> trained direction model (falls back to RULES if none saved)
+    MODE = "RULES"
+
+    # Rule weights & thresholds (tuned with backend.optimizer)
+    WEIGHTS = {
+        "trend_15m": 30,             # 15m trend bias
+        "align_5m": 20,              # 5m trend agrees with 15m
+        "conflict_5m": 10,           # 5m trend disagrees (subtracted)
+        "ema_stack": 15,             # 9 > 20 > 50 EMA stack on 5m
+        "rsi": 10,
+        "rsi_overbought": 70,
+        "rsi_oversold": 30,
+        "volume_spike": 10,
+        "volume_spike_ratio": 1.8,
+        "volume_high": 15,
+        "volume_high_ratio": 2.5,
+        "pcr": 10,
+        "pcr_bullish": 1.3,
+        "pcr_bearish": 0.7,
+        "flow_bias": 10,
+        "flow_bias_threshold": 0.3,
+        "oi_wall": 5,
+        "oi_wall_pct": 0.2,          # within 0.2% of the wall
+        "max_pain": 5,
+        "max_pain_pct": 0.5,         # beyond 0.5% of max pain
+        "direction_threshold": 40,
+    }
+
     # ------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------
@@ -28,10 +62,16 @@ class PredictionEngine:
     # Core prediction logic
     # ------------------------------------------------------------
     @staticmethod
-    def predict():
+    @COMPUTE_DURATION.timed(stage="predict")
+    def predict(parsed_chain=None, bundle=None):
         """
         Multi-timeframe prediction.
 
+        parsed_chain: optional OptionChainParser.parse() result; parsed
+        from the cached snapshot when omitted.
+        bundle: optional AnalysisEngine.analyze_timeframes() result, so a
+        caller that already analysed predicts on the same data.
+
         Returns:
         {
             direction: BULLISH / BEARISH / NO_TRADE
@@ -40,15 +80,23 @@ class PredictionEngine:
         }
         """
 
-        df_5m = AnalysisEngine.analyze_5m()
-        df_15m = AnalysisEngine.analyze_15m()
+        if bundle is None:
+            bundle = AnalysisEngine.analyze_timeframes()
+        if bundle is None:
+            return PredictionEngine._no_trade("Insufficient OHLC data")
 
-        if df_5m is None or df_15m is None:
+        c5 = PredictionEngine._latest(bundle["5m"])
+        c15 = PredictionEngine._latest(bundle["15m"])
+        if c5 is None or c15 is None:
             return PredictionEngine._no_trade("Insufficient OHLC data")
+        flow = OIAnalytics.for_snapshot(parsed_chain)
 
-        c5 = PredictionEngine._latest(df_5m)
-        c15 = PredictionEngine._latest(df_15m)
+        if PredictionEngine.MODE == "ML":
+            prediction = MLPredictor.predict(c5, c15, flow)
+            if prediction is not None:
+                return prediction
 
+        w = PredictionEngine.WEIGHTS
         score = 0
         reasons = []
 
@@ -56,58 +104,95 @@ class PredictionEngine:
         # 1. Higher timeframe trend (15m) – highest weight
         # --------------------------------------------------------
         if c15["trend_bias"] == "BULLISH":
-            score += 30
+            score += w["trend_15m"]
             reasons.append("15m trend bullish")
         elif c15["trend_bias"] == "BEARISH":
-            score -= 30
+            score -= w["trend_15m"]
             reasons.append("15m trend bearish")
 
         # --------------------------------------------------------
         # 2. Medium timeframe confirmation (5m)
         # --------------------------------------------------------
         if c5["trend_bias"] == c15["trend_bias"]:
-            score += 20
+            score += w["align_5m"]
             reasons.append("5m aligns with 15m")
         else:
-            score -= 10
+            score -= w["conflict_5m"]
             reasons.append("5m conflicts with 15m")
 
         # --------------------------------------------------------
         # 3. Momentum (EMA stack on 5m)
         # --------------------------------------------------------
         if c5["ema_9"] > c5["ema_20"] > c5["ema_50"]:
-            score += 15
+            score += w["ema_stack"]
             reasons.append("EMA bullish stack (5m)")
         elif c5["ema_9"] < c5["ema_20"] < c5["ema_50"]:
-            score -= 15
+            score -= w["ema_stack"]
             reasons.append("EMA bearish stack (5m)")
 
         # --------------------------------------------------------
         # 4. RSI condition (avoid extreme entries)
         # --------------------------------------------------------
-        if c5["rsi"] > 70:
-            score -= 10
+        if c5["rsi"] > w["rsi_overbought"]:
+            score -= w["rsi"]
             reasons.append("RSI overbought (5m)")
-        elif c5["rsi"] < 30:
-            score += 10
+        elif c5["rsi"] < w["rsi_oversold"]:
+            score += w["rsi"]
             reasons.append("RSI oversold (5m)")
 
         # --------------------------------------------------------
         # 5. Volume confirmation
         # --------------------------------------------------------
-        if c5["volume_ratio"] >= 2.5:
-            score += 15
-        elif c5["volume_ratio"] >= 1.8:
-            score += 10
+        if c5["volume_ratio"] >= w["volume_high_ratio"]:
+            score += w["volume_high"]
+        elif c5["volume_ratio"] >= w["volume_spike_ratio"]:
+            score += w["volume_spike"]
+
+        # --------------------------------------------------------
+        # 6. Option flow (chain OI analytics)
+        # --------------------------------------------------------
+        if flow:
+            pcr = flow["pcr_window"]
+            if pcr is not None and pcr >= w["pcr_bullish"]:
+                score += w["pcr"]
+                reasons.append(f"PCR bullish ({pcr:.2f})")
+            elif pcr is not None and pcr <= w["pcr_bearish"]:
+                score -= w["pcr"]
+                reasons.append(f"PCR bearish ({pcr:.2f})")
+
+            if flow["flow_bias"] >= w["flow_bias_threshold"]:
+                score += w["flow_bias"]
+                reasons.append("Put writing / call covering near ATM")
+            elif flow["flow_bias"] <= -w["flow_bias_threshold"]:
+                score -= w["flow_bias"]
+                reasons.append("Call writing / put covering near ATM")
+
+            ltp = flow["underlying_ltp"]
+            wall_band = w["oi_wall_pct"] / 100
+            if ltp and flow["ce_wall"] and 0 <= flow["ce_wall"] - ltp <= ltp * wall_band:
+                score -= w["oi_wall"]
+                reasons.append(f"Near CE OI wall {flow['ce_wall']:.0f}")
+            if ltp and flow["pe_wall"] and 0 <= ltp - flow["pe_wall"] <= ltp * wall_band:
+                score += w["oi_wall"]
+                reasons.append(f"Near PE OI wall {flow['pe_wall']:.0f}")
+
+            if ltp and flow["max_pain"]:
+                pain_band = w["max_pain_pct"] / 100
+                if ltp > flow["max_pain"] * (1 + pain_band):
+                    score -= w["max_pain"]
+                    reasons.append(f"Above max pain {flow['max_pain']:.0f}")
+                elif ltp < flow["max_pain"] * (1 - pain_band):
+                    score += w["max_pain"]
+                    reasons.append(f"Below max pain {flow['max_pain']:.0f}")
 
         # --------------------------------------------------------
         # Final decision
         # --------------------------------------------------------
         confidence = min(abs(score), 100)
 
-        if score >= 40:
+        if score >= w["direction_threshold"]:
             direction = "BULLISH"
-        elif score <= -40:
+        elif score <= -w["direction_threshold"]:
             direction = "BEARISH"
         else:
             direction = "NO_TRADE"
@@ -119,11 +204,72 @@ class PredictionEngine:
             "details": {
                 "15m_trend": c15["trend_bias"],
                 "5m_trend": c5["trend_bias"],
+                "trends": {label: df["trend_bias"].iloc[-1] for label, df in bundle.items() if not df.empty},
                 "rsi_15m": round(float(c15["rsi"]),2),
+                "option_flow": flow,
                 "reasons": reasons
             }
         }
 
+    # ------------------------------------------------------------
+    # Vectorized scoring (backtests / optimizer)
+    # ------------------------------------------------------------
+    @staticmethod
+    def score_arrays(f, weights=None):
+        """
+        Rule score for many bars at once; mirrors predict() rule for rule.
+
+        f: dict of equal-length arrays
+           trend_5m / trend_15m (-1 / 0 / +1), ema_9, ema_20, ema_50,
+           rsi, volume_ratio, pcr_window, flow_bias, underlying_ltp,
+           ce_wall, pe_wall, max_pain (NaN where unavailable)
+        Returns float array of scores.
+        """
+        w = PredictionEngine.WEIGHTS if weights is None else weights
+        t5, t15 = f["trend_5m"], f["trend_15m"]
+
+        score = w["trend_15m"] * t15
+        score = score + np.where(t5 == t15, w["align_5m"], -w["conflict_5m"])
+
+        bull_stack = (f["ema_9"] > f["ema_20"]) & (f["ema_20"] > f["ema_50"])
+        bear_stack = (f["ema_9"] < f["ema_20"]) & (f["ema_20"] < f["ema_50"])
+        score = score + w["ema_stack"] * (bull_stack.astype(float) - bear_stack)
+
+        rsi = f["rsi"]
+        score = score + np.select(
+            [rsi > w["rsi_overbought"], rsi < w["rsi_oversold"]], [-w["rsi"], w["rsi"]], 0
+        )
+
+        vr = f["volume_ratio"]
+        score = score + np.select(
+            [vr >= w["volume_high_ratio"], vr >= w["volume_spike_ratio"]],
+            [w["volume_high"], w["volume_spike"]], 0
+        )
+
+        pcr = f["pcr_window"]
+        score = score + np.select([pcr >= w["pcr_bullish"], pcr <= w["pcr_bearish"]], [w["pcr"], -w["pcr"]], 0)
+
+        bias = f["flow_bias"]
+        score = score + np.select(
+            [bias >= w["flow_bias_threshold"], bias <= -w["flow_bias_threshold"]],
+            [w["flow_bias"], -w["flow_bias"]], 0
+        )
+
+        ltp = f["underlying_ltp"]
+        band = ltp * w["oi_wall_pct"] / 100
+        ce_gap = f["ce_wall"] - ltp
+        pe_gap = ltp - f["pe_wall"]
+        score = score - w["oi_wall"] * ((ce_gap >= 0) & (ce_gap <= band))
+        score = score + w["oi_wall"] * ((pe_gap >= 0) & (pe_gap <= band))
+
+        pain = f["max_pain"]
+        pain_band = w["max_pain_pct"] / 100
+        score = score + np.select(
+            [ltp > pain * (1 + pain_band), ltp < pain * (1 - pain_band)],
+            [-w["max_pain"], w["max_pain"]], 0
+        )
+        return score
+
     # ------------------------------------------------------------
     # Utility
     # ------------------------------------------------------------
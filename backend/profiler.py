@@ -0,0 +1,185 @@
+"""
+Tick Profiler
+-------------
+
+Responsibilities:
+- Sample-profile the next N bot ticks on demand (dashboard button or
+  SIGUSR1), without restarting the bot
+- Write collapsed stacks ("frame;frame;frame count") per session to
+  storage/profiles, ready for flamegraph.pl / speedscope / inferno
+- Cost one attribute check per call while disarmed
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+
+from backend.logger import get_logger
+
+log = get_logger("TickProfiler")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+PROFILE_DIR = "storage/profiles"
+PROFILE_TICKS = 5                # ticks per session when armed without a count
+PROFILE_INTERVAL_SEC = 0.002     # sampling period
+PROFILE_MAX_DEPTH = 128
+
+
+class TickProfiler:
+
+    def __init__(self, interval=PROFILE_INTERVAL_SEC, out_dir=PROFILE_DIR):
+        self.interval = interval
+        self.out_dir = out_dir
+        self.last_path = None
+
+        self._lock = threading.Lock()
+        self._remaining = 0
+        self._all_threads = False
+        self._active = set()           # thread idents inside a profiled call
+        self._stacks = Counter()
+        self._durations = []
+        self._sampler = None
+        self._stop = threading.Event()
+
+    # ------------------------------------------------------------
+    # Control
+    # ------------------------------------------------------------
+    @property
+    def armed(self):
+        return self._remaining > 0
+
+    def arm(self, ticks=PROFILE_TICKS, all_threads=False):
+        """
+        Profile the next `ticks` profiled calls. all_threads also samples
+        background threads (fetcher, order dispatcher) while a tick runs.
+        """
+        with self._lock:
+            self._remaining = max(int(ticks), 0)
+            self._all_threads = all_threads
+        log.info("Armed for {} tick(s)", ticks)
+
+    def install_signal_handler(self, signum=getattr(signal, "SIGUSR1", None)):
+        """kill -USR1 <pid> arms PROFILE_TICKS ticks. Main thread only."""
+        if signum is None:
+            return False
+        try:
+            signal.signal(signum, lambda *_: self.arm())
+            return True
+        except ValueError:
+            # Not the main thread (e.g. Streamlit script runner)
+            return False
+
+    # ------------------------------------------------------------
+    # Instrumentation
+    # ------------------------------------------------------------
+    def profiled(self, fn):
+        """Decorator: profile calls to fn while armed; nested calls join the outer one."""
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self._remaining:
+                return fn(*args, **kwargs)
+            return self._run(fn, args, kwargs)
+        return wrapper
+
+    def _run(self, fn, args, kwargs):
+        ident = threading.get_ident()
+        with self._lock:
+            if self._remaining <= 0 or ident in self._active:
+                owner = False
+            else:
+                owner = True
+                self._active.add(ident)
+                if self._sampler is None:
+                    self._start_sampler()
+
+        if not owner:
+            return fn(*args, **kwargs)
+
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - t0
+            finish = False
+            with self._lock:
+                self._active.discard(ident)
+                self._durations.append((fn.__qualname__, elapsed))
+                self._remaining -= 1
+                finish = self._remaining <= 0 and not self._active
+            if finish:
+                self._finish()
+
+    # ------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------
+    def _start_sampler(self):
+        self._stacks = Counter()
+        self._durations = []
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="tick-profiler", daemon=True)
+        self._sampler.start()
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                if not self._active:
+                    continue
+                targets = None if self._all_threads else set(self._active)
+
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (targets is not None and ident not in targets):
+                    continue
+                self._stacks[self._collapse(names.get(ident, str(ident)), frame)] += 1
+
+    @staticmethod
+    def _collapse(thread_name, frame):
+        stack = []
+        while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+            code = frame.f_code
+            if code.co_filename != __file__:
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        stack.append(thread_name)
+        return ";".join(reversed(stack))
+
+    # ------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------
+    def _finish(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self._sampler = None
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"tick_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded")
+        with open(path, "w") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self.last_path = path
+
+        total = sum(d for _, d in self._durations)
+        log.info("{} tick(s), {:.1f} ms, {} samples -> {}",
+                 len(self._durations), total * 1000, sum(self._stacks.values()), path)
+        for name, count in self.top_functions(5):
+            log.info("  {:6d}  {}", count, name)
+
+    def top_functions(self, n=10):
+        """Leaf frames with the most samples (self time) in the last session."""
+        leaves = Counter()
+        for stack, count in self._stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+
+tick_profiler = TickProfiler()
@@ -0,0 +1,301 @@
+"""
+Push API
+--------
+
+Responsibilities:
+- Versioned state hub for what the bot already computed: latest chain
+  snapshot, prediction, signal and positions (one topic each)
+- Stdlib HTTP endpoint on the bot process:
+  GET /state, GET /state/<topic>  (JSON, ETag = version, 304 on match)
+  GET /events[?topics=a,b]        (server-sent events, deltas on change)
+- Readers never trigger computation or Dhan calls; publishing is free
+  until the server is started
+"""
+
+import json
+import math
+import threading
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+
+from backend.position_book import position_book
+from backend.logger import get_logger
+
+log = get_logger("PushAPI")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+PUSH_HOST = "127.0.0.1"
+PUSH_PORT = 9110
+PUSH_KEEPALIVE_SEC = 15
+PUSH_TOPICS = ("snapshot", "prediction", "signal", "positions")
+SNAPSHOT_COLUMNS = (
+    "ce_ltp", "ce_oi", "ce_iv", "ce_delta", "ce_oi_intraday_change",
+    "pe_ltp", "pe_oi", "pe_iv", "pe_delta", "pe_oi_intraday_change",
+)
+
+
+# ============================================================
+# JSON views
+# ============================================================
+def jsonable(obj):
+    """Plain JSON types: numpy scalars unwrapped, NaN -> None, times -> ISO."""
+    if isinstance(obj, dict):
+        return {str(k): jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [jsonable(v) for v in obj]
+    if isinstance(obj, pd.Series):
+        return jsonable(obj.to_dict())
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float):
+        return None if math.isnan(obj) or math.isinf(obj) else obj
+    if isinstance(obj, (datetime, date, pd.Timestamp)):
+        return obj.isoformat()
+    if obj is None or isinstance(obj, (str, int, bool)):
+        return obj
+    return str(obj)
+
+
+def snapshot_view(parsed):
+    """Compact chain view of an OptionChainParser.parse() result, rows keyed by strike."""
+    df = parsed["df"]
+    columns = [c for c in SNAPSHOT_COLUMNS if c in df.columns]
+    values = df[columns].to_numpy(dtype=float).round(4)
+    values = np.where(np.isnan(values), None, values).tolist()
+    strikes = df["strike"].to_numpy(dtype=float)
+    return {
+        "snapshot_ts": parsed.get("snapshot_ts"),
+        "expiry": parsed.get("expiry"),
+        "underlying_ltp": parsed.get("underlying_ltp"),
+        "atm_strike": parsed.get("atm_strike"),
+        "changed_strikes": (parsed.get("changes") or {}).get("count"),
+        "rows": {f"{k:g}": dict(zip(columns, row)) for k, row in zip(strikes, values)},
+    }
+
+
+def positions_view():
+    state = position_book.state()
+    return {
+        "summary": position_book.summary(),
+        "positions": state["positions"],
+    }
+
+
+def delta(old, new, depth=2, prefix=""):
+    """
+    Changes from old to new as {"changed": {path: value}, "removed": [path]}
+    with JSON-pointer style paths ("/rows/25000"), `depth` levels deep.
+    """
+    out = {"changed": {}, "removed": []}
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        out["changed"][prefix or "/"] = new
+        return out
+    for key, value in new.items():
+        path = f"{prefix}/{key}"
+        if key not in old:
+            out["changed"][path] = value
+        elif old[key] != value:
+            if depth > 1 and isinstance(value, dict) and isinstance(old[key], dict):
+                inner = delta(old[key], value, depth - 1, path)
+                out["changed"].update(inner["changed"])
+                out["removed"].extend(inner["removed"])
+            else:
+                out["changed"][path] = value
+    out["removed"].extend(f"{prefix}/{key}" for key in old if key not in new)
+    return out
+
+
+# ============================================================
+# State hub
+# ============================================================
+class StateHub:
+
+    def __init__(self, topics=PUSH_TOPICS):
+        self.cond = threading.Condition()
+        self.enabled = False
+        self.version = 0
+        self.topics = {
+            t: {"version": 0, "prev_version": 0, "data": None, "delta": None, "body": None}
+            for t in topics
+        }
+
+    def publish(self, topic, data):
+        """
+        Store a new value; bumps the version only when it changed.
+        data may be a zero-arg callable, evaluated only while serving.
+        Returns True when a new version was published.
+        """
+        if not self.enabled:
+            return False
+        if callable(data):
+            data = data()
+        data = jsonable(data)
+        with self.cond:
+            entry = self.topics[topic]
+            if entry["data"] == data:
+                return False
+            self.version += 1
+            entry["delta"] = delta(entry["data"], data) if entry["data"] is not None else None
+            entry["prev_version"] = entry["version"]
+            entry["version"] = self.version
+            entry["data"] = data
+            entry["body"] = None
+            self.cond.notify_all()
+        return True
+
+    def body(self, topic):
+        """(version, JSON bytes) for a topic, serialized once per version."""
+        with self.cond:
+            entry = self.topics[topic]
+            if entry["body"] is None:
+                entry["body"] = json.dumps({"version": entry["version"], "data": entry["data"]}).encode()
+            return entry["version"], entry["body"]
+
+    def state(self):
+        with self.cond:
+            return self.version, {
+                t: {"version": e["version"], "data": e["data"]} for t, e in self.topics.items()
+            }
+
+    def wait(self, since, timeout):
+        """Block until the hub version passes `since` (or timeout); return it."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.version > since, timeout)
+            return self.version
+
+    def events_since(self, seen, topics):
+        """
+        SSE payloads for topics newer than the client's `seen` versions
+        ({topic: version}, updated in place). Sends a delta when the
+        client saw the version right before, the full value otherwise.
+        """
+        events = []
+        with self.cond:
+            for t in topics:
+                entry = self.topics[t]
+                if entry["version"] <= seen.get(t, 0):
+                    continue
+                payload = {"version": entry["version"]}
+                if entry["delta"] is not None and seen.get(t) == entry["prev_version"]:
+                    payload["delta"] = entry["delta"]
+                else:
+                    payload["data"] = entry["data"]
+                seen[t] = entry["version"]
+                events.append((t, entry["version"], payload))
+        return events
+
+
+# Create singleton StateHub instance
+state_hub = StateHub()
+
+
+# ============================================================
+# HTTP endpoint
+# ============================================================
+class _PushHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["state"]:
+            version, topics = state_hub.state()
+            self._json(version, json.dumps({"version": version, "topics": topics}).encode())
+        elif len(parts) == 2 and parts[0] == "state" and parts[1] in state_hub.topics:
+            self._json(*state_hub.body(parts[1]))
+        elif parts == ["events"]:
+            wanted = parse_qs(url.query).get("topics", [",".join(state_hub.topics)])[0].split(",")
+            self._events([t for t in wanted if t in state_hub.topics])
+        else:
+            self.send_error(404)
+
+    def _json(self, version, body):
+        etag = f'"{version}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _events(self, topics):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        # Last-Event-ID (a hub version) resumes: anything newer is resent in full
+        try:
+            last = int(self.headers.get("Last-Event-ID", 0))
+        except ValueError:
+            last = 0
+        seen = {t: last for t in topics} if last else {}
+        version = last
+        try:
+            while push_server.server is not None:
+                for topic, v, payload in state_hub.events_since(seen, topics):
+                    self.wfile.write(
+                        f"id: {v}\nevent: {topic}\ndata: {json.dumps(payload)}\n\n".encode()
+                    )
+                self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+                version = state_hub.wait(version, PUSH_KEEPALIVE_SEC)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PushServer:
+
+    def __init__(self, host=PUSH_HOST, port=PUSH_PORT):
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        if self.server is not None:
+            return
+        try:
+            self.server = ThreadingHTTPServer((self.host, self.port), _PushHandler)
+        except OSError as e:
+            log.error("Could not bind {}:{}: {}", self.host, self.port, e)
+            return
+        self.server.daemon_threads = True
+        state_hub.enabled = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="push-http", daemon=True)
+        self.thread.start()
+        log.info("Serving http://{}:{}/state and /events", self.host, self.port)
+
+    def stop(self):
+        if self.server is None:
+            return
+        state_hub.enabled = False
+        server, self.server = self.server, None
+        with state_hub.cond:
+            state_hub.cond.notify_all()
+        server.shutdown()
+        server.server_close()
+        log.info("Stopped")
+
+
+# Create singleton PushServer instance
+push_server = PushServer()
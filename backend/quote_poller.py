@@ -0,0 +1,176 @@
+"""
+Quote Poller
+------------
+
+Responsibilities:
+- Poll LTP (or LTP + best bid / ask) for a small watchlist only: the
+  security_ids of open positions plus the ATM candidates of the
+  primary chain, one batched Dhan market-feed request per poll
+- Poll the underlying index in the same request and feed it to
+  bar_aggregator as live ticks
+- Poll much faster than the full option chain (1s vs 30s) while
+  staying inside the market-feed rate budget
+- Write results into the shared price table (DATA_CACHE["option_ltp"])
+  through DataFetcher.publish_prices, so ExitEngine SL / target checks
+  run on fresh prices
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from backend.config import dhan, UNDER_SECURITY_ID, UNDER_EXCHANGE_SEGMENT
+from backend.data_fetcher import DataFetcher, DATA_CACHE, CACHE_LOCK, SECURITY_ID_KEYS
+from backend.position_book import position_book
+from backend.bar_aggregator import bar_aggregator
+from backend.rate_limiter import quote_api_limiter
+from backend.metrics import dhan_call, CACHE_AGE
+from backend.logger import get_logger, log_throttled
+
+log = get_logger("QuotePoller")
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+QUOTE_POLL_INTERVAL_SEC = 1.0
+QUOTE_SEGMENT = "NSE_FNO"
+QUOTE_ATM_STRIKES = 1          # candidate strikes each side of ATM (CE + PE)
+QUOTE_WITH_DEPTH = False       # True: quote_data (LTP + bid / ask), False: ticker_data (LTP only)
+QUOTE_MAX_IDS = 1000           # Dhan market-feed limit per request
+QUOTE_UNDERLYING = True        # include the underlying index (live bar ticks)
+
+
+class QuotePoller:
+
+    def __init__(self, interval_seconds=QUOTE_POLL_INTERVAL_SEC, atm_strikes=QUOTE_ATM_STRIKES,
+                 with_depth=QUOTE_WITH_DEPTH):
+        self.interval = interval_seconds
+        self.atm_strikes = atm_strikes
+        self.with_depth = with_depth
+        self.running = False
+        self.thread = None
+        self.last_polled = None
+        self._candidates = {"key": None, "ids": []}
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run_loop, name="quote-poller", daemon=True)
+        self.thread.start()
+        log.info("Started (interval={} sec, depth={})", self.interval, self.with_depth)
+
+    def stop(self):
+        self.running = False
+        log.info("Stopped")
+
+    def _run_loop(self):
+        while self.running:
+            t0 = time.monotonic()
+            try:
+                self.poll()
+            except Exception as e:
+                log.exception("Error: {}", e)
+            time.sleep(max(0.0, self.interval - (time.monotonic() - t0)))
+
+    # ------------------------------------------------------------
+    # Watchlist
+    # ------------------------------------------------------------
+    @staticmethod
+    def atm_candidates(chain_data, strikes_each_side=QUOTE_ATM_STRIKES):
+        """CE / PE security_ids of the strikes nearest the underlying (raw chain JSON)."""
+        chain_data = chain_data.get("data", chain_data)
+        spot = chain_data.get("underlying_ltp")
+        if not spot:
+            return []
+        ids = []
+        for leg in ("CE", "PE"):
+            legs = [
+                item for item in chain_data.get(leg, []) or []
+                if item.get("strike_price") is not None
+            ]
+            legs.sort(key=lambda item: abs(float(item["strike_price"]) - float(spot)))
+            for item in legs[:2 * strikes_each_side + 1]:
+                security_id = next((item[k] for k in SECURITY_ID_KEYS if item.get(k) is not None), None)
+                if security_id is not None:
+                    ids.append(str(security_id))
+        return ids
+
+    def watchlist(self):
+        """Open position ids first, then ATM candidates (recomputed per chain snapshot)."""
+        with CACHE_LOCK:
+            chain = DATA_CACHE.get("option_chain")
+            chain_ts = DATA_CACHE.get("option_chain_timestamp")
+        if chain and self._candidates["key"] != chain_ts:
+            self._candidates = {
+                "key": chain_ts,
+                "ids": QuotePoller.atm_candidates(chain, self.atm_strikes),
+            }
+
+        ids = [trade["security_id"] for trade in position_book.open_positions()]
+        ids += self._candidates["ids"]
+        return list(dict.fromkeys(str(i) for i in ids))[:QUOTE_MAX_IDS]
+
+    # ------------------------------------------------------------
+    # Poll
+    # ------------------------------------------------------------
+    @staticmethod
+    def parse_response(response, segment=QUOTE_SEGMENT):
+        """
+        ({security_id: ltp}, {security_id: {"bid", "ask"}}) from a
+        ticker_data / quote_data response.
+        """
+        payload = (response or {}).get("data") or {}
+        payload = payload.get("data", payload)
+        rows = payload.get(segment) or {}
+
+        prices, quotes = {}, {}
+        for security_id, row in rows.items():
+            ltp = row.get("last_price")
+            if ltp is None:
+                continue
+            security_id = str(security_id)
+            prices[security_id] = float(ltp)
+            depth = row.get("depth")
+            if depth:
+                buy, sell = depth.get("buy") or [], depth.get("sell") or []
+                quotes[security_id] = {
+                    "bid": float(buy[0]["price"]) if buy and buy[0].get("price") else None,
+                    "ask": float(sell[0]["price"]) if sell and sell[0].get("price") else None,
+                }
+        return prices, quotes
+
+    def poll(self):
+        """One batched quote request for the watchlist. Returns the prices published."""
+        ids = self.watchlist()
+        securities = {QUOTE_SEGMENT: [int(i) for i in ids]} if ids else {}
+        if QUOTE_UNDERLYING:
+            securities[UNDER_EXCHANGE_SEGMENT] = [UNDER_SECURITY_ID]
+        if not securities:
+            return {}
+
+        endpoint, fn = ("quote_data", dhan.quote_data) if self.with_depth else ("ticker_data", dhan.ticker_data)
+        quote_api_limiter.acquire()
+        response = dhan_call(endpoint, fn, securities)
+        if not response or response.get("status") != "success":
+            log_throttled(log, "WARNING", "Quote bad response: {}", response)
+            return {}
+
+        self.last_polled = datetime.now()
+        if QUOTE_UNDERLYING:
+            underlying, _ = QuotePoller.parse_response(response, UNDER_EXCHANGE_SEGMENT)
+            bar_aggregator.on_tick(underlying.get(str(UNDER_SECURITY_ID)))
+
+        prices, quotes = QuotePoller.parse_response(response)
+        DataFetcher.publish_prices(prices, quotes)
+        return prices
+
+
+# Create singleton QuotePoller instance
+quote_poller = QuotePoller()
+
+CACHE_AGE.set_function(
+    lambda: (datetime.now() - quote_poller.last_polled).total_seconds() if quote_poller.last_polled else None,
+    item="quotes"
+)
@@ -0,0 +1,42 @@
+"""
+Rate Limiter
+------------
+
+Responsibilities:
+- Keep concurrent Dhan API callers inside the broker's request budget
+- Thread-safe; callers block in acquire() until a slot is free
+"""
+
+import threading
+import time
+
+
+# Dhan allows ~5 requests/sec on data APIs, 1 request/sec on market-feed
+# quotes and 1 request/3 sec on option chain
+DATA_API_RATE = 5
+QUOTE_API_RATE = 1
+OPTION_CHAIN_RATE = 1 / 3
+
+
+class RateLimiter:
+
+    def __init__(self, rate_per_sec):
+        self.interval = 1.0 / rate_per_sec
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def acquire(self):
+        """Reserve the next slot and sleep until it arrives."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Shared limiters (one per Dhan rate-limit bucket)
+data_api_limiter = RateLimiter(DATA_API_RATE)
+quote_api_limiter = RateLimiter(QUOTE_API_RATE)
+option_chain_limiter = RateLimiter(OPTION_CHAIN_RATE)
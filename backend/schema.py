@@ -0,0 +1,115 @@
+"""
+Data Schema
+-----------
+
+Responsibilities:
+- Define compact dtypes for OHLC and option chain frames
+- Enforce them at ingestion (fetcher / history loader / parser)
+- Report per-column memory footprint
+"""
+
+import pandas as pd
+
+
+# ============================================================
+# OHLC (1m and resampled candles)
+# ============================================================
+# NIFTY-scale prices keep ~0.002 resolution in float32, well under the 0.05 tick.
+# Accumulations over them (VWAP sums) must upcast to float64 first.
+OHLC_SCHEMA = {
+    "open": "float32",
+    "high": "float32",
+    "low": "float32",
+    "close": "float32",
+    "volume": "int64",
+}
+
+TREND_CATEGORIES = ["BEARISH", "NEUTRAL", "BULLISH"]
+
+# ============================================================
+# Option chain
+# ============================================================
+# ce_oi / pe_oi: a missing leg has no open interest, stored as 0.
+# prev-day API fields stay float32 so NaN keeps meaning "not provided".
+CHAIN_INT_COLUMNS = {
+    "ce_oi": "int32",
+    "pe_oi": "int32",
+}
+CHAIN_ID_SUFFIX = "_security_id"
+CHAIN_CATEGORY_SUFFIX = "_buildup"
+
+
+class DataSchema:
+
+    @staticmethod
+    def chain_dtype(column, series):
+        if column in CHAIN_INT_COLUMNS:
+            return CHAIN_INT_COLUMNS[column]
+        if column.endswith(CHAIN_ID_SUFFIX):
+            return "Int64"
+        if column.endswith(CHAIN_CATEGORY_SUFFIX):
+            return "category"
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            return "float32"
+        return None
+
+    # ------------------------------------------------------------
+    # Enforcement
+    # ------------------------------------------------------------
+    @staticmethod
+    def apply_ohlc(df):
+        """Cast OHLC columns in place (no-op when already compact)."""
+        if df is None or df.empty:
+            return df
+        for column, dtype in OHLC_SCHEMA.items():
+            if column in df.columns and df[column].dtype != dtype:
+                if dtype.startswith("int"):
+                    df[column] = df[column].fillna(0)
+                df[column] = df[column].astype(dtype)
+        return df
+
+    @staticmethod
+    def apply_chain(df):
+        """
+        Cast option chain columns in one astype pass; returns the frame
+        (unchanged object when already compact).
+        """
+        if df is None or df.empty:
+            return df
+        casts = {}
+        for column in df.columns:
+            series = df[column]
+            dtype = DataSchema.chain_dtype(column, series)
+            if dtype is None or str(series.dtype) == dtype:
+                continue
+            if column.endswith(CHAIN_ID_SUFFIX) and series.dtype == object:
+                df[column] = pd.to_numeric(series, errors="coerce")
+            elif column in CHAIN_INT_COLUMNS and series.hasnans:
+                df[column] = series.fillna(0)
+            casts[column] = dtype
+        if not casts:
+            return df
+        return df.astype(casts)
+
+    # ------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------
+    @staticmethod
+    def memory_report(frames):
+        """
+        frames: {name: DataFrame}
+        Returns a DataFrame of rows, columns, bytes per frame (deep).
+        """
+        rows = []
+        for name, df in frames.items():
+            if df is None:
+                continue
+            usage = df.memory_usage(deep=True)
+            rows.append({
+                "frame": name,
+                "rows": len(df),
+                "columns": df.shape[1],
+                "bytes": int(usage.sum()),
+                "largest_column": usage.drop("Index", errors="ignore").idxmax() if len(usage) > 1 else None,
+            })
+        return pd.DataFrame(rows)
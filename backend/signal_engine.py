@@ -5,12 +5,17 @@ Signal Engine
 Responsibilities:
 - Convert prediction into actionable trade signals
 - Decide CALL / PUT / NO TRADE
-- Pick strike (ATM / OTM)
+- Pick strike (ATM / OTM / ITM / target delta)
 - Enforce confidence & risk filters
 """
 
+import pandas as pd
+
+from backend.config import UNDER_SYMBOL
 from backend.prediction_engine import PredictionEngine
 from backend.option_chain_parser import OptionChainParser
+from backend.instrument_master import instrument_master
+from backend.push_api import state_hub
 
 
 class SignalEngine:
@@ -19,8 +24,8 @@ class SignalEngine:
     # Configuration (can later move to config.py)
     # ------------------------------------------------------------
     MIN_CONFIDENCE = 60          # Minimum confidence to trade
-    STRIKE_MODE = "ATM"          # ATM / OTM / ITM
-    OTM_OFFSET = 3               # 1 strike away from ATM
+    STRIKE_MODE = "ATM"          # ATM / OTM / ITM / DELTA
+    TARGET_DELTA = 0.5           # |delta| used when STRIKE_MODE = "DELTA"
 
     # ------------------------------------------------------------
     # Core signal generator
@@ -40,84 +45,131 @@ class SignalEngine:
         }
         """
 
-        prediction = PredictionEngine.predict()
-        print(prediction)
+        parsed_chain = OptionChainParser.parse(
+            underlying_ltp=underlying_ltp
+        )
+        prediction = PredictionEngine.predict(parsed_chain)
+        state_hub.publish("prediction", prediction)
+
+        option_type, no_trade = SignalEngine.decide(prediction)
+        if no_trade:
+            return no_trade
+
+        signal = SignalEngine.build_signal(parsed_chain, option_type)
+        return SignalEngine.finalize(signal, prediction)
+
+    @staticmethod
+    def decide(prediction):
+        """
+        Prediction -> (option_type, None) to trade, or (None, NO_TRADE
+        signal) when the direction / confidence filters reject it.
+        """
         # ---------------------------
         # No trade conditions
         # ---------------------------
         if prediction["direction"] == "NO_TRADE":
-            return SignalEngine._no_trade("Prediction says NO_TRADE")
+            return None, SignalEngine._no_trade("Prediction says NO_TRADE")
 
         if prediction["confidence"] < SignalEngine.MIN_CONFIDENCE:
-            return SignalEngine._no_trade(
+            return None, SignalEngine._no_trade(
                 f"Low confidence ({prediction['confidence']})"
             )
 
         # ---------------------------
-        # Parse option chain
+        # Direction → Option type
         # ---------------------------
+        if prediction["direction"] == "BULLISH":
+            return "CE", None
+        if prediction["direction"] == "BEARISH":
+            return "PE", None
+        return None, SignalEngine._no_trade("Invalid prediction direction")
+
+    @staticmethod
+    def finalize(signal, prediction):
+        """Attach the prediction's confidence and reasons to a tradable signal."""
+        if signal["action"] == "NO_TRADE":
+            return signal
+
+        # ---------------------------
+        # Final signal
+        # ---------------------------
+        signal.update({
+            "confidence": prediction["confidence"],
+            "reason": prediction["details"]["reasons"],
+            "prediction_score": prediction["score"]
+        })
+        return signal
+
+    @staticmethod
+    def manual_signal(underlying_ltp, option_type):
+        """
+        Signal for a manual CE / PE entry: same strike selection as the
+        bot, but no prediction / confidence gate.
+        """
         parsed_chain = OptionChainParser.parse(
             underlying_ltp=underlying_ltp
         )
+        signal = SignalEngine.build_signal(parsed_chain, option_type)
+        if signal["action"] != "NO_TRADE":
+            signal["reason"] = "Manual entry"
+        return signal
 
-        if not parsed_chain:
+    # ------------------------------------------------------------
+    # Strike selection
+    # ------------------------------------------------------------
+    @staticmethod
+    def build_signal(parsed_chain, option_type):
+        """
+        Pick the strike for option_type (CE / PE) per STRIKE_MODE and
+        return the tradable leg, or a NO_TRADE dict.
+        """
+        if not isinstance(parsed_chain, dict):
             return SignalEngine._no_trade("Option chain unavailable")
 
-        atm = parsed_chain["atm"]
-        otm = parsed_chain["otm"]
-        itm = parsed_chain["itm"]
-
-        # ---------------------------
-        # Select strike
-        # ---------------------------
         if SignalEngine.STRIKE_MODE == "ATM":
-            selected = atm
+            selected = parsed_chain["atm"]
         elif SignalEngine.STRIKE_MODE == "OTM":
-            selected = otm
+            selected = parsed_chain["otm"]
         elif SignalEngine.STRIKE_MODE == "ITM":
-            selected = itm
+            selected = parsed_chain["itm"]
+        elif SignalEngine.STRIKE_MODE == "DELTA":
+            selected = OptionChainParser.get_strike_by_delta(
+                parsed_chain["df"],
+                option_type,
+                SignalEngine.TARGET_DELTA
+            )
         else:
-            selected = atm
+            selected = parsed_chain["atm"]
 
         if selected is None:
             return SignalEngine._no_trade("Strike selection failed")
 
-        # ---------------------------
-        # Direction → Option type
-        # ---------------------------
-        if prediction["direction"] == "BULLISH":
-            option_type = "CE"
-            action = "BUY_CALL"
-            ltp = selected["ce_ltp"]
-            security_id = selected.get("ce_security_id")
-        elif prediction["direction"] == "BEARISH":
-            option_type = "PE"
-            action = "BUY_PUT"
-            ltp = selected["pe_ltp"]
-            security_id = selected.get("pe_security_id")
-        else:
-            return SignalEngine._no_trade("Invalid prediction direction")
+        leg = option_type.lower()
+        ltp = selected[f"{leg}_ltp"]
+        bid, ask = selected.get(f"{leg}_bid"), selected.get(f"{leg}_ask")
+        # Instrument master is authoritative; the chain payload's id is a fallback
+        security_id = instrument_master.security_id(
+            UNDER_SYMBOL, parsed_chain.get("expiry"), selected["strike"], option_type
+        ) or selected.get(f"{leg}_security_id")
 
         # ---------------------------
         # Sanity checks
         # ---------------------------
-        if ltp is None or ltp <= 0:
+        if ltp is None or pd.isna(ltp) or ltp <= 0:
             return SignalEngine._no_trade("Invalid option LTP")
-        if security_id is None:
+        if security_id is None or pd.isna(security_id):
             return SignalEngine._no_trade("Missing option security_id")
 
-        # ---------------------------
-        # Final signal
-        # ---------------------------
         return {
-            "action": action,
+            "action": "BUY_CALL" if option_type == "CE" else "BUY_PUT",
             "option_type": option_type,
             "strike": int(selected["strike"]),
             "security_id": str(security_id),
             "option_ltp": float(ltp),
-            "confidence": prediction["confidence"],
-            "reason": prediction["details"]["reasons"],
-            "prediction_score": prediction["score"]
+            "option_bid": None if bid is None or pd.isna(bid) else float(bid),
+            "option_ask": None if ask is None or pd.isna(ask) else float(ask),
+            "confidence": 0,
+            "reason": []
         }
 
     # ------------------------------------------------------------
@@ -0,0 +1,431 @@
+"""
+Load test for the end-to-end tick path.
+
+Drives TradingBot.tick -> OrderManager against synthetic option chains,
+synthetic 1m candles and a fake broker at rising tick rates, for each
+(underlyings, open positions) combination. Records per-level tick
+latency (p50 / p99 service and response time), achieved rate, CPU and
+RSS, and reports the saturation point: the first rate whose p99
+response time exceeds the budget or that the loop can no longer keep.
+
+Signal thresholds are zeroed and AUTO entries are flattened after every
+tick, so each tick runs parse -> analysis -> prediction -> submit; a
+level where too few ticks reached submit is reported as FAILED.
+
+Nothing talks to Dhan (orders and fill lookups hit FakeBroker); the
+bot process state (logs, OI archive, checkpoint, trade / execution
+logs, instruments) is scratch (temp dirs).
+
+Usage:
+    python -m scripts.load_test
+    python -m scripts.load_test --rates 1,2,5,10,20 --underlyings 1,3 --positions 0,5 --duration 10
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_DIR", os.path.join(tempfile.gettempdir(), "load_test_logs"))
+os.environ.setdefault("CLIENT_ID", "load-test")
+os.environ.setdefault("DHAN_API_TOKEN", "load-test")
+
+import numpy as np
+import pandas as pd
+
+from backend.config import market_now
+from backend import order_dispatcher as dispatcher_module
+from backend import order_manager as order_manager_module
+from backend import oi_analytics as oi_analytics_module
+from backend.execution_quality import execution_recorder, ExecutionAnalytics
+from backend.data_fetcher import data_fetcher, DATA_CACHE, CACHE_LOCK
+from backend.greeks_engine import GreeksEngine
+from backend.instrument_master import InstrumentMaster, instrument_master
+from backend.checkpoint import checkpointer
+from backend.position_book import position_book
+from backend.exit_engine import ExitEngine
+from backend.order_manager import tick_pipeline
+from backend.prediction_engine import PredictionEngine
+from backend.signal_engine import SignalEngine
+from scripts.run_bot import TradingBot
+
+
+# ============================================================
+# Configuration (can move to config.py later)
+# ============================================================
+BENCHMARK_DIR = "storage/benchmarks"
+DEFAULT_RATES = (1, 2, 5, 10, 20, 50)          # ticks / sec
+DEFAULT_UNDERLYINGS = (1, 2)
+DEFAULT_POSITIONS = (0, 5)
+DEFAULT_DURATION_SEC = 10
+DEFAULT_STRIKES = 100
+DEFAULT_BUDGET_MS = 250                        # p99 response-time budget per tick
+DEFAULT_BROKER_LATENCY_MS = 50
+MIN_ACHIEVED_RATIO = 0.95                      # below this the loop is saturated
+MIN_SUBMIT_RATIO = 0.5                         # below this the level did not exercise the order path
+
+UNDERLYING_SPOTS = {"NIFTY": 25000.0, "BANKNIFTY": 52000.0, "FINNIFTY": 24000.0, "MIDCPNIFTY": 13000.0}
+STRIKE_STEP = 50
+EXPIRY_DAYS = 3
+LOT_SIZE = 75
+
+
+# ============================================================
+# Fake broker
+# ============================================================
+class FakeBroker:
+    """
+    place_order / get_order_by_correlationID / get_order_by_id with a
+    fixed latency. Orders fill at once at the last published LTP.
+    """
+
+    def __init__(self, latency_ms=DEFAULT_BROKER_LATENCY_MS):
+        self.latency = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.by_tag = {}
+        self.by_id = {}
+
+    def place_order(self, **order):
+        time.sleep(self.latency)
+        with CACHE_LOCK:
+            quote = DATA_CACHE["option_ltp"].get(str(order.get("security_id"))) or {}
+        with self.lock:
+            order_id = str(next(self.ids))
+            data = {
+                "orderId": order_id, "orderStatus": "TRADED", "correlationId": order.get("tag"),
+                "averageTradedPrice": quote.get("ltp"), "filledQty": order.get("quantity"),
+            }
+            self.by_tag[order.get("tag")] = self.by_id[order_id] = data
+        return {"status": "success", "data": {"orderId": order_id, "orderStatus": "TRANSIT"}}
+
+    def get_order_by_correlationID(self, tag):
+        with self.lock:
+            data = self.by_tag.get(tag)
+        if data is None:
+            return {"status": "failure", "remarks": {"error_code": "DH-907"}, "data": ""}
+        return {"status": "success", "data": data}
+
+    def get_order_by_id(self, order_id):
+        time.sleep(self.latency)
+        with self.lock:
+            data = self.by_id.get(str(order_id))
+        return {"status": "success", "data": data} if data else {"status": "failure", "data": ""}
+
+    @property
+    def orders(self):
+        return len(self.by_tag)
+
+
+# ============================================================
+# Synthetic market
+# ============================================================
+class SyntheticMarket:
+    """Option chains (CE / PE lists as Dhan returns them) and 1m candles."""
+
+    def __init__(self, underlyings, strikes, seed):
+        self.rng = np.random.default_rng(seed)
+        self.expiry = (datetime.now() + timedelta(days=EXPIRY_DAYS)).strftime("%Y-%m-%d")
+        self.names = list(UNDERLYING_SPOTS)[:underlyings]
+        self.spot = {name: UNDERLYING_SPOTS[name] for name in self.names}
+        self.strikes = {}
+        self.ids = {}
+        for u, name in enumerate(self.names):
+            spot = self.spot[name]
+            self.strikes[name] = spot - spot % STRIKE_STEP + STRIKE_STEP * (np.arange(strikes) - strikes // 2)
+            base = 100000 * (u + 1)
+            self.ids[name] = (base + np.arange(strikes), base + 50000 + np.arange(strikes))
+        self.oi = {name: self.rng.integers(1000, 200000, (2, strikes)) for name in self.names}
+
+    def scrip_master(self):
+        """Scrip-master rows for every synthetic contract."""
+        rows = []
+        for name in self.names:
+            for leg, ids in zip(("CE", "PE"), self.ids[name]):
+                for strike, security_id in zip(self.strikes[name], ids):
+                    rows.append({
+                        "SEM_EXM_EXCH_ID": "NSE", "SEM_SEGMENT": "D",
+                        "SEM_SMST_SECURITY_ID": int(security_id),
+                        "SEM_TRADING_SYMBOL": f"{name}-LT-{strike:.0f}-{leg}",
+                        "SEM_CUSTOM_SYMBOL": f"{name} {strike:.0f} {leg}",
+                        "SEM_EXPIRY_DATE": f"{self.expiry} 14:30:00",
+                        "SEM_STRIKE_PRICE": float(strike), "SEM_OPTION_TYPE": leg,
+                        "SEM_LOT_UNITS": LOT_SIZE, "SEM_TICK_SIZE": 5.0,
+                    })
+        return pd.DataFrame(rows)
+
+    def chain(self, name):
+        """Next snapshot (the chain payload's "data"): spot random walk, BS prices, a few OI changes."""
+        self.spot[name] *= 1 + self.rng.normal(0, 0.0003)
+        spot, strikes = self.spot[name], self.strikes[name]
+        T = GreeksEngine.time_to_expiry(self.expiry)
+        vol = 0.12 + 0.0000004 * (strikes - spot) ** 2 / 100
+        ce = GreeksEngine.bs_price(spot, strikes, T, vol, 0.065, np.ones(len(strikes), bool))
+        pe = GreeksEngine.bs_price(spot, strikes, T, vol, 0.065, np.zeros(len(strikes), bool))
+        oi = self.oi[name]
+        moved = self.rng.random(oi.shape) < 0.2
+        oi[moved] += self.rng.integers(-500, 500, moved.sum())
+        np.clip(oi, 0, None, out=oi)
+
+        legs = {}
+        for leg, prices, ids, leg_oi in (("CE", ce, self.ids[name][0], oi[0]), ("PE", pe, self.ids[name][1], oi[1])):
+            legs[leg] = [
+                {
+                    "strike_price": float(k), "ltp": round(float(p), 2),
+                    "bidPrice": round(max(float(p) - 0.05, 0), 2), "askPrice": round(float(p) + 0.05, 2),
+                    "openInterest": int(o), "securityId": int(s),
+                }
+                for k, p, s, o in zip(strikes, prices, ids, leg_oi)
+            ]
+        return {"CE": legs["CE"], "PE": legs["PE"], "underlying_ltp": round(spot, 2), "expiry": self.expiry}
+
+    def candles(self, days=7):
+        """Random-walk 1m candles for the last `days` weekdays."""
+        sessions = []
+        day = pd.Timestamp.now().normalize() - pd.Timedelta(days=days * 2)
+        while len(sessions) < days:
+            day += pd.Timedelta(days=1)
+            if day.weekday() < 5:
+                sessions.append(pd.date_range(day + pd.Timedelta("9h15min"), day + pd.Timedelta("15h29min"), freq="1min"))
+        ts = sessions[0].append(sessions[1:])
+        close = self.spot[self.names[0]] + np.cumsum(self.rng.normal(0, 8, len(ts)))
+        open_ = np.r_[close[0], close[:-1]]
+        return pd.DataFrame({
+            "timestamp": ts,
+            "open": open_.astype("float32"),
+            "high": (np.maximum(open_, close) + self.rng.uniform(0, 5, len(ts))).astype("float32"),
+            "low": (np.minimum(open_, close) - self.rng.uniform(0, 5, len(ts))).astype("float32"),
+            "close": close.astype("float32"),
+            "volume": self.rng.integers(1000, 50000, len(ts)),
+        })
+
+
+# ============================================================
+# Process stats
+# ============================================================
+def rss_mb():
+    """Current resident set size (Linux /proc), else peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+# ============================================================
+# Harness
+# ============================================================
+class LoadTest:
+
+    def __init__(self, args):
+        self.args = args
+        self.scratch = tempfile.mkdtemp(prefix="load_test_")
+        self.broker = FakeBroker(args.broker_latency_ms)
+
+        # Scratch state instead of storage/ and the real broker
+        dispatcher_module.dhan = self.broker
+        order_manager_module.TRADE_LOG_PATH = os.path.join(self.scratch, "trades.xlsx")
+        checkpointer.path = os.path.join(self.scratch, "checkpoint", "state.pkl")
+        oi_analytics_module.OI_ARCHIVE_DIR = os.path.join(self.scratch, "oi_features")
+        execution_recorder.path = os.path.join(self.scratch, "executions.jsonl")
+
+        # Every tick takes the full entry path (no NO_TRADE short-circuit)
+        PredictionEngine.WEIGHTS["direction_threshold"] = 0
+        SignalEngine.MIN_CONFIDENCE = 0
+
+    def _setup(self, underlyings, positions):
+        market = SyntheticMarket(underlyings, self.args.strikes, self.args.seed)
+
+        master = InstrumentMaster(root=os.path.join(self.scratch, "instruments"), underlyings=market.names)
+        InstrumentMaster.build(market.scrip_master(), master._day_dir(datetime.now().date()), market.names)
+        master.load()
+        instrument_master._index = master._index
+        instrument_master.trading_date = master.trading_date
+
+        with CACHE_LOCK:
+            DATA_CACHE["ohlc_1m"] = market.candles()
+            DATA_CACHE["ohlc_timestamp"] = datetime.now()
+            DATA_CACHE["option_ltp"] = {}
+
+        # Open positions spread across the first underlying's chain
+        position_book.restore({"positions": {}, "realized_pnl": 0.0, "closed_count": 0})
+        position_book.max_open = positions + 1
+        position_book.per_source["MANUAL"] = positions
+        position_book.per_source["AUTO"] = 1
+        ids = market.ids[market.names[0]][0]
+        for i in range(positions):
+            security_id = str(ids[i % len(ids)])
+            position_book.add({
+                "symbol": f"LOAD {security_id}", "strike": 0, "option_type": "CE",
+                "security_id": security_id, "source": "MANUAL", "status": "OPEN",
+                "entry_price": 100.0, "qty": LOT_SIZE, "entry_tag": f"LT{i}",
+                "exit_pending": False, "entry_time": market_now(),
+                "sl": 0.05, "initial_sl": 0.05, "target": 1e9, "peak": 100.0,
+            })
+        return market
+
+    @staticmethod
+    def _flatten_auto():
+        """Drop AUTO entries so the next tick is not stopped by the risk gate."""
+        for trade in position_book.open_positions():
+            if trade["source"] == "AUTO":
+                position_book.discard(trade["security_id"])
+
+    def run_level(self, market, rate):
+        """Drive `rate` ticks/sec for the configured duration."""
+        interval = 1.0 / rate
+        total = max(int(rate * self.args.duration), 1)
+        service, response = [], []
+        submitted = 0
+
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        orders0 = self.broker.orders
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            # One snapshot per underlying per tick: the bot keeps a single
+            # parser state, so extra underlyings replay through it in turn.
+            for name in market.names:
+                chain = market.chain(name)
+                with CACHE_LOCK:
+                    DATA_CACHE["option_chain"] = {"data": chain}
+                    DATA_CACHE["option_chain_timestamp"] = datetime.now()
+                    DATA_CACHE["option_chain_expiry"] = market.expiry
+                data_fetcher.publish_prices(data_fetcher.chain_prices(chain))
+
+                t0 = time.perf_counter()
+                TradingBot.tick(auto_trade=True)
+                t1 = time.perf_counter()
+                service.append(t1 - t0)
+                response.append(t1 - scheduled)
+
+                run = tick_pipeline.last_run
+                if run and run["ctx"].get("submit") is not None:
+                    submitted += 1
+                LoadTest._flatten_auto()
+
+        wall = time.perf_counter() - wall0
+        cpu = time.process_time() - cpu0
+        service_ms = np.array(service) * 1000
+        response_ms = np.array(response) * 1000
+        # the last tick owns a full interval too: rate over the scheduled span
+        achieved = total / max(wall, total * interval)
+        submit_ratio = submitted / len(service)
+        return {
+            "target_rate": rate,
+            "achieved_rate": round(achieved, 2),
+            "ticks": len(service),
+            "service_p50_ms": round(float(np.percentile(service_ms, 50)), 2),
+            "service_p99_ms": round(float(np.percentile(service_ms, 99)), 2),
+            "response_p50_ms": round(float(np.percentile(response_ms, 50)), 2),
+            "response_p99_ms": round(float(np.percentile(response_ms, 99)), 2),
+            "cpu_pct": round(100 * cpu / wall, 1),
+            "rss_mb": round(rss_mb(), 1),
+            "orders": self.broker.orders - orders0,
+            "submitted": submitted,
+            "submit_ratio": round(submit_ratio, 3),
+            "failed": submit_ratio < MIN_SUBMIT_RATIO,
+            "saturated": bool(
+                np.percentile(response_ms, 99) > self.args.budget_ms
+                or achieved < rate * MIN_ACHIEVED_RATIO
+            ),
+        }
+
+    def run(self):
+        TradingBot.running = True
+        data_fetcher.add_price_listener(ExitEngine.on_prices)
+
+        scenarios = []
+        for underlyings, positions in itertools.product(self.args.underlyings, self.args.positions):
+            market = self._setup(underlyings, positions)
+            TradingBot.tick(auto_trade=True)          # warm caches / imports
+            LoadTest._flatten_auto()
+            levels = []
+            for rate in self.args.rates:
+                level = self.run_level(market, rate)
+                levels.append(level)
+                print(
+                    f"underlyings={underlyings} positions={positions} rate={rate:>4}/s  "
+                    f"achieved={level['achieved_rate']:>7}  p50={level['response_p50_ms']:>8} ms  "
+                    f"p99={level['response_p99_ms']:>8} ms  cpu={level['cpu_pct']:>5}%  "
+                    f"rss={level['rss_mb']} MB  submitted={level['submitted']}/{level['ticks']}"
+                    f"{'  FAILED' if level['failed'] else ''}{'  SATURATED' if level['saturated'] else ''}"
+                )
+                if level["failed"] or level["saturated"]:
+                    break
+            sustained = [lv["target_rate"] for lv in levels if not (lv["saturated"] or lv["failed"])]
+            scenarios.append({
+                "underlyings": underlyings,
+                "positions": positions,
+                "max_sustained_rate": max(sustained) if sustained else None,
+                "failed": any(lv["failed"] for lv in levels),
+                "levels": levels,
+            })
+
+        TradingBot.running = False
+        return scenarios
+
+    def report(self, scenarios):
+        report = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "params": vars(self.args),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+            },
+            "scenarios": scenarios,
+            "execution": ExecutionAnalytics.summary(ExecutionAnalytics.load(execution_recorder.path)),
+        }
+        os.makedirs(BENCHMARK_DIR, exist_ok=True)
+        path = os.path.join(BENCHMARK_DIR, f"load_{datetime.now():%Y%m%d_%H%M%S}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+        print("\nSaturation (max sustained ticks/sec within "
+              f"p99 <= {self.args.budget_ms} ms):")
+        for s in scenarios:
+            print(f"  underlyings={s['underlyings']} positions={s['positions']}: {s['max_sustained_rate']}"
+                  f"{'  (FAILED: ticks did not reach submit)' if s['failed'] else ''}")
+        print(f"Report: {path}")
+        return path
+
+
+def _int_list(text):
+    return [int(x) for x in text.split(",") if x]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tick path load test (fake broker, synthetic data)")
+    parser.add_argument("--rates", type=_int_list, default=list(DEFAULT_RATES), help="ticks/sec levels, ascending")
+    parser.add_argument("--underlyings", type=_int_list, default=list(DEFAULT_UNDERLYINGS))
+    parser.add_argument("--positions", type=_int_list, default=list(DEFAULT_POSITIONS), help="open positions held")
+    parser.add_argument("--strikes", type=int, default=DEFAULT_STRIKES, help="strikes per chain")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION_SEC, help="seconds per level")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="p99 response-time budget")
+    parser.add_argument("--broker-latency-ms", type=float, default=DEFAULT_BROKER_LATENCY_MS)
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    test = LoadTest(parse_args())
+    results = test.run()
+    test.report(results)
+    sys.exit(1 if any(s["failed"] for s in results) else 0)
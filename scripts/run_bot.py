@@ -1,7 +1,17 @@
 import time
 from backend.data_fetcher import data_fetcher, DATA_CACHE
+from backend.quote_poller import quote_poller
 from backend.order_manager import OrderManager
 from backend.signal_engine import SignalEngine
+from backend.exit_engine import ExitEngine
+from backend.checkpoint import checkpointer
+from backend.instrument_master import instrument_master
+from backend.profiler import tick_profiler
+from backend.metrics import metrics_server, TICK_DURATION
+from backend.push_api import push_server, state_hub, positions_view
+from backend.logger import get_logger
+
+log = get_logger("Bot")
 
 
 class TradingBot:
@@ -14,16 +24,27 @@ class TradingBot:
             return
 
         TradingBot.running = True
+        data_fetcher.add_price_listener(ExitEngine.on_prices)
+        instrument_master.load()
+        checkpointer.restore()
+        tick_profiler.install_signal_handler()
+        metrics_server.start()
+        push_server.start()
         data_fetcher.start()
-        print("[Bot] Started")
+        quote_poller.start()
+        log.info("Started")
 
     @staticmethod
     def stop():
         TradingBot.running = False
         data_fetcher.stop()
-        print("[Bot] Stopped")
+        quote_poller.stop()
+        checkpointer.save()
+        log.info("Stopped")
 
     @staticmethod
+    @tick_profiler.profiled
+    @TICK_DURATION.timed()
     def tick(auto_trade=True):
         """
         Called every few seconds from Streamlit.
@@ -31,6 +52,12 @@ class TradingBot:
         if not TradingBot.running:
             return
 
+        # Time-based exits don't wait for a price update
+        ExitEngine.on_timer()
+        checkpointer.maybe_save()
+        instrument_master.ensure_fresh()
+        state_hub.publish("positions", positions_view)
+
         # Get latest underlying price
         chain = DATA_CACHE.get("option_chain")
         if not chain:
@@ -3,6 +3,7 @@ from backend.ohlc_processor import OHLCProcessor
 from backend.analysis_engine import AnalysisEngine
 from backend.prediction_engine import PredictionEngine
 from backend.signal_engine import SignalEngine
+from backend.schema import DataSchema
 
 # Step 1: Fetch data
 data_fetcher.fetch_ohlc()
@@ -20,6 +21,13 @@ print(df_analysis[["timestamp", "close", "trend_bias"]].tail())
 # Step 4: Prediction
 prediction = PredictionEngine.predict()
 print("Prediction:", prediction)
+
+# Step 5: Memory footprint
+print(DataSchema.memory_report({
+    "ohlc_1m": DATA_CACHE["ohlc_1m"],
+    "ohlc_5m": df_5m,
+    "analysis_5m": df_analysis,
+}))
 # data_fetcher.fetch_option_chain()
 # nifty_ltp = DATA_CACHE["option_chain"]
 # print("*********Singnal output******\n")
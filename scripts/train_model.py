@@ -0,0 +1,23 @@
+"""
+Train the ML direction model offline.
+
+Usage:
+    python -m scripts.train_model            # last 180 days
+    python -m scripts.train_model 365        # last N days
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+from backend.ml_model import ModelTrainer, MLPredictor
+
+days = int(sys.argv[1]) if len(sys.argv) > 1 else 180
+end = datetime.now() - timedelta(days=1)
+start = end - timedelta(days=days)
+
+meta = ModelTrainer.train(start, end)
+print("Model:", meta["model"], "version:", meta["version"])
+print("CV balanced accuracy:", meta["cv_balanced_accuracy"])
+
+# Smoke-test the inference path on the saved artifact
+MLPredictor.load()